@@ -1,15 +1,38 @@
-import anthropic
+import asyncio
 import json
+from typing import AsyncIterator
 from app.us_city_state_map import CITY_STATE_MAP  # create a dictionary mapping major cities to states
-from app.services.load_service import find_best_loads
+from app.services.load_service import find_best_loads_async
+from app.services.llm_client import shared_llm_client
+from app.services.http_client import shared_http_client
+from app.services.slot_extractor import FAST_PATH_CONFIG, extract_slots, record_extraction
+from app.services.intent_classifier import intent_classifier
+from app.services.conversation_memory import ConversationMemory
+from app.services.speculative_search import SpeculativeSearch
 from datetime import datetime
 import logging
-import httpx  # Add this import
+import time
 
 API_KEY = "sk-ant-REDACTED"
 
 REQUIRED_ARGS = ["start_city", "start_state", "dest_city", "dest_state", "max_weight", "truck_type", "date"]
 
+# Fixed replies that need no LLM; calls.py has them pre-rendered to speech at startup
+CANNED_REPLIES = {
+    "greeting": "Hi! I'm Skye from Cinesis. What route are you looking for loads on?",
+    "quit": "Thanks for calling. Have a great day!",
+    "goodbye": "Thanks for calling Cinesis! Have a great day!",
+    "delete_login": "I apologize, but you need to be logged in to remove loads. Please log in on our website and try again.",
+    "deleted": "Alright, I've removed that load for you. Anything else you need help with?",
+    "delete_auth_error": "I apologize, but I'm having trouble with the authentication. Please try again in a moment.",
+    "delete_not_found": "I couldn't find that load in your booked loads. It may have already been removed.",
+    "delete_error": "I apologize, but I encountered an issue while trying to remove the load. Please try again or contact support if the issue persists.",
+    "book_login": "I apologize, but you need to be logged in to book loads. Please log in on our website and try again.",
+    "book_auth_error": "I apologize, but I'm having trouble with the booking system authentication. Please try again in a moment.",
+    "book_error": "I apologize, but I encountered an issue while trying to book the load. Please try again or contact support if the issue persists.",
+    "booked": "Perfect! I've booked that load for you. You can view all the details in the Booked Loads tab on our website. Is there anything else you need help with?",
+}
+
 def format_load_for_agent(load, rank):
     """Format a load object into a clean string for the agent"""
     pay_rate = load.get('pay_rate')
@@ -54,11 +77,12 @@ def format_load_for_terminal(load, rank):
 
 class DispatchAgent:
     def __init__(self, api_key=API_KEY, auth_token=None):
-        self.client = anthropic.Anthropic(
-            api_key=api_key,
-        )
-        self.chat_history = []
-        self.extraction_history = []  # Separate history for extraction model
+        # All agents share one async client; only the key is per agent
+        self.api_key = api_key
+        self.llm = shared_llm_client
+        # Bounded ring buffers with a rolling summary of older turns
+        self.chat_history = ConversationMemory()
+        self.extraction_history = ConversationMemory()  # Separate history for extraction model
         self.args_collected = {}
         self.call_sid = None
         self.is_first_message = True
@@ -68,6 +92,10 @@ class DispatchAgent:
         self.booked_load = None  # Track the currently booked load
         self.booking_id = None   # Track the booking ID
         self.auth_token = auth_token  # Store the auth token
+        # Origin-only search started while the destination is still being collected
+        self.prefetch = SpeculativeSearch()
+        # Set by process_input_stream: reply text deltas are pushed here as they arrive
+        self._reply_chunks = None
 
     def reset(self):
         """Only reset state that should be cleared between calls"""
@@ -79,6 +107,7 @@ class DispatchAgent:
         self.last_search_params = None
         self.booked_load = None
         self.booking_id = None
+        self.prefetch.cancel()
         # Note: We don't reset chat_history, extraction_history, or auth_token
 
     def is_ready(self):
@@ -114,28 +143,29 @@ class DispatchAgent:
             self.call_sid = call_sid
 
         # Update histories with user input
-        message = {"role": "user", "content": [{"type": "text", "text": user_input}]}
-        self.chat_history.append(message)
-        self.extraction_history.append(message)
+        self._update_histories("user", user_input)
+
+        # Classify the utterance in one pass; current state decides which intents can apply
+        allowed_intents = {"greeting", "quit", "end_call"}
+        if self.current_loads:
+            allowed_intents |= {"next_load", "book_load", "confirm"}
+        if self.booked_load:
+            allowed_intents.add("delete_load")
+        intent = intent_classifier.classify(user_input, allowed_intents)
 
         # Handle common voice commands without needing extraction
-        if user_input.lower() in ['hi', 'hello', 'hey', 'start', 'begin', 'hi there']:
-            response = "Hi! I'm Skye from Cinesis. What route are you looking for loads on?"
+        if intent == "greeting":
+            response = CANNED_REPLIES["greeting"]
             self._update_histories("assistant", response)
             return response
             
-        if user_input.lower() in ['quit', 'exit', 'stop', 'end', 'goodbye', 'bye']:
-            response = "Thanks for calling. Have a great day!"
+        if intent == "quit":
+            response = CANNED_REPLIES["quit"]
             self._update_histories("assistant", response)
             return response
 
         # Handle requests for next/different load
-        next_load_phrases = [
-            'next load', 'another load', 'different load', 'what else', 
-            'other loads', 'show more', 'more loads', 'what other', 
-            'got anything else', 'other options'
-        ]
-        if any(phrase in user_input.lower() for phrase in next_load_phrases) and self.current_loads:
+        if intent == "next_load":
             loads_str = "\n\n".join(
                 format_load_for_agent(load, idx) 
                 for idx, load in enumerate(self.current_loads[:5], 1)
@@ -144,10 +174,7 @@ class DispatchAgent:
             
             main_prompt = (
                 "You are Skye, a freight broker agent at Cinesis. The driver is asking about alternative loads. " +
-                "Previous conversation:\n" + "\n".join([
-                    f"{'Driver' if m['role'] == 'user' else 'Skye'}: {m['content'][0]['text']}"
-                    for m in self.chat_history[-5:]
-                ]) + "\n\n"
+                self._conversation_context() +
                 "Rules for showing alternatives:\n"
                 "1. The loads are already ranked by our algorithm (Load #1 is best)\n"
                 "2. If they didn't like Load #1, offer Load #2 and mention its key advantages\n"
@@ -157,24 +184,12 @@ class DispatchAgent:
                 "Available loads:\n" + loads_str
             )
 
-            chat_response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=500,
-                messages=[{
-                    "role": "user",
-                    "content": main_prompt
-                }]
-            )
-            spoken_response = chat_response.content[0].text
+            spoken_response = await self._reply(main_prompt)
             self._update_histories("assistant", spoken_response)
             return spoken_response
 
         # Handle conversation endings
-        ending_phrases = [
-            'that\'s it', 'thanks', 'thank you', 'bye', 'goodbye', 'done',
-            'that\'s all', 'have a good day', 'see you', 'take care'
-        ]
-        if any(phrase in user_input.lower() for phrase in ending_phrases):
+        if intent == "end_call":
             if self.booked_load:
                 response = (
                     f"Thanks for booking with Cinesis! Your load (ID: {self.booking_id}) has been confirmed. "
@@ -182,238 +197,232 @@ class DispatchAgent:
                     f"Have a great day!"
                 )
             else:
-                response = "Thanks for calling Cinesis! Have a great day!"
+                response = CANNED_REPLIES["goodbye"]
             self._update_histories("assistant", response)
             return response
 
         # Handle requests to remove/delete loads
-        delete_phrases = [
-            'remove that load', 'delete that load', 'cancel that load', 
-            'remove the load', 'delete the load', 'cancel the load',
-            'remove it', 'delete it', 'cancel it', 'take it off',
-            'remove this load', 'delete this load', 'cancel this load'
-        ]
-        if any(phrase in user_input.lower() for phrase in delete_phrases) and self.booked_load:
+        if intent == "delete_load":
             try:
                 # Delete the load via the API
-                async with httpx.AsyncClient(follow_redirects=True) as client:
-                    if not self.auth_token:
-                        print("[AGENT] No auth token available for deleting load")
-                        response_text = "I apologize, but you need to be logged in to remove loads. Please log in on our website and try again."
-                        self._update_histories("assistant", response_text)
-                        return response_text
-
-                    headers = {
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {self.auth_token}"
-                    }
-                        
-                    print(f"[AGENT] Attempting to delete load with ID: {self.booking_id}")
-                    
-                    response = await client.delete(
-                        f"http://localhost:8000/booked-loads/{self.booking_id}",
-                        headers=headers,
-                        timeout=10.0
-                    )
-                    
-                    print(f"[AGENT] Delete response status: {response.status_code}")
+                if not self.auth_token:
+                    print("[AGENT] No auth token available for deleting load")
+                    response_text = CANNED_REPLIES["delete_login"]
+                    self._update_histories("assistant", response_text)
+                    return response_text
+
+                headers = {
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.auth_token}"
+                }
                     
-                    if response.status_code in [200, 204]:
-                        print(f"[AGENT] Successfully deleted load with ID: {self.booking_id}")
-                        self.booked_load = None
-                        self.booking_id = None
-                        response_text = "Alright, I've removed that load for you. Anything else you need help with?"
-                    elif response.status_code == 401:
-                        print(f"[AGENT] Authentication failed. Status: {response.status_code}")
-                        response_text = "I apologize, but I'm having trouble with the authentication. Please try again in a moment."
-                    elif response.status_code == 404:
-                        print(f"[AGENT] Load not found. Status: {response.status_code}")
-                        response_text = "I couldn't find that load in your booked loads. It may have already been removed."
-                    else:
-                        print(f"[AGENT] Failed to delete load. Status: {response.status_code}")
-                        response_text = "I apologize, but I encountered an issue while trying to remove the load. Please try again or contact support if the issue persists."
+                print(f"[AGENT] Attempting to delete load with ID: {self.booking_id}")
+                
+                response = await shared_http_client.request(
+                    "DELETE",
+                    f"http://localhost:8000/booked-loads/{self.booking_id}",
+                    headers=headers,
+                    timeout=10.0,
+                    follow_redirects=True
+                )
+                
+                print(f"[AGENT] Delete response status: {response.status_code}")
+                
+                if response.status_code in [200, 204]:
+                    print(f"[AGENT] Successfully deleted load with ID: {self.booking_id}")
+                    self.booked_load = None
+                    self.booking_id = None
+                    response_text = CANNED_REPLIES["deleted"]
+                elif response.status_code == 401:
+                    print(f"[AGENT] Authentication failed. Status: {response.status_code}")
+                    response_text = CANNED_REPLIES["delete_auth_error"]
+                elif response.status_code == 404:
+                    print(f"[AGENT] Load not found. Status: {response.status_code}")
+                    response_text = CANNED_REPLIES["delete_not_found"]
+                else:
+                    print(f"[AGENT] Failed to delete load. Status: {response.status_code}")
+                    response_text = CANNED_REPLIES["delete_error"]
             except Exception as e:
                 print(f"[AGENT] Error deleting load: {str(e)}")
-                response_text = "I apologize, but I encountered an issue while trying to remove the load. Please try again or contact support if the issue persists."
+                response_text = CANNED_REPLIES["delete_error"]
             
             self._update_histories("assistant", response_text)
             return response_text
 
         # Handle booking confirmations
-        booking_phrases = [
-            'book it', 'lets book', 'book this', 'get it booked', 'take it',
-            'ill take it', 'sounds good', 'book that', 'get me booked',
-            'yes', 'yeah', 'sure', 'okay', 'ok', 'great', 'perfect',
-            'that works', 'that\'ll work', 'i\'ll take that', 'book it',
-            'go ahead', 'do it', 'yes please', 'that\'s good', 'that sounds good',
-            'that\'ll be great', 'that\'s great', 'i\'ll be great', 'that\'s perfect',
-            'let\'s do it', 'let\'s go with that'
-        ]
-        if any(phrase in user_input.lower().replace("'", "") for phrase in booking_phrases) and self.current_loads:
+        if intent in ("book_load", "confirm"):
             try:
                 # Book the load via the API
-                async with httpx.AsyncClient(follow_redirects=True) as client:
-                    if not self.auth_token:
-                        print("[AGENT] No auth token available for booking")
-                        response_text = "I apologize, but you need to be logged in to book loads. Please log in on our website and try again."
-                        self._update_histories("assistant", response_text)
-                        return response_text
-
-                    headers = {
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {self.auth_token}"
-                    }
-                        
-                    print(f"[AGENT] Attempting to book load with headers: {headers}")
-                    print(f"[AGENT] Load data: {self.current_loads[0]}")
-                    
-                    # Convert entry_id to a numeric hash for the database
-                    load_id = hash(self.current_loads[0].get('entry_id', '')) % (2**31)
-                    
-                    response = await client.post(
-                        "http://localhost:8000/booked-loads",
-                        json={
-                            "id": load_id,  # Send as integer
-                            "load_id": f"CINESIS-{self.current_loads[0].get('entry_id', '')[:8]}",  # Keep the original ID as a reference
-                            "booked_by": "voice_agent",
-                            "origin_city": self.current_loads[0]["origin_city"],
-                            "origin_state": self.current_loads[0]["origin_state"],
-                            "destination_city": self.current_loads[0]["destination_city"],
-                            "destination_state": self.current_loads[0]["destination_state"],
-                            "distance": float(self.current_loads[0].get("trip_miles", 0) or self.current_loads[0].get("distance", 0)),
-                            "pay_rate": float(self.current_loads[0].get("pay_rate") or 0),
-                            "rate_per_mile_est": float(self.current_loads[0].get("rate_per_mile_est") or 0),
-                            "weight": float(self.current_loads[0].get("weight", 0)),
-                            "equipment_type": self.current_loads[0].get("equipment_type") or self.current_loads[0].get("truck_type"),
-                            "other_trailer_types": self.current_loads[0].get("other_trailer_types"),
-                            "ship_date": self.current_loads[0].get("ship_date"),
-                            "data_source": self.current_loads[0].get("data_source", "direct_freight"),
-                            "green_light": bool(self.current_loads[0].get("green_light", False)),
-                            "full_load": bool(self.current_loads[0].get("full_load", True)),
-                            "dead_head": float(self.current_loads[0].get("dead_head", 0)),
-                            "receive_date": self.current_loads[0].get("receive_date"),
-                            "status": "booked"
-                        },
-                        headers=headers,
-                        timeout=10.0
-                    )
-                    
-                    print(f"[AGENT] Booking response status: {response.status_code}")
-                    print(f"[AGENT] Booking response: {response.text}")
+                if not self.auth_token:
+                    print("[AGENT] No auth token available for booking")
+                    response_text = CANNED_REPLIES["book_login"]
+                    self._update_histories("assistant", response_text)
+                    return response_text
+
+                headers = {
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.auth_token}"
+                }
                     
-                    if response.status_code == 200:
-                        booked_load = response.json()
-                        self.booked_load = booked_load
-                        self.booking_id = booked_load["id"]
-                        print(f"[AGENT] Successfully booked load with ID: {self.booking_id}")
-                        response_text = (
-                            f"Perfect! I've booked that load for you. "
-                            f"You can view all the details in the Booked Loads tab on our website. "
-                            f"Is there anything else you need help with?"
-                        )
-                    elif response.status_code == 401:
-                        print(f"[AGENT] Authentication failed. Status: {response.status_code}")
-                        response_text = "I apologize, but I'm having trouble with the booking system authentication. Please try again in a moment."
-                    else:
-                        print(f"[AGENT] Failed to book load. Status: {response.status_code}, Response: {response.text}")
-                        response_text = "I apologize, but I encountered an issue while trying to book the load. Please try again or contact support if the issue persists."
+                print(f"[AGENT] Attempting to book load with headers: {headers}")
+                print(f"[AGENT] Load data: {self.current_loads[0]}")
+                
+                # Convert entry_id to a numeric hash for the database
+                load_id = hash(self.current_loads[0].get('entry_id', '')) % (2**31)
+                
+                response = await shared_http_client.post(
+                    "http://localhost:8000/booked-loads",
+                    json={
+                        "id": load_id,  # Send as integer
+                        "load_id": f"CINESIS-{self.current_loads[0].get('entry_id', '')[:8]}",  # Keep the original ID as a reference
+                        "booked_by": "voice_agent",
+                        "origin_city": self.current_loads[0]["origin_city"],
+                        "origin_state": self.current_loads[0]["origin_state"],
+                        "destination_city": self.current_loads[0]["destination_city"],
+                        "destination_state": self.current_loads[0]["destination_state"],
+                        "distance": float(self.current_loads[0].get("trip_miles", 0) or self.current_loads[0].get("distance", 0)),
+                        "pay_rate": float(self.current_loads[0].get("pay_rate") or 0),
+                        "rate_per_mile_est": float(self.current_loads[0].get("rate_per_mile_est") or 0),
+                        "weight": float(self.current_loads[0].get("weight", 0)),
+                        "equipment_type": self.current_loads[0].get("equipment_type") or self.current_loads[0].get("truck_type"),
+                        "other_trailer_types": self.current_loads[0].get("other_trailer_types"),
+                        "ship_date": self.current_loads[0].get("ship_date"),
+                        "data_source": self.current_loads[0].get("data_source", "direct_freight"),
+                        "green_light": bool(self.current_loads[0].get("green_light", False)),
+                        "full_load": bool(self.current_loads[0].get("full_load", True)),
+                        "dead_head": float(self.current_loads[0].get("dead_head", 0)),
+                        "receive_date": self.current_loads[0].get("receive_date"),
+                        "status": "booked"
+                    },
+                    headers=headers,
+                    timeout=10.0,
+                    follow_redirects=True
+                )
+                
+                print(f"[AGENT] Booking response status: {response.status_code}")
+                print(f"[AGENT] Booking response: {response.text}")
+                
+                if response.status_code == 200:
+                    booked_load = response.json()
+                    self.booked_load = booked_load
+                    self.booking_id = booked_load["id"]
+                    print(f"[AGENT] Successfully booked load with ID: {self.booking_id}")
+                    response_text = CANNED_REPLIES["booked"]
+                elif response.status_code == 401:
+                    print(f"[AGENT] Authentication failed. Status: {response.status_code}")
+                    response_text = CANNED_REPLIES["book_auth_error"]
+                else:
+                    print(f"[AGENT] Failed to book load. Status: {response.status_code}, Response: {response.text}")
+                    response_text = CANNED_REPLIES["book_error"]
             except Exception as e:
                 print(f"[AGENT] Error booking load: {str(e)}")
-                response_text = "I apologize, but I encountered an issue while trying to book the load. Please try again or contact support if the issue persists."
+                response_text = CANNED_REPLIES["book_error"]
             
             self._update_histories("assistant", response_text)
             return response_text
 
         # Regular extraction and processing continues...
         extracted = {}
-        try:
-            extract_prompt = (
-                "You are a professional load matching agent parsing driver requests. Your task is to extract structured info as a JSON dictionary.\n"
-                "CRITICAL: You MUST ALWAYS return a valid JSON object, even if empty.\n\n"
-                "Rules for extraction:\n"
-                "1. ALWAYS return valid JSON - this is critical for our phone system\n"
-                "2. Expand common city codes: SF→San Francisco, LA→Los Angeles, NYC→New York City, etc\n"
-                "3. Convert dates to YYYY-MM-DD format (e.g., 'June 4th 2025' → '2025-06-04')\n"
-                "4. For unclear cities (like 'SS'), omit them and let the conversation continue\n"
-                "5. Extract ONLY what's explicitly mentioned\n"
-                "6. Use two-letter state codes (CA, NY, etc)\n"
-                "7. For weights, convert to standard format (e.g., '45k' → '45000')\n"
-                "8. For truck types: V (Van), R (Reefer), F (Flatbed)\n"
-                "9. If multiple cities are mentioned for origin, ask for clarification\n"
-                "10. Never accept multiple start cities - if unclear which one, don't set start_city\n\n"
-                "Example inputs and outputs:\n"
-                '# "Looking for loads from SF to LA leaving June 4th 2025"\n'
-                '{"start_city": "San Francisco", "start_state": "CA", "dest_city": "Los Angeles", "dest_state": "CA", "date": "2025-06-04"}\n\n'
-                '# "Got a reefer, max 45k pounds"\n'
-                '{"truck_type": "R", "max_weight": "45000"}\n\n'
-                '# "From either SF or LA"\n'
-                '{}\n\n'
-                '# "Change it to Dallas"\n'
-                '{"dest_city": "Dallas", "dest_state": "TX"}\n\n'
-                '# "Hello there"\n'
-                '{}\n\n'
-                "Previous messages:\n" + "\n".join([f"User: {m['content'][0]['text']}" for m in self.extraction_history[-5:] if m['role'] == 'user']) + "\n\n"
-                "Current context: " + str(self.args_collected) + "\n"
-                "User message: " + user_input + "\n"
-                "Remember: ALWAYS return valid JSON, even if empty {}"
-            )
+        response_text = ""
+        # Try the local parser first; only utterances it can't read confidently pay for an LLM round trip
+        fast_slots, confidence = extract_slots(user_input, self.args_collected)
+        if confidence >= FAST_PATH_CONFIG["MIN_CONFIDENCE"]:
+            extracted = fast_slots
+            record_extraction(fast_path=True)
+            print(f"[AGENT] Fast-path extraction ({confidence:.2f}): {extracted}")
+            if self._params_changed(extracted):
+                self.args_collected.update(extracted)
+            self._update_histories("assistant", f"Extracted: {json.dumps(extracted)}", extraction_only=True)
+        else:
+            try:
+                extract_prompt = (
+                    "You are a professional load matching agent parsing driver requests. Your task is to extract structured info as a JSON dictionary.\n"
+                    "CRITICAL: You MUST ALWAYS return a valid JSON object, even if empty.\n\n"
+                    "Rules for extraction:\n"
+                    "1. ALWAYS return valid JSON - this is critical for our phone system\n"
+                    "2. Expand common city codes: SF→San Francisco, LA→Los Angeles, NYC→New York City, etc\n"
+                    "3. Convert dates to YYYY-MM-DD format (e.g., 'June 4th 2025' → '2025-06-04')\n"
+                    "4. For unclear cities (like 'SS'), omit them and let the conversation continue\n"
+                    "5. Extract ONLY what's explicitly mentioned\n"
+                    "6. Use two-letter state codes (CA, NY, etc)\n"
+                    "7. For weights, convert to standard format (e.g., '45k' → '45000')\n"
+                    "8. For truck types: V (Van), R (Reefer), F (Flatbed)\n"
+                    "9. If multiple cities are mentioned for origin, ask for clarification\n"
+                    "10. Never accept multiple start cities - if unclear which one, don't set start_city\n\n"
+                    "Example inputs and outputs:\n"
+                    '# "Looking for loads from SF to LA leaving June 4th 2025"\n'
+                    '{"start_city": "San Francisco", "start_state": "CA", "dest_city": "Los Angeles", "dest_state": "CA", "date": "2025-06-04"}\n\n'
+                    '# "Got a reefer, max 45k pounds"\n'
+                    '{"truck_type": "R", "max_weight": "45000"}\n\n'
+                    '# "From either SF or LA"\n'
+                    '{}\n\n'
+                    '# "Change it to Dallas"\n'
+                    '{"dest_city": "Dallas", "dest_state": "TX"}\n\n'
+                    '# "Hello there"\n'
+                    '{}\n\n'
+                    "Previous messages:\n" + self.extraction_history.render(5, {"user": "User"}) + "\n\n"
+                    "Current context: " + str(self.args_collected) + "\n"
+                    "User message: " + user_input + "\n"
+                    "Remember: ALWAYS return valid JSON, even if empty {}"
+                )
 
-            extract_response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=200,
-                messages=[{
-                    "role": "user",
-                    "content": extract_prompt
-                }]
-            )
+                llm_start = time.perf_counter()
+                extract_text = await self.llm.complete(extract_prompt, max_tokens=200, api_key=self.api_key)
+                record_extraction(fast_path=False, llm_ms=(time.perf_counter() - llm_start) * 1000)
             
-            # Ensure we get valid JSON
-            response_text = extract_response.content[0].text.strip()
-            if not response_text.startswith('{'): # Find the first JSON object
-                response_text = response_text[response_text.find('{'):]
-            if not response_text.endswith('}'): # Trim anything after the JSON
-                response_text = response_text[:response_text.rfind('}')+1]
+                # Ensure we get valid JSON
+                response_text = extract_text.strip()
+                if not response_text.startswith('{'): # Find the first JSON object
+                    response_text = response_text[response_text.find('{'):]
+                if not response_text.endswith('}'): # Trim anything after the JSON
+                    response_text = response_text[:response_text.rfind('}')+1]
             
-            extracted = json.loads(response_text)
+                extracted = json.loads(response_text)
             
-            # Validate extracted data
-            if isinstance(extracted.get('start_city'), list):
-                # If multiple start cities were extracted, clear it and ask for clarification
-                extracted.pop('start_city', None)
-                extracted.pop('start_state', None)
-                print("[AGENT] Multiple start cities detected - clearing and asking for clarification")
+                # Validate extracted data
+                if isinstance(extracted.get('start_city'), list):
+                    # If multiple start cities were extracted, clear it and ask for clarification
+                    extracted.pop('start_city', None)
+                    extracted.pop('start_state', None)
+                    print("[AGENT] Multiple start cities detected - clearing and asking for clarification")
             
-            # Only update if we got new valid information
-            if self._params_changed(extracted):
-                for key, value in extracted.items():
-                    if value is not None and len(str(value).strip()) > 0:
-                        self.args_collected[key] = value
+                # Only update if we got new valid information
+                if self._params_changed(extracted):
+                    for key, value in extracted.items():
+                        if value is not None and len(str(value).strip()) > 0:
+                            self.args_collected[key] = value
 
-            # Update extraction history with the parsed result
-            self._update_histories("assistant", f"Extracted: {json.dumps(extracted)}", extraction_only=True)
+                # Update extraction history with the parsed result
+                self._update_histories("assistant", f"Extracted: {json.dumps(extracted)}", extraction_only=True)
 
-        except Exception as e:
-            print(f"❌ Parser error: {e}\nAttempted to parse: {response_text}")
-            extracted = {}
+            except Exception as e:
+                print(f"❌ Parser error: {e}\nAttempted to parse: {response_text}")
+                extracted = {}
 
         print("🧠 Current args_collected:", self.args_collected)
 
+        # Origin, equipment and date usually arrive turns before the destination
+        if not self.is_ready():
+            self.prefetch.update(self.args_collected)
+
         # Search for loads only if necessary
         if self._should_search_loads(extracted):
             print("\n🔍 Searching for loads with:", self.args_collected)
             temp = self.args_collected
             
-            result = find_best_loads(
-                start_city=temp['start_city'],
-                start_state=temp['start_state'],
-                dest_city=temp['dest_city'],
-                dest_state=temp['dest_state'],
-                max_weight=temp['max_weight'],
-                truck_type=temp['truck_type'],
-                ship_date=temp['date'],
-                origin_city=temp['start_city'],
-                origin_state=temp['start_state']
-            )
+            result = await self.prefetch.best_loads(temp)
+            if result is None:
+                result = await find_best_loads_async(
+                    start_city=temp['start_city'],
+                    start_state=temp['start_state'],
+                    dest_city=temp['dest_city'],
+                    dest_state=temp['dest_state'],
+                    max_weight=temp['max_weight'],
+                    truck_type=temp['truck_type'],
+                    ship_date=temp['date'],
+                    origin_city=temp['start_city'],
+                    origin_state=temp['start_state']
+                )
             
             # Format and print loads to terminal
             print("\n📦 Direct Freight API Response:")
@@ -447,10 +456,7 @@ class DispatchAgent:
         main_prompt = (
             "You are Skye, a friendly freight broker at Cinesis talking to a truck driver. " + 
             ("" if self.is_first_message else "DO NOT introduce yourself again. ") +
-            "Previous conversation:\n" + "\n".join([
-                f"{'Driver' if m['role'] == 'user' else 'Skye'}: {m['content'][0]['text']}"
-                for m in self.chat_history[-5:]
-            ]) + "\n\n"
+            self._conversation_context() +
             "Current context: " + (
                 "NO LOADS FOUND - Apologize and suggest checking back later for new loads" if result == "NO_LOADS"
                 else "NEED MORE INFO - Ask for: " + result.split(":")[1] if result.startswith("NEED_INFO")
@@ -470,15 +476,7 @@ class DispatchAgent:
             "11. No need to repeat load details after initial offer"
         )
 
-        chat_response = self.client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=500,
-            messages=[{
-                "role": "user",
-                "content": main_prompt + "\n\n" + user_input
-            }]
-        )
-        spoken_response = chat_response.content[0].text
+        spoken_response = await self._reply(main_prompt + "\n\n" + user_input)
 
         # Update histories with the response
         self._update_histories("assistant", spoken_response)
@@ -486,14 +484,67 @@ class DispatchAgent:
         self.is_first_message = False
         return spoken_response
 
+    async def process_input_stream(self, user_input: str, call_sid: str = None) -> AsyncIterator[str]:
+        """
+        process_input for voice: yields the reply in pieces as the LLM generates
+        it, so speech can start before the reply is finished. Canned replies
+        (greetings, booking confirmations) come through as one piece.
+        """
+        chunks: asyncio.Queue = asyncio.Queue()
+        self._reply_chunks = chunks
+        turn = asyncio.create_task(self.process_input(user_input, call_sid))
+        turn.add_done_callback(lambda _: chunks.put_nowait(None))
+        streamed = False
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                streamed = True
+                yield chunk
+            response = await turn
+        finally:
+            self._reply_chunks = None
+            if not turn.done():
+                turn.cancel()
+        if not streamed:
+            yield response
+
+    async def _reply(self, prompt: str) -> str:
+        """LLM reply to the caller, streamed to process_input_stream when one is listening"""
+        chunks = self._reply_chunks
+        if chunks is None:
+            return await self.llm.complete(prompt, max_tokens=500, api_key=self.api_key)
+        parts = []
+        async for text in self.llm.stream(prompt, max_tokens=500, api_key=self.api_key):
+            parts.append(text)
+            chunks.put_nowait(text)
+        return "".join(parts)
+
     def _update_histories(self, role: str, content: str, extraction_only: bool = False):
         """Update chat histories with new message"""
-        message = {"role": role, "content": [{"type": "text", "text": content}]}
-        if extraction_only:
-            self.extraction_history.append(message)
-        else:
-            self.chat_history.append(message)
-            self.extraction_history.append(message)
+        if not extraction_only:
+            self.chat_history.append(role, content)
+        self.extraction_history.append(role, content)
+
+    def _conversation_context(self) -> str:
+        """Prompt section with the rolling summary (if any) and the last five messages"""
+        summary = self.chat_history.summary
+        return (
+            (f"Earlier in the call: {summary}\n" if summary else "") +
+            "Previous conversation:\n" + self.chat_history.render(5) + "\n\n"
+        )
+
+    def memory_stats(self) -> dict:
+        """Conversation memory held for this call"""
+        chat = self.chat_history.stats()
+        extraction = self.extraction_history.stats()
+        return {
+            "turns": chat["total_messages"],
+            "summarized_messages": chat["summarized_messages"] + extraction["summarized_messages"],
+            "memory_chars": chat["chars"] + extraction["chars"],
+            "cached_loads": len(self.current_loads or []),
+        }
 
     def _infer_missing_states(self):
         """Fills in start_state or dest_state based on CITY_STATE_MAP if only city is available."""
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import time
 import os
 from dotenv import load_dotenv
@@ -9,9 +10,16 @@ from twilio.rest import Client
 
 from app.routers import (
     tasks, loads, calls, auth, stripe, chat,
-    booked_loads, saved_loads, trip, voice_preferences, user
+    booked_loads, saved_loads, trip, voice_preferences, user, metrics
 )
 from app.database import init_db
+from app.services.http_client import shared_http_client
+from app.services.geocoding_service import get_gazetteer
+from app.services.prewarmer import lane_prewarmer
+from app.services.alert_engine import alert_engine
+from app.services.llm_client import shared_llm_client
+from app.services.voice_service import detect_ffmpeg, tts_cache
+from app.services.tts_client import elevenlabs_client
 
 # Load environment variables
 load_dotenv()
@@ -30,8 +38,35 @@ except Exception as e:
     print(f"[SERVER] Error verifying Stripe key: {str(e)}")
     raise ValueError(f"Invalid Stripe key: {str(e)}")
 
+# Startup / shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("[SERVER] Initializing MongoDB...")
+    try:
+        await init_db()
+        print("[SERVER] MongoDB connection successful.")
+    except Exception as e:
+        print(f"[SERVER] MongoDB init error: {str(e)}")
+        raise e
+
+    await shared_http_client.start()
+    get_gazetteer()
+    detect_ffmpeg()
+    if os.getenv("ELEVENLABS_API_KEY"):
+        await tts_cache.start(elevenlabs_client.render)
+    await alert_engine.start()
+    await lane_prewarmer.start()
+    try:
+        yield
+    finally:
+        await tts_cache.stop()
+        await lane_prewarmer.stop()
+        await alert_engine.stop()
+        await shared_http_client.close()
+        await shared_llm_client.close()
+
 # Instantiate FastAPI app
-app = FastAPI(title="SkyWaze API")
+app = FastAPI(title="SkyWaze API", lifespan=lifespan)
 
 # ✅ CORS setup — MUST be correct for frontend/backend to talk
 origins = [
@@ -69,6 +104,7 @@ app.include_router(saved_loads.router)
 app.include_router(trip.router)
 app.include_router(voice_preferences.router)
 app.include_router(user.router)
+app.include_router(metrics.router)
 
 # Root route
 @app.get("/")
@@ -79,14 +115,3 @@ async def root():
 @app.get("/test")
 async def test():
     return {"status": "ok", "message": "Backend is running"}
-
-# MongoDB init
-@app.on_event("startup")
-async def startup_event():
-    print("[SERVER] Initializing MongoDB...")
-    try:
-        await init_db()
-        print("[SERVER] MongoDB connection successful.")
-    except Exception as e:
-        print(f"[SERVER] MongoDB init error: {str(e)}")
-        raise e
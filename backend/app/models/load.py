@@ -54,6 +54,8 @@ class LoadResponse(BaseModel):
     payment: Optional[int] = None
 class LoadSearchResponse(BaseModel):
     loads: List[LoadResponse]
+    from_cache: bool = False
+    cache_age_seconds: Optional[float] = None  # Age of the cached result when from_cache
     
 class SavedLoadBase(BaseModel):
     load_id: str
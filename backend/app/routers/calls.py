@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, Request, Form, Header
-from fastapi.responses import Response, PlainTextResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException, Request, Form, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, PlainTextResponse
+from starlette.types import Receive, Scope, Send
 from typing import Dict, Optional
 import os
 from datetime import datetime
@@ -7,11 +8,15 @@ import json
 from pydantic import BaseModel
 from twilio.rest import Client
 from twilio.twiml.voice_response import VoiceResponse, Gather, Connect, Stream
-from ..agent import DispatchAgent
-from ..services.voice_service import text_to_speech
+from ..agent import CANNED_REPLIES, DispatchAgent
+from ..services.voice_service import tts_cache
+from ..services.tts_client import elevenlabs_client
+from ..services.call_sessions import active_calls
+from ..services.speech_pipeline import STREAMING_CONFIG, reply_streams, single_chunk
+from ..services.audio_store import call_audio_store, parse_byte_range
 from dotenv import load_dotenv
-import io
-import subprocess
+import asyncio
+import base64
 
 print("\n[DEBUG] ===== Loading calls.py router =====")
 load_dotenv()
@@ -32,9 +37,62 @@ def get_twilio_client():
         raise ValueError("Missing required Twilio credentials")
     return Client(account_sid, auth_token)
 
-active_calls = {}
 CALL_HISTORY = []
 
+GREETING = "Hey there, you've reached Cinesis — this is Skye. What are you hauling and where are you headed?"
+ERROR_MESSAGE = "I apologize, but I'm experiencing technical difficulties. Please try again later."
+
+# Spoken on every call or when something has gone wrong, so rendered ahead of time
+tts_cache.fixed_phrases.extend([GREETING, ERROR_MESSAGE, *CANNED_REPLIES.values()])
+# The error path plays ERROR_MESSAGE as one clip, whether or not replies are streamed
+tts_cache.play_phrases.append(ERROR_MESSAGE)
+
+# A call's audio goes when the call does, whether it ended or was evicted as idle
+active_calls.listeners.append(call_audio_store.end_call)
+
+class MemoryViewResponse(Response):
+    """Sends a memoryview (an in-memory clip or an mmap) as the body without copying it into bytes"""
+
+    def __init__(self, view: memoryview, status_code: int = 200, headers: Optional[Dict[str, str]] = None, media_type: Optional[str] = None):
+        self.view = view
+        super().__init__(content=b"", status_code=status_code, headers=headers, media_type=media_type)
+        self.headers["content-length"] = str(len(view))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.body", "body": self.view})
+
+def play_url(call_sid: str, turn: int) -> str:
+    return f"{os.getenv('NGROK_URL')}/calls/stream/{call_sid}?turn={turn}"
+
+def streaming_enabled() -> bool:
+    """Stream replies over Media Streams when ElevenLabs and a public URL are configured"""
+    return STREAMING_CONFIG["ENABLED"] and bool(os.getenv("ELEVENLABS_API_KEY")) and bool(os.getenv("NGROK_URL"))
+
+def streaming_twiml(call_sid: str) -> str:
+    """
+    Play the reply over a Media Streams socket; when the socket closes Twilio
+    moves on to /calls/continue, which speaks anything left and listens again.
+    """
+    media_url = os.getenv("NGROK_URL").replace("https://", "wss://").replace("http://", "ws://")
+    response = VoiceResponse()
+    connect = Connect()
+    connect.stream(url=f"{media_url}/calls/media/{call_sid}")
+    response.append(connect)
+    response.redirect(f"/calls/continue/{call_sid}", method="POST")
+    return str(response)
+
+def listen_for_speech(response: VoiceResponse):
+    gather = Gather(
+        input="speech",
+        action="/calls/answer",
+        method="POST",
+        timeout=3,
+        barge_in=True,
+        speech_timeout="auto"
+    )
+    response.append(gather)
+
 @router.get("/test-config")
 async def test_twilio_config():
     """Tests if Twilio is properly configured"""
@@ -110,6 +168,7 @@ async def initiate_call(request: CallRequest, authorization: Optional[str] = Hea
 @router.post("/answer", response_model=str)
 async def answer_call(request: Request):
     print("[DEBUG] Received answer webhook")
+    call_sid = ""
     try:
         form_data = await request.form()
         speech_result = form_data.get("SpeechResult", "")
@@ -129,14 +188,18 @@ async def answer_call(request: Request):
         
         if not speech_result:
             print("[DEBUG] No speech result, sending initial greeting")
-            greeting = "Hey there, you've reached Cinesis — this is Skye. What are you hauling and where are you headed?"
+            greeting = GREETING
+
+            if streaming_enabled():
+                reply_streams.start(call_sid, single_chunk(greeting), elevenlabs_client.stream)
+                return Response(content=streaming_twiml(call_sid), media_type="text/xml")
             
-            # Try ElevenLabs first
-            audio_data = text_to_speech(greeting)
+            # Try ElevenLabs first; Polly if it fails or runs over the latency budget
+            audio_data = await elevenlabs_client.synthesize(greeting)
             if audio_data:
-                # Create a Stream with the audio data
-                stream = Stream(url=f"{os.getenv('NGROK_URL')}/calls/stream/{call_sid}")
-                response.append(stream)
+                # Twilio fetches the clip from the call's audio store
+                turn = call_audio_store.put(call_sid, audio_data)
+                response.play(play_url(call_sid, turn))
             else:
                 # Fallback to Polly
                 print("[DEBUG] Falling back to Polly for initial greeting")
@@ -156,6 +219,11 @@ async def answer_call(request: Request):
             return Response(content=str(response), media_type="text/xml")
         
         print(f"[DEBUG] Processing speech input: {speech_result}")
+        if streaming_enabled():
+            # Sentences go to TTS while the rest of the reply is still generating
+            reply_streams.start(call_sid, agent.process_input_stream(speech_result, call_sid), elevenlabs_client.stream)
+            return Response(content=streaming_twiml(call_sid), media_type="text/xml")
+
         ai_response = await agent.process_input(speech_result, call_sid)
         print(f"[DEBUG] AI response received: {ai_response}")
         
@@ -164,12 +232,12 @@ async def answer_call(request: Request):
             response.play("https://pumpkin-heron-5238.twil.io/assets/yt1z.net%20-%20Keyboard%20typing%20sound%20effect%20(no%20copyright%20free%20to%20use)%20(320%20KBps).mp3")
             ai_response = ai_response.replace("*typing*", "")
         
-        # Try ElevenLabs first
-        audio_data = text_to_speech(ai_response)
+        # Try ElevenLabs first; Polly if it fails or runs over the latency budget
+        audio_data = await elevenlabs_client.synthesize(ai_response)
         if audio_data:
-            # Create a Stream with the audio data
-            stream = Stream(url=f"{os.getenv('NGROK_URL')}/calls/stream/{call_sid}")
-            response.append(stream)
+            # Twilio fetches the clip from the call's audio store
+            turn = call_audio_store.put(call_sid, audio_data)
+            response.play(play_url(call_sid, turn))
         else:
             # Fallback to Polly
             print("[DEBUG] Falling back to Polly for response")
@@ -196,59 +264,97 @@ async def answer_call(request: Request):
         import traceback
         print(f"[DEBUG] Traceback: {traceback.format_exc()}")
         error_response = VoiceResponse()
-        error_response.say(
-            "I apologize, but I'm experiencing technical difficulties. Please try again later.",
-            voice="Polly.Matthew-Neural"  # Fallback to Polly if ElevenLabs fails
-        )
+        # Pre-rendered at startup, so this doesn't depend on ElevenLabs being up
+        error_audio = tts_cache.get(ERROR_MESSAGE) if call_sid and os.getenv("NGROK_URL") else None
+        if error_audio:
+            error_response.play(play_url(call_sid, call_audio_store.put(call_sid, error_audio)))
+        else:
+            error_response.say(
+                ERROR_MESSAGE,
+                voice="Polly.Matthew-Neural"  # Fallback to Polly if ElevenLabs fails
+            )
         return Response(content=str(error_response), media_type="text/xml")
 
-@router.get("/stream/{call_sid}")
-async def stream_audio(call_sid: str):
-    """Stream audio data for Twilio to play"""
+@router.websocket("/media/{call_sid}")
+async def media_stream(websocket: WebSocket, call_sid: str):
+    """Twilio Media Streams socket: plays the call's current reply as it is synthesized, then hangs up the stream"""
+    await websocket.accept()
+    reply = reply_streams.get(call_sid)
     try:
-        print(f"[DEBUG] Streaming audio for call {call_sid}")
-        # Get the audio data from ElevenLabs
-        audio_data = text_to_speech("Loading...")  # This is just a placeholder
-        if not audio_data:
-            print("[DEBUG] No audio data generated")
-            raise HTTPException(status_code=500, detail="Failed to generate audio")
-        
-        print(f"[DEBUG] Audio data length: {len(audio_data)} bytes")
-        
-        # Try to determine if the audio is in μ-law format
-        is_mulaw = False
+        stream_sid = None
+        while stream_sid is None:
+            message = json.loads(await websocket.receive_text())
+            if message.get("event") == "start":
+                stream_sid = message["streamSid"]
+            elif message.get("event") == "stop":
+                return
+        if reply is None:
+            print(f"[VOICE_STREAM] No reply waiting for call {call_sid}")
+            return
+
+        chunk_bytes = STREAMING_CONFIG["MEDIA_CHUNK_BYTES"]
+        sent_bytes = 0
+        async for audio in reply.audio():
+            for offset in range(0, len(audio), chunk_bytes):
+                await websocket.send_text(json.dumps({
+                    "event": "media",
+                    "streamSid": stream_sid,
+                    "media": {"payload": base64.b64encode(audio[offset:offset + chunk_bytes]).decode()}
+                }))
+            sent_bytes += len(audio)
+
+        # Twilio echoes the mark once everything before it has played
+        await websocket.send_text(json.dumps({"event": "mark", "streamSid": stream_sid, "mark": {"name": "reply-end"}}))
+        playback_seconds = sent_bytes / 8000 + 2
+        async def wait_for_mark():
+            while True:
+                message = json.loads(await websocket.receive_text())
+                if message.get("event") == "stop" or (message.get("event") == "mark" and message["mark"].get("name") == "reply-end"):
+                    return
         try:
-            # Check if ffmpeg is installed and working
-            subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-            is_mulaw = True
-            print("[DEBUG] ffmpeg found, using μ-law format")
-        except (subprocess.SubprocessError, FileNotFoundError):
-            is_mulaw = False
-            print("[DEBUG] ffmpeg not found, using MP3 format")
-        
-        # Create a BytesIO object with the audio data
-        audio_stream = io.BytesIO(audio_data)
-        audio_stream.seek(0)  # Ensure we're at the start of the stream
-        
-        # Set appropriate headers
-        headers = {
-            'Content-Type': 'audio/x-mulaw;rate=8000' if is_mulaw else 'audio/mpeg',
-            'Content-Length': str(len(audio_data))
-        }
-        
-        print(f"[DEBUG] Streaming audio with headers: {headers}")
-        return StreamingResponse(
-            audio_stream,
-            media_type=headers['Content-Type'],
-            headers=headers
-        )
-    except Exception as e:
-        print(f"[DEBUG] Error streaming audio for call {call_sid}: {str(e)}")
-        print(f"[DEBUG] Error type: {type(e)}")
-        import traceback
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+            await asyncio.wait_for(wait_for_mark(), playback_seconds)
+        except asyncio.TimeoutError:
+            print(f"[VOICE_STREAM] No playback mark for call {call_sid} after {playback_seconds:.1f}s")
+    except WebSocketDisconnect:
+        print(f"[VOICE_STREAM] Media stream for call {call_sid} disconnected")
+        return
+    await websocket.close()
+
+@router.post("/continue/{call_sid}")
+async def continue_call(call_sid: str):
+    """After a streamed reply: speak whatever didn't make it over the stream with Polly, then listen"""
+    response = VoiceResponse()
+    reply = reply_streams.get(call_sid)
+    if reply is not None:
+        unspoken = await reply.unspoken()
+        reply_streams.finish(call_sid)
+        if unspoken:
+            print(f"[VOICE_STREAM] Falling back to Polly for: {unspoken[:50]}...")
+            response.say(unspoken, voice="Polly.Matthew-Neural")
+    listen_for_speech(response)
+    return Response(content=str(response), media_type="text/xml")
+
+@router.get("/stream/{call_sid}")
+async def stream_audio(call_sid: str, request: Request, turn: Optional[int] = None):
+    """Serve a call's synthesized utterance for <Play>, the latest turn unless one is given"""
+    clip = call_audio_store.get(call_sid, turn)
+    if clip is None:
+        print(f"[DEBUG] No audio for call {call_sid} turn {turn}")
         raise HTTPException(status_code=404, detail="Audio not found")
 
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "no-store"}
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), clip.size)
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{clip.size}"})
+    if byte_range is None:
+        return MemoryViewResponse(clip.view(), headers=headers, media_type=clip.content_type)
+
+    start, end = byte_range
+    call_audio_store.stats_counters["range_requests"] += 1
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{clip.size}"
+    return MemoryViewResponse(clip.view()[start:end], status_code=206, headers=headers, media_type=clip.content_type)
+
 @router.post("/status")
 async def call_status(request: Request):
     """Handle call status updates."""
@@ -264,6 +370,10 @@ async def call_status(request: Request):
             if call_sid in active_calls:
                 print(f"[DEBUG] Cleaning up agent for call {call_sid}")
                 del active_calls[call_sid]
+            reply = reply_streams.finish(call_sid)
+            if reply is not None:
+                reply.cancel()
+            call_audio_store.end_call(call_sid)
         
         return {"status": "success"}
     except Exception as e:
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from anthropic import Anthropic
 import os
 from dotenv import load_dotenv
 import logging
 from datetime import datetime
 from app.database import chat_history_collection, ChatHistoryEntry
+from app.services.llm_client import shared_llm_client
 
 
 # Configure logging
@@ -24,8 +24,6 @@ if not api_key:
     logger.error("CLAUDE_API_KEY not found in environment variables")
     raise ValueError("CLAUDE_API_KEY not found in environment variables")
 
-client = Anthropic(api_key=api_key)
-
 class ChatMessage(BaseModel):
     message: str
 
@@ -181,15 +179,14 @@ async def chat(chat_message: ChatMessage, request: Request):
             ).dict()
         )
 
-        message = client.messages.create(
-            model="claude-3-opus-20240229",
+        assistant_reply = await shared_llm_client.complete(
+            chat_message.message,
             max_tokens=1000,
+            model="claude-3-opus-20240229",
             system=SYSTEM_PROMPT,
-            messages=[{ "role": "user", "content": chat_message.message }]
+            api_key=api_key
         )
 
-        assistant_reply = message.content[0].text
-
         # Save assistant response
         await chat_history_collection.insert_one(
             ChatHistoryEntry(
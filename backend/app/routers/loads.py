@@ -1,12 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import traceback
+import json
 from app.models.load import LoadSearchRequest, LoadResponse, LoadSearchResponse
 from app.database import saved_loads_collection, SavedLoad
 from app.auth import get_current_user
 from app.services.load_search_service import search_loads
-from app.services.backhaul_service import get_backhaul_loads
+from app.services.backhaul_service import get_backhaul_loads, iter_backhaul_pairs
 from pydantic import BaseModel
 from urllib.parse import unquote
 
@@ -217,6 +219,11 @@ async def clear_saved_loads(current_user = Depends(get_current_user)):
 @router.post("/truckstop-search", response_model=LoadSearchResponse)
 async def truckstop_search_endpoint(request: TruckstopSearchRequest):
     """Search for loads using the Truckstop API"""
+    if not request.user_integration_id:
+        raise HTTPException(
+            status_code=400,
+            detail="Truckstop integration ID is required. Please set it in your profile settings."
+        )
     try:
         # Convert TruckstopSearchRequest to LoadSearchRequest
         search_params = LoadSearchRequest(
@@ -268,5 +275,39 @@ async def search_backhaul_loads_endpoint(request: TruckstopSearchRequest):
     except Exception as e:
         error_msg = f"Error searching backhaul loads: {str(e)}"
         print(f"[API ERROR] {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg) 
+        raise HTTPException(status_code=500, detail=error_msg)
+
+@router.post("/backhaul-search/stream")
+async def stream_backhaul_loads_endpoint(request: TruckstopSearchRequest):
+    """Stream backhaul load pairs as newline-delimited JSON, one pair per line, as each return lane completes"""
+    if not request.user_integration_id:
+        raise HTTPException(
+            status_code=400, 
+            detail="Truckstop integration ID is required. Please set it in your profile settings."
+        )
+
+    async def pair_lines():
+        count = 0
+        try:
+            async for batch in iter_backhaul_pairs(
+                origin_city=request.origin_city,
+                origin_state=request.origin_state,
+                date=request.ship_date,
+                max_weight=request.max_weight,
+                truck_type=request.truck_type,
+                user_integration_id=request.user_integration_id,
+                destination_city=request.destination_city,
+                destination_state=request.destination_state
+            ):
+                for pair in batch:
+                    count += 1
+                    yield json.dumps(pair, default=str) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            print(f"[API ERROR] Error streaming backhaul loads: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+        print(f"[API] Streamed {count} backhaul load pairs")
+
+    return StreamingResponse(pair_lines(), media_type="application/x-ndjson")
+
         
\ No newline at end of file
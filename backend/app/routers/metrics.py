@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from app.services.http_client import shared_http_client
+from app.services.geocoding_service import GEOCODE_STATS
+from app.services.distance_cache import distance_cache
+from app.services.distance_estimator import estimator_stats
+from app.services.search_cache import search_result_cache
+from app.services.prewarmer import lane_prewarmer
+from app.services.alert_engine import alert_engine
+from app.services.llm_client import shared_llm_client
+from app.services.slot_extractor import extractor_stats
+from app.services.call_sessions import active_calls
+from app.services.speculative_search import speculative_stats
+from app.services.speech_pipeline import reply_streams
+from app.services.audio_store import call_audio_store
+from app.services.voice_service import tts_cache
+from app.services.tts_client import elevenlabs_client
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/")
+async def get_metrics():
+    """Runtime performance metrics for the backend services"""
+    return {
+        "http_pool": shared_http_client.stats(),
+        "geocode": dict(GEOCODE_STATS),
+        "driving_distance": distance_cache.stats(),
+        "distance_estimator": estimator_stats(),
+        "search_cache": search_result_cache.stats(),
+        "prewarm": lane_prewarmer.stats(),
+        "alerts": alert_engine.stats(),
+        "llm": shared_llm_client.stats(),
+        "fast_path_extraction": extractor_stats(),
+        "calls": active_calls.stats(),
+        "speculative_search": speculative_stats(),
+        "voice_streaming": reply_streams.stats(),
+        "call_audio": call_audio_store.stats(),
+        "tts_cache": tts_cache.stats(),
+        "elevenlabs": elevenlabs_client.stats()
+    }
+
+@router.get("/http-pool")
+async def get_http_pool_metrics():
+    """Connection pool saturation metrics for the shared outbound HTTP client"""
+    return shared_http_client.stats()
@@ -0,0 +1,337 @@
+import asyncio
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from cachetools import TTLCache
+from app.services.distance_estimator import city_coordinates, haversine_miles
+
+ALERT_CONFIG = {
+    "CELL_DEGREES": 1.0,            # index grid cell size (~69 miles of latitude)
+    "DEFAULT_MAX_DEADHEAD": 150,    # miles, when a preference leaves max_deadhead at 0
+    "MIN_INTERVAL_SECONDS": 1800,   # per-user rate limit between notifications
+    "MAX_LOADS_PER_ALERT": 3,
+    "DEDUPE_SECONDS": 24 * 3600,    # don't alert the same load to the same user twice
+    "REFRESH_SECONDS": 300,         # reload subscriptions from Mongo
+    "QUEUE_SIZE": 1000,
+}
+
+# Load board equipment names -> the truck_type codes stored on VoicePreferences
+EQUIPMENT_ALIASES = {
+    "VAN": "V",
+    "DRY VAN": "V",
+    "REEFER": "R",
+    "FLATBED": "F",
+    "STEP DECK": "SD",
+    "POWER ONLY": "PO",
+}
+
+def normalize_equipment(equipment: Optional[str]) -> str:
+    code = (equipment or "").strip().upper()
+    return EQUIPMENT_ALIASES.get(code, code)
+
+def _field(load, key):
+    return load.get(key) if isinstance(load, dict) else getattr(load, key, None)
+
+class SubscriptionIndex:
+    """
+    Active VoicePreferences indexed by (grid cell, equipment).
+    Each subscription is registered in every cell its deadhead radius touches,
+    so a load only has to be compared with subscriptions indexed under its own cell.
+    """
+
+    def __init__(self, preferences: List[Dict[str, Any]]):
+        cell = ALERT_CONFIG["CELL_DEGREES"]
+        lats, lons = city_coordinates([(p.get("origin_city"), p.get("origin_state")) for p in preferences])
+        placed = ~np.isnan(lats)
+
+        self.preferences = [p for p, ok in zip(preferences, placed) if ok]
+        self.latitudes = lats[placed]
+        self.longitudes = lons[placed]
+        self.min_rates = np.array([float(p.get("min_rate_per_mile") or 0) for p in self.preferences])
+        self.radii = np.array([
+            float(p.get("max_deadhead") or ALERT_CONFIG["DEFAULT_MAX_DEADHEAD"]) for p in self.preferences
+        ])
+        self.unplaced = int((~placed).sum())
+
+        cells: Dict[Tuple[int, int, str], List[int]] = defaultdict(list)
+        for i, preference in enumerate(self.preferences):
+            equipment = normalize_equipment(preference.get("truck_type"))
+            lat, lon, radius = self.latitudes[i], self.longitudes[i], self.radii[i]
+            lat_span = radius / 69.0
+            lon_span = radius / (69.0 * max(math.cos(math.radians(lat)), 0.1))
+            for cell_lat in range(math.floor((lat - lat_span) / cell), math.floor((lat + lat_span) / cell) + 1):
+                for cell_lon in range(math.floor((lon - lon_span) / cell), math.floor((lon + lon_span) / cell) + 1):
+                    cells[(cell_lat, cell_lon, equipment)].append(i)
+        self.cells = {key: np.array(rows, dtype=np.int64) for key, rows in cells.items()}
+
+    def __len__(self) -> int:
+        return len(self.preferences)
+
+    def match(self, loads: List[Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        All (subscription row, load index) pairs matched by a batch, as parallel
+        arrays of rows, load indexes, deadhead miles and load rates.
+        A match needs the same equipment, the load origin within the subscriber's
+        max deadhead and a rate at or above their minimum.
+        """
+        empty = np.empty(0, dtype=np.int64)
+        if not loads or not self.preferences:
+            return empty, empty, np.empty(0), np.empty(0)
+        cell = ALERT_CONFIG["CELL_DEGREES"]
+        lats, lons = city_coordinates([(_field(l, "origin_city"), _field(l, "origin_state")) for l in loads])
+        rates = np.array([float(_field(l, "rate_per_mile_est") or 0) for l in loads])
+        valid = ~np.isnan(lats) & (rates > 0)
+        cell_lats = np.floor(np.where(valid, lats, 0) / cell).astype(np.int64)
+        cell_lons = np.floor(np.where(valid, lons, 0) / cell).astype(np.int64)
+
+        # Candidate pairs: each load against the subscriptions indexed under its cell
+        candidate_subs = []
+        candidate_loads = []
+        for j in np.flatnonzero(valid):
+            subs = self.cells.get((cell_lats[j], cell_lons[j], normalize_equipment(_field(loads[j], "equipment_type"))))
+            if subs is not None:
+                candidate_subs.append(subs)
+                candidate_loads.append(np.full(len(subs), j, dtype=np.int64))
+        if not candidate_subs:
+            return empty, empty, np.empty(0), np.empty(0)
+        subs = np.concatenate(candidate_subs)
+        load_rows = np.concatenate(candidate_loads)
+
+        deadhead = haversine_miles(self.latitudes[subs], self.longitudes[subs], lats[load_rows], lons[load_rows])
+        hit = (deadhead <= self.radii[subs]) & (rates[load_rows] >= self.min_rates[subs])
+        return subs[hit], load_rows[hit], deadhead[hit], rates[load_rows][hit]
+
+def _dedupe_key(user_id: str, load) -> Tuple:
+    """A load by its board ID, or by lane, date and rate when it has none"""
+    load_id = _field(load, "id")
+    if load_id:
+        return (user_id, load_id)
+    return (user_id, _field(load, "origin_city"), _field(load, "origin_state"), _field(load, "destination_city"),
+            _field(load, "destination_state"), _field(load, "ship_date"), _field(load, "rate_per_mile_est"))
+
+class AlertEngine:
+    """
+    Matches every new load batch against active voice preference subscriptions
+    and queues rate-limited notifications for delivery. A user only counts as
+    notified (rate limit and dedupe) once their notification is queued, and
+    not at all if sending it fails.
+    """
+
+    def __init__(self):
+        self.index = SubscriptionIndex([])
+        # Rate-limit state: user_id -> last send time, mirrored per index row for vectorized checks
+        self.last_sent: Dict[str, float] = {}
+        self.last_sent_at = np.empty(0)
+        self.queue: Optional[asyncio.Queue] = None
+        self.senders: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {"sms": send_sms_alert}
+        self.alerted = TTLCache(maxsize=100000, ttl=ALERT_CONFIG["DEDUPE_SECONDS"])
+        self._tasks: List[asyncio.Task] = []
+        self.stats_counters: Dict[str, float] = {
+            "batches": 0,
+            "loads_evaluated": 0,
+            "matches": 0,
+            "queued": 0,
+            "rate_limited": 0,
+            "duplicates": 0,
+            "queue_full": 0,
+            "sent": 0,
+            "send_errors": 0,
+            "last_match_ms": 0.0,
+        }
+
+    def load_subscriptions(self, preferences: List[Dict[str, Any]]):
+        """Rebuild the index from active VoicePreferences documents"""
+        start_time = time.perf_counter()
+        self.index = SubscriptionIndex([p for p in preferences if p.get("is_active")])
+        for preference in self.index.preferences:
+            last = preference.get("last_notification")
+            if isinstance(last, datetime):
+                # Mongo hands back naive datetimes that are in UTC
+                if last.tzinfo is None:
+                    last = last.replace(tzinfo=timezone.utc)
+                self.last_sent[preference["user_id"]] = max(self.last_sent.get(preference["user_id"], 0), last.timestamp())
+        self.last_sent_at = np.array([self.last_sent.get(p["user_id"], 0.0) for p in self.index.preferences])
+        print(f"[ALERTS] Indexed {len(self.index)} subscriptions in {len(self.index.cells)} cells "
+              f"({self.index.unplaced} without coordinates) in {(time.perf_counter() - start_time) * 1000:.0f}ms")
+
+    async def refresh_subscriptions(self):
+        from app.database import voice_preferences_collection
+        preferences = await voice_preferences_collection.find({"is_active": True}).to_list(length=None)
+        self.load_subscriptions(preferences)
+
+    def on_search_results(self, search_params, loads: List[Any]):
+        """
+        Search cache listener. Only DirectFreight results are shared by every
+        user; Truckstop loads were fetched under one user's integration and
+        must not be sent to other subscribers.
+        """
+        if search_params.data_source == "direct_freight":
+            self.evaluate(loads)
+
+    def evaluate(self, loads: List[Any]) -> List[Dict[str, Any]]:
+        """Match a load batch and queue one notification per eligible user; returns the notifications"""
+        start_time = time.perf_counter()
+        subs, load_rows, deadheads, rates = self.index.match(loads)
+        now = time.time()
+        self.stats_counters["matches"] += len(subs)
+
+        # Drop users still inside their rate-limit window before doing any per-user work
+        allowed = self.last_sent_at[subs] <= now - ALERT_CONFIG["MIN_INTERVAL_SECONDS"]
+        self.stats_counters["rate_limited"] += len(np.unique(subs[~allowed]))
+        subs, load_rows, deadheads, rates = subs[allowed], load_rows[allowed], deadheads[allowed], rates[allowed]
+
+        # Group by subscription, best paying loads first within each group
+        order = np.lexsort((-rates, subs))
+        subs, load_rows, deadheads = subs[order], load_rows[order], deadheads[order]
+        starts = np.flatnonzero(np.r_[True, subs[1:] != subs[:-1]]) if len(subs) else []
+        ends = np.r_[starts[1:], len(subs)] if len(subs) else []
+
+        notifications = []
+        for start, end in zip(starts, ends):
+            row = int(subs[start])
+            preference = self.index.preferences[row]
+            user_id = preference["user_id"]
+            best = []
+            for k in range(start, end):
+                load = loads[load_rows[k]]
+                if _dedupe_key(user_id, load) in self.alerted:
+                    self.stats_counters["duplicates"] += 1
+                    continue
+                best.append((load, deadheads[k]))
+                if len(best) == ALERT_CONFIG["MAX_LOADS_PER_ALERT"]:
+                    break
+            if not best:
+                continue
+
+            notifications.append({
+                "user_id": user_id,
+                "channel": "sms" if preference.get("phone_number") else "email",
+                "phone_number": preference.get("phone_number"),
+                "truck_type": preference.get("truck_type"),
+                "origin_city": preference.get("origin_city"),
+                "origin_state": preference.get("origin_state"),
+                "loads": [dict(_load_summary(load), deadhead_miles=round(float(deadhead))) for load, deadhead in best],
+                "created_at": now,
+                "previous_sent": self.last_sent.get(user_id, 0.0),
+            })
+
+        for notification in notifications:
+            if self.queue is None:
+                continue
+            try:
+                self.queue.put_nowait(notification)
+            except asyncio.QueueFull:
+                self.stats_counters["queue_full"] += 1
+                continue
+            self.stats_counters["queued"] += 1
+            self._mark_notified(notification, True)
+
+        self.stats_counters["batches"] += 1
+        self.stats_counters["loads_evaluated"] += len(loads)
+        self.stats_counters["last_match_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
+        return notifications
+
+    def _mark_notified(self, notification: Dict[str, Any], notified: bool):
+        """Record a queued notification for rate limiting and dedupe, or undo that when it couldn't be sent"""
+        user_id = notification["user_id"]
+        sent_at = notification["created_at"] if notified else notification["previous_sent"]
+        self.last_sent[user_id] = sent_at
+        for row, preference in enumerate(self.index.preferences):
+            if preference["user_id"] == user_id:
+                self.last_sent_at[row] = sent_at
+        for load in notification["loads"]:
+            if notified:
+                self.alerted[_dedupe_key(user_id, load)] = True
+            else:
+                self.alerted.pop(_dedupe_key(user_id, load), None)
+
+    async def start(self):
+        from app.services.search_cache import search_result_cache
+        self.queue = asyncio.Queue(maxsize=ALERT_CONFIG["QUEUE_SIZE"])
+        search_result_cache.listeners.append(self.on_search_results)
+        self._tasks = [asyncio.create_task(self._refresh_loop()), asyncio.create_task(self._dispatch_loop())]
+
+    async def stop(self):
+        from app.services.search_cache import search_result_cache
+        if self.on_search_results in search_result_cache.listeners:
+            search_result_cache.listeners.remove(self.on_search_results)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh_subscriptions()
+            except Exception as e:
+                print(f"[ALERTS ERROR] Could not load subscriptions: {str(e)}")
+            await asyncio.sleep(ALERT_CONFIG["REFRESH_SECONDS"])
+
+    async def _dispatch_loop(self):
+        from app.database import voice_preferences_collection
+        while True:
+            notification = await self.queue.get()
+            sender = self.senders.get(notification["channel"])
+            try:
+                if sender is None:
+                    raise ValueError(f"No sender for channel {notification['channel']}")
+                await sender(notification)
+                self.stats_counters["sent"] += 1
+            except Exception as e:
+                self.stats_counters["send_errors"] += 1
+                # Not delivered: the user can be alerted again, these loads included
+                self._mark_notified(notification, False)
+                print(f"[ALERTS ERROR] Failed to notify {notification['user_id']}: {str(e)}")
+            else:
+                try:
+                    await voice_preferences_collection.update_one(
+                        {"user_id": notification["user_id"]},
+                        {"$set": {"last_notification": datetime.now(timezone.utc)}}
+                    )
+                except Exception as e:
+                    print(f"[ALERTS ERROR] Could not record notification for {notification['user_id']}: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        counters = dict(self.stats_counters)
+        counters.update({
+            "subscriptions": len(self.index),
+            "index_cells": len(self.index.cells),
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+        })
+        return counters
+
+def _load_summary(load) -> Dict[str, Any]:
+    return {
+        key: _field(load, key)
+        for key in ("id", "origin_city", "origin_state", "destination_city", "destination_state",
+                    "rate_per_mile_est", "distance", "ship_date", "equipment_type", "data_source")
+    }
+
+def format_alert_message(notification: Dict[str, Any]) -> str:
+    lines = [f"SkyWaze: {len(notification['loads'])} new {notification['truck_type']} loads near "
+             f"{notification['origin_city']}, {notification['origin_state']}"]
+    for load in notification["loads"]:
+        lines.append(
+            f"{load['origin_city']}, {load['origin_state']} -> {load['destination_city']}, {load['destination_state']} "
+            f"${(load['rate_per_mile_est'] or 0):.2f}/mi, {load['deadhead_miles']} mi deadhead, {load['ship_date']}"
+        )
+    return "\n".join(lines)
+
+async def send_sms_alert(notification: Dict[str, Any]):
+    """Deliver an alert as a Twilio SMS without blocking the event loop"""
+    from app.services.twilio_service import client, TWILIO_PHONE_NUMBER
+    await asyncio.to_thread(
+        client.messages.create,
+        to=notification["phone_number"],
+        from_=TWILIO_PHONE_NUMBER,
+        body=format_alert_message(notification)
+    )
+
+# Create a singleton instance
+alert_engine = AlertEngine()
@@ -0,0 +1,154 @@
+import struct
+from functools import lru_cache
+from typing import Tuple
+import numpy as np
+
+TELEPHONY_RATE = 8000
+RESAMPLER_CONFIG = {
+    "TAPS_PER_RATIO": 16,   # anti-alias filter length per unit of downsampling ratio
+    "CUTOFF": 0.9,          # fraction of the output Nyquist frequency kept
+}
+
+# G.711 on 14-bit magnitudes, as in the Sun reference code that ffmpeg's pcm_mulaw uses
+ULAW_BIAS = 0x21
+ULAW_CLIP = 8159
+ULAW_SEGMENT_ENDS = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+
+def _ulaw_encode(samples: np.ndarray) -> np.ndarray:
+    """G.711 mu-law for int16 samples (reference formula, used to build the lookup table)"""
+    x = samples.astype(np.int32) >> 2
+    mask = np.where(x < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(x), ULAW_CLIP) + ULAW_BIAS
+    segment = np.searchsorted(ULAW_SEGMENT_ENDS, magnitude)
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    return (np.where(segment >= 8, 0x7F, code) ^ mask).astype(np.uint8)
+
+# Every int16 value's mu-law byte, indexed by the sample's bit pattern as uint16
+_ENCODE_TABLE = _ulaw_encode(np.arange(65536, dtype=np.uint16).view(np.int16))
+
+def _ulaw_decode_table() -> np.ndarray:
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+_DECODE_TABLE = _ulaw_decode_table()
+
+def ulaw_encode(samples: np.ndarray) -> bytes:
+    """int16 PCM samples to mu-law bytes, one table lookup per sample"""
+    return _ENCODE_TABLE[np.ascontiguousarray(samples, dtype=np.int16).view(np.uint16)].tobytes()
+
+def ulaw_decode(ulaw: bytes) -> np.ndarray:
+    return _DECODE_TABLE[np.frombuffer(ulaw, dtype=np.uint8)]
+
+@lru_cache(maxsize=16)
+def _lowpass(src_rate: int, dst_rate: int) -> np.ndarray:
+    """Windowed-sinc anti-alias filter for going from src_rate down to dst_rate"""
+    ratio = src_rate / dst_rate
+    taps = int(np.ceil(RESAMPLER_CONFIG["TAPS_PER_RATIO"] * ratio)) | 1
+    cutoff = RESAMPLER_CONFIG["CUTOFF"] / ratio / 2   # cycles per input sample
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int = TELEPHONY_RATE) -> np.ndarray:
+    """
+    Downsample mono PCM. Integer ratios (16k, 24k, 48k to 8k) only compute
+    the filter at the kept samples; other ratios filter, then interpolate.
+    """
+    x = np.asarray(samples, dtype=np.float32)
+    if src_rate == dst_rate or len(x) == 0:
+        return x
+    if src_rate < dst_rate:
+        positions = np.arange(int(len(x) * dst_rate / src_rate)) * (src_rate / dst_rate)
+        return np.interp(positions, np.arange(len(x)), x).astype(np.float32)
+
+    kernel = _lowpass(src_rate, dst_rate)
+    half = len(kernel) // 2
+    padded = np.pad(x, (half, half))
+    if src_rate % dst_rate == 0:
+        step = src_rate // dst_rate
+        windows = np.lib.stride_tricks.sliding_window_view(padded, len(kernel))[::step]
+        return windows @ kernel[::-1]
+    filtered = np.convolve(padded, kernel, mode="valid")
+    positions = np.arange(int(len(x) * dst_rate / src_rate)) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(filtered)), filtered).astype(np.float32)
+
+def pcm16_to_ulaw(pcm: bytes, src_rate: int, channels: int = 1) -> bytes:
+    """Little-endian 16-bit PCM at any rate to 8kHz mono mu-law, entirely in memory"""
+    samples = np.frombuffer(pcm[:len(pcm) - len(pcm) % (2 * channels)], dtype="<i2")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    resampled = resample(samples, src_rate)
+    return ulaw_encode(np.clip(np.rint(resampled), -32768, 32767).astype(np.int16))
+
+def ulaw_wav(ulaw: bytes, rate: int = TELEPHONY_RATE) -> bytes:
+    """Wrap raw mu-law in a WAV header (format 7), the same layout ffmpeg's pcm_mulaw output has"""
+    fmt = struct.pack("<HHIIHHH", 7, 1, rate, rate, 1, 8, 0)
+    fact = struct.pack("<I", len(ulaw))
+    body = (
+        b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"fact" + struct.pack("<I", len(fact)) + fact
+        + b"data" + struct.pack("<I", len(ulaw)) + ulaw
+    )
+    if len(ulaw) % 2:
+        body += b"\x00"
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+def parse_pcm_format(output_format: str) -> Tuple[str, int]:
+    """ElevenLabs output_format ("pcm_16000", "ulaw_8000", "mp3_44100_128") as (codec, sample rate)"""
+    codec, _, rest = output_format.partition("_")
+    rate = rest.split("_")[0]
+    return codec, int(rate) if rate.isdigit() else 0
+
+class UlawStreamEncoder:
+    """
+    pcm16_to_ulaw for audio arriving in pieces: feed() whatever bytes came in
+    and get the mu-law ready so far. Integer ratios keep the filter's tail
+    between pieces so the output matches converting the whole clip; other
+    ratios are converted in one go by flush().
+    """
+
+    def __init__(self, src_rate: int, channels: int = 1):
+        self.src_rate = src_rate
+        self.channels = channels
+        self.streaming = channels == 1 and src_rate >= TELEPHONY_RATE and src_rate % TELEPHONY_RATE == 0
+        self._partial = b""
+        self._pending: list = []
+        if self.streaming and src_rate != TELEPHONY_RATE:
+            self._kernel = _lowpass(src_rate, TELEPHONY_RATE)[::-1]
+            self._step = src_rate // TELEPHONY_RATE
+            # The same zero padding resample() puts before the clip
+            self._history = np.zeros(len(self._kernel) // 2, dtype=np.float32)
+
+    def feed(self, pcm: bytes) -> bytes:
+        data = self._partial + pcm
+        usable = len(data) - len(data) % (2 * self.channels)
+        self._partial = data[usable:]
+        if not self.streaming:
+            self._pending.append(data[:usable])
+            return b""
+        samples = np.frombuffer(data[:usable], dtype="<i2")
+        if self.src_rate == TELEPHONY_RATE:
+            return ulaw_encode(samples)
+        return self._filter(np.concatenate([self._history, samples.astype(np.float32)]))
+
+    def _filter(self, x: np.ndarray) -> bytes:
+        taps = len(self._kernel)
+        if len(x) < taps:
+            self._history = x
+            return b""
+        windows = np.lib.stride_tricks.sliding_window_view(x, taps)[::self._step]
+        self._history = x[len(windows) * self._step:]
+        return ulaw_encode(np.clip(np.rint(windows @ self._kernel), -32768, 32767).astype(np.int16))
+
+    def flush(self) -> bytes:
+        """The rest of the audio once the last piece has been fed"""
+        if not self.streaming:
+            return pcm16_to_ulaw(b"".join(self._pending), self.src_rate, self.channels)
+        if self.src_rate == TELEPHONY_RATE:
+            return b""
+        half = len(self._kernel) // 2
+        return self._filter(np.concatenate([self._history, np.zeros(half, dtype=np.float32)]))
@@ -0,0 +1,210 @@
+import hashlib
+import mmap
+import os
+import shutil
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+from app.services.persistent_store import CACHE_DIR
+
+AUDIO_STORE_CONFIG = {
+    "MEMORY_LIMIT_BYTES": int(os.getenv("CALL_AUDIO_MEMORY_BYTES", str(32 * 1024 * 1024))),
+    "SPOOL_THRESHOLD_BYTES": 512 * 1024,   # clips this big go straight to a spool file
+    "MAX_AGE_SECONDS": int(os.getenv("CALL_IDLE_TTL", "900")),
+    "SPOOL_DIR": os.path.join(CACHE_DIR, "call_audio"),
+}
+
+CONTENT_TYPE_EXTENSIONS = {"audio/wav": "wav", "audio/mpeg": "mp3", "audio/basic": "ulaw"}
+
+def audio_content_type(audio: bytes) -> str:
+    """WAV (mu-law from the converter), MP3 (unconverted ElevenLabs output) or raw 8kHz mu-law"""
+    if audio[:4] == b"RIFF" and audio[8:12] == b"WAVE":
+        return "audio/wav"
+    if audio[:3] == b"ID3" or (len(audio) > 1 and audio[0] == 0xFF and audio[1] & 0xE0 == 0xE0):
+        return "audio/mpeg"
+    return "audio/basic"
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    [start, end) for a single-range "bytes=..." header, None to send the whole
+    clip (no header, or a form we don't serve). ValueError when unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise ValueError(header)
+            return max(size - length, 0), size
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    except ValueError:
+        if first.isdigit() or last.isdigit():
+            raise
+        return None
+    if start >= size or end <= start:
+        raise ValueError(header)
+    return start, end
+
+class AudioClip:
+    """One synthesized utterance, held in memory or memory-mapped from its spool file"""
+
+    def __init__(self, data: Union[bytes, mmap.mmap], content_type: str, path: Optional[str] = None):
+        self.data = data
+        self.content_type = content_type
+        self.size = len(data)
+        self.path = path
+        self.created_at = time.time()
+
+    @property
+    def in_memory(self) -> bool:
+        return isinstance(self.data, bytes)
+
+    def view(self) -> memoryview:
+        """The audio without copying; slice it for ranges"""
+        return memoryview(self.data)
+
+    def close(self):
+        if not self.in_memory:
+            try:
+                self.data.close()
+            except BufferError:
+                # A response is still sending from the map; it closes when that view is released
+                pass
+
+class CallAudioStore:
+    """
+    What each call's <Play> URLs point at: the synthesized utterance for every
+    (call_sid, turn). Clips live in memory up to MEMORY_LIMIT_BYTES (least
+    recently played spill first); big or spilled clips are written to a
+    spool file and served memory-mapped. Everything for a call is dropped
+    when the call ends.
+    """
+
+    def __init__(self, memory_limit: int = AUDIO_STORE_CONFIG["MEMORY_LIMIT_BYTES"], spool_dir: str = AUDIO_STORE_CONFIG["SPOOL_DIR"]):
+        self.memory_limit = memory_limit
+        self.spool_dir = spool_dir
+        self._clips: "OrderedDict[Tuple[str, int], AudioClip]" = OrderedDict()
+        self._turns: Dict[str, int] = {}
+        self.memory_bytes = 0
+        self.stats_counters: Dict[str, int] = {
+            "stored": 0,
+            "served": 0,
+            "range_requests": 0,
+            "misses": 0,
+            "spilled": 0,
+            "calls_ended": 0,
+            "expired": 0,
+        }
+
+    def _call_dir(self, call_sid: str) -> str:
+        """
+        A call's spool directory. CallSid comes straight from Twilio's (unauthenticated)
+        webhooks, so it is hashed rather than used as a path component.
+        """
+        root = os.path.realpath(self.spool_dir)
+        path = os.path.realpath(os.path.join(root, hashlib.sha256(call_sid.encode()).hexdigest()[:32]))
+        if os.path.dirname(path) != root:
+            raise ValueError(f"Spool path for {call_sid!r} escapes {root}")
+        return path
+
+    def _spool_path(self, call_sid: str, turn: int, content_type: str) -> str:
+        return os.path.join(self._call_dir(call_sid), f"{turn}.{CONTENT_TYPE_EXTENSIONS.get(content_type, 'bin')}")
+
+    def _spool(self, call_sid: str, turn: int, audio: bytes, content_type: str) -> AudioClip:
+        path = self._spool_path(call_sid, turn, content_type)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(audio)
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return AudioClip(mapped, content_type, path)
+
+    def put(self, call_sid: str, audio: bytes, content_type: Optional[str] = None) -> int:
+        """Store a call's next utterance and return its turn number"""
+        self.expire()
+        content_type = content_type or audio_content_type(audio)
+        turn = self._turns.get(call_sid, 0) + 1
+        self._turns[call_sid] = turn
+        if len(audio) >= AUDIO_STORE_CONFIG["SPOOL_THRESHOLD_BYTES"]:
+            clip = self._spool(call_sid, turn, audio, content_type)
+        else:
+            clip = AudioClip(bytes(audio), content_type)
+            self.memory_bytes += clip.size
+        self._clips[(call_sid, turn)] = clip
+        self.stats_counters["stored"] += 1
+        self._spill_over_limit()
+        return turn
+
+    def _spill_over_limit(self):
+        for key in list(self._clips):
+            if self.memory_bytes <= self.memory_limit:
+                return
+            clip = self._clips[key]
+            if clip.in_memory:
+                self._clips[key] = self._spool(key[0], key[1], clip.data, clip.content_type)
+                self.memory_bytes -= clip.size
+                self.stats_counters["spilled"] += 1
+
+    def get(self, call_sid: str, turn: Optional[int] = None) -> Optional[AudioClip]:
+        """A call's clip for a turn, by default its latest"""
+        key = (call_sid, turn or self._turns.get(call_sid, 0))
+        clip = self._clips.get(key)
+        if clip is None:
+            self.stats_counters["misses"] += 1
+            return None
+        self._clips.move_to_end(key)
+        self.stats_counters["served"] += 1
+        return clip
+
+    def end_call(self, call_sid: str):
+        """Drop every clip for a call along with its spool files"""
+        keys = [key for key in self._clips if key[0] == call_sid]
+        for key in keys:
+            self._drop(key)
+        self._turns.pop(call_sid, None)
+        shutil.rmtree(self._call_dir(call_sid), ignore_errors=True)
+        if keys:
+            self.stats_counters["calls_ended"] += 1
+
+    def _drop(self, key: Tuple[str, int]):
+        clip = self._clips.pop(key)
+        if clip.in_memory:
+            self.memory_bytes -= clip.size
+        clip.close()
+
+    def expire(self):
+        """
+        Drop clips older than MAX_AGE_SECONDS, except each call's latest turn
+        (Twilio may still be about to fetch it). Whole calls are only dropped
+        by end_call, when the call ends or is evicted from active_calls.
+        """
+        cutoff = time.time() - AUDIO_STORE_CONFIG["MAX_AGE_SECONDS"]
+        stale = [
+            key for key, clip in self._clips.items()
+            if clip.created_at < cutoff and key[1] != self._turns.get(key[0])
+        ]
+        for key in stale:
+            path = self._clips[key].path
+            self._drop(key)
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.stats_counters["expired"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        counters = dict(self.stats_counters)
+        counters.update({
+            "clips": len(self._clips),
+            "calls": len({call_sid for call_sid, _ in self._clips}),
+            "memory_bytes": self.memory_bytes,
+            "spooled_bytes": sum(clip.size for clip in self._clips.values() if not clip.in_memory),
+        })
+        return counters
+
+# Create a singleton instance
+call_audio_store = CallAudioStore()
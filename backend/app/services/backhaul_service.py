@@ -1,91 +1,129 @@
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any
 from app.services.bruteforce_service import get_loads
+from app.services.geocoding_service import normalize_city, normalize_state
 from app.models.load import LoadResponse
 from app.services.load_search_service import truckstop_search
+from app.services.scoring import backhaul_pair_scores, columns
+from app.services.ranking import TopKAccumulator, top_k_indices
 import asyncio
 
-async def calculate_deadhead_miles(outbound_load, return_load):
-    return outbound_load.get('origin_distance', 0) + return_load.get('origin_distance', 0) + return_load.get('destination_distance', 0)
+BACKHAUL_SEARCH = {
+    "MAX_OUTBOUND": 20,
+    "PAIRS_PER_OUTBOUND": 3,
+    "MAX_CONCURRENT_LANES": 4,
+    "MAX_PAIRS": 60,  # MAX_OUTBOUND * PAIRS_PER_OUTBOUND
+}
+
+# Return load fields the pair score reads
+RETURN_SCORE_FIELDS = ("distance", "origin_distance", "destination_distance", "rate_per_mile_est")
 
 # will likely use PRAWL in the future
 async def outbound_score(load):
     return load.get('score', 0)
 
-async def total_score(outbound_load, return_load):
-    deadhead_miles = await calculate_deadhead_miles(outbound_load, return_load)
-    total_distance = deadhead_miles + outbound_load.get('distance', 0) + return_load.get('distance', 0)
-    total_revenue = outbound_load.get('rate_per_mile_est', 0) * outbound_load.get('distance', 0) + return_load.get('rate_per_mile_est', 0) * return_load.get('distance', 0)
-    estimate_1 = (outbound_load.get('distance', 0) + outbound_load.get('origin_distance', 0) + return_load.get('origin_distance', 0)) // 550 + (return_load.get('distance', 0) + return_load.get('destination_distance', 0)) // 550
-    estimate_2 = (outbound_load.get('distance', 0) + outbound_load.get('origin_distance', 0)) // 550 + (return_load.get('distance', 0) + return_load.get('destination_distance', 0) + return_load.get('origin_distance', 0)) // 550
-    estimated_days = 2 + min(estimate_1, estimate_2)
-    day_revenue = total_revenue / estimated_days
-    return total_revenue / total_distance + 0.004 * day_revenue
+def return_lane_key(outbound, date_obj):
+    """(destination city, destination state, return date) an outbound load needs a return load from"""
+    distance_traveled = outbound.get('distance', 0) + outbound.get('origin_distance', 0)
+    estimated_days = 1 + distance_traveled // 550
+    next_day = (date_obj + timedelta(days=estimated_days)).strftime("%Y-%m-%d")
+    return (normalize_city(outbound['destination_city']), normalize_state(outbound['destination_state']), next_day)
 
-async def get_backhaul_loads(
+def pair_loads(outbound, return_loads):
+    """Top scoring (outbound, return) pairs for one outbound load"""
+    return_loads = [
+        return_load for return_load in return_loads
+        if return_load.get('distance', 0) and return_load.get('rate_per_mile_est', 0)
+    ]
+    if not return_loads:
+        return []
+
+    # Score every return option for this outbound load in one vectorized call
+    scores = backhaul_pair_scores(outbound, columns(return_loads, RETURN_SCORE_FIELDS))
+
+    # Only the top 3 pairs are ever built; the rest are dropped as scores
+    pairs_for_outbound = []
+    for i in top_k_indices(scores["combined_score"], BACKHAUL_SEARCH["PAIRS_PER_OUTBOUND"]):
+        return_load = return_loads[i]
+        total_revenue = float(scores["total_revenue"][i])
+        total_miles = float(scores["total_miles"][i])
+        pair = {
+            "outbound": outbound,
+            "return": return_load,
+            "combined_score": float(scores["combined_score"][i]),
+            "total_revenue": total_revenue,
+            "total_miles": total_miles,
+            "deadhead_miles": float(scores["deadhead_miles"][i]),
+            "average_rate": total_revenue / total_miles,
+        }
+        pairs_for_outbound.append(pair)
+    return pairs_for_outbound
+
+async def iter_backhaul_pairs(
     origin_city: str,
     origin_state: str,
     date: str,
     max_weight: int,
     truck_type: str,
-    origin_range: int,
     user_integration_id: str,
     destination_city: str = "",
-    destination_state: str = "",
-    destination_range: int = 100
-) -> List[Dict[str, Any]]:
+    destination_state: str = ""
+) -> AsyncIterator[List[Dict[str, Any]]]:
     """
-    Get paired loads (outbound + return) optimized for backhaul routes.
-    Returns top 3 return options for each outbound load.
+    Yield batches of scored load pairs as each return lane finishes.
+    Outbound loads heading to the same city on the same return date share one
+    return-lane search; up to MAX_CONCURRENT_LANES lanes run at once.
+    Return loads are only limited to the original origin by Truckstop's default
+    destination range around origin_city; there is no radius check of our own,
+    the distance home only counts against a pair as deadhead in its score.
     """
-    try:
-        print(f"[BACKHAUL] Starting backhaul search from {origin_city}, {origin_state} on {date}")
-        
-        # Get outbound loads for specified date
-        outbound_loads = await get_loads(
-            origin_city,
-            origin_state,
-            date,
-            max_weight,
-            [truck_type],
-            user_integration_id,
-            destination_city=destination_city,
-            destination_state=destination_state,
-        )
+    print(f"[BACKHAUL] Starting backhaul search from {origin_city}, {origin_state} on {date}")
+    
+    # Get outbound loads for specified date
+    outbound_loads = await get_loads(
+        origin_city,
+        origin_state,
+        date,
+        max_weight,
+        [truck_type],
+        user_integration_id,
+        destination_city=destination_city,
+        destination_state=destination_state,
+    )
 
-        for load in outbound_loads:
-            load['score'] = await outbound_score(load)
+    for load in outbound_loads:
+        load['score'] = await outbound_score(load)
 
-        #not sure if needed, outbound loads might be sorted already
-        sorted_outbound_loads = sorted(outbound_loads, key=lambda x: x['score'], reverse=True)
-        
-        print(f"[BACKHAUL] Found {len(outbound_loads)} outbound loads")
-        
-        # Calculate next day for return loads
-        date_obj = datetime.strptime(date, "%Y-%m-%d")
-        next_day = (date_obj + timedelta(days=1)).strftime("%Y-%m-%d")
-        
-        load_pairs = []
-        
-        # For each outbound load, find return loads
-        for outbound in sorted_outbound_loads[:min(20, len(sorted_outbound_loads))]:
-            print(f"[BACKHAUL] Finding return loads for route to {outbound['destination_city']}, {outbound['destination_state']}")
+    #not sure if needed, outbound loads might be sorted already
+    sorted_outbound_loads = sorted(outbound_loads, key=lambda x: x['score'], reverse=True)
+    
+    print(f"[BACKHAUL] Found {len(outbound_loads)} outbound loads")
+    
+    date_obj = datetime.strptime(date, "%Y-%m-%d")
+    
+    # Group outbound loads by the return lane they need
+    lanes: Dict[tuple, List[Dict[str, Any]]] = {}
+    for outbound in sorted_outbound_loads[:BACKHAUL_SEARCH["MAX_OUTBOUND"]]:
+        if outbound.get('distance', 0) == 0:
+            continue
+
+        if outbound.get('rate_per_mile_est', 0) == 0:
+            continue
 
-            if outbound.get('distance', 0) == 0:
-                continue
+        lanes.setdefault(return_lane_key(outbound, date_obj), []).append(outbound)
 
-            if outbound.get('rate_per_mile_est', 0) == 0:
-                continue
+    print(f"[BACKHAUL] Searching {len(lanes)} unique return lanes")
+    semaphore = asyncio.Semaphore(BACKHAUL_SEARCH["MAX_CONCURRENT_LANES"])
 
-            distance_traveled = outbound.get('distance', 0) + outbound.get('origin_distance', 0)
-            estimated_days = 1 + distance_traveled // 550
-            next_day = (date_obj + timedelta(days=estimated_days)).strftime("%Y-%m-%d")
-            
-            
+    async def search_return_lane(outbounds):
+        first = outbounds[0]
+        _, _, next_day = return_lane_key(first, date_obj)
+        async with semaphore:
+            print(f"[BACKHAUL] Finding return loads for route to {first['destination_city']}, {first['destination_state']} on {next_day}")
             # Get return loads from destination
-            return_loads = await get_loads(
-                outbound['destination_city'],
-                outbound['destination_state'],
+            return await get_loads(
+                first['destination_city'],
+                first['destination_state'],
                 next_day,
                 max_weight,
                 [truck_type],
@@ -94,50 +132,64 @@ async def get_backhaul_loads(
                 destination_city=origin_city,
                 destination_state=origin_state
             )
-            
-            # Filter return loads to those ending near original origin
-            # TODO: Implement radius check around original origin
-            
-            # Calculate scores for each pair
-            pairs_for_outbound = []
-            for return_load in return_loads:
-
-                if return_load.get('distance', 0) == 0:
-                    continue
 
-                if return_load.get('rate_per_mile_est', 0) == 0:
+    tasks = {asyncio.create_task(search_return_lane(outbounds)): outbounds for outbounds in lanes.values()}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    print(f"[BACKHAUL ERROR] Return lane search failed: {str(task.exception())}")
                     continue
+                return_loads = task.result()
+                batch = []
+                for outbound in tasks[task]:
+                    batch.extend(pair_loads(outbound, return_loads))
+                if batch:
+                    batch.sort(key=lambda x: x['combined_score'], reverse=True)
+                    yield batch
+    finally:
+        for task in pending:
+            task.cancel()
 
-                deadhead_miles = await calculate_deadhead_miles(outbound, return_load)
-                # Combined score is sum of individual scores minus deadhead penalty
-                combined_score = await total_score(outbound, return_load)
-
-                total_revenue = (outbound.get('rate_per_mile_est', 0) * outbound.get('distance', 0) + return_load.get('rate_per_mile_est', 0) * return_load.get('distance', 0))
-                total_miles = outbound.get('distance', 0) + return_load.get('distance', 0) + deadhead_miles
-                
-                pair = {
-                    "outbound": outbound,
-                    "return": return_load,
-                    "combined_score": combined_score,
-                    "total_revenue": total_revenue,
-                    "total_miles": total_miles,
-                    "deadhead_miles": deadhead_miles,
-                    "average_rate": total_revenue / total_miles,
-                }
-                pairs_for_outbound.append(pair)
-            
-            # Sort pairs by combined score and take top 3
-            pairs_for_outbound.sort(key=lambda x: x['combined_score'], reverse=True)
-            top_pairs = pairs_for_outbound[:3]
-            
-            load_pairs.extend(top_pairs)
+async def get_backhaul_loads(
+    origin_city: str,
+    origin_state: str,
+    date: str,
+    max_weight: int,
+    truck_type: str,
+    origin_range: int,
+    user_integration_id: str,
+    destination_city: str = "",
+    destination_state: str = "",
+    destination_range: int = 100
+) -> List[Dict[str, Any]]:
+    """
+    Get paired loads (outbound + return) optimized for backhaul routes.
+    Returns top 3 return options for each outbound load.
+    """
+    try:
+        best_pairs = TopKAccumulator(BACKHAUL_SEARCH["MAX_PAIRS"])
+        async for batch in iter_backhaul_pairs(
+            origin_city,
+            origin_state,
+            date,
+            max_weight,
+            truck_type,
+            user_integration_id,
+            destination_city=destination_city,
+            destination_state=destination_state
+        ):
+            for pair in batch:
+                best_pairs.push(pair['combined_score'], pair)
         
-        # Sort all pairs by combined score
-        load_pairs.sort(key=lambda x: x['combined_score'], reverse=True)
+        # Best pairs by combined score
+        load_pairs = best_pairs.items()
         
         print(f"[BACKHAUL] Found {len(load_pairs)} valid load pairs")
         return load_pairs
         
     except Exception as e:
         print(f"[BACKHAUL ERROR] Error in backhaul search: {str(e)}")
-        return [] 
\ No newline at end of file
+        return []
\ No newline at end of file
@@ -3,12 +3,26 @@ from copy import deepcopy
 from app.models.load import LoadSearchRequest, LoadResponse
 from app.services.load_search_service import search_loads
 from .google_maps_service import google_maps_service
+from app.services.distance_estimator import estimate_distances_to, ESTIMATOR_STATS
+from app.services.scoring import home_gravity_scores
+from app.services.ranking import top_k_indices
+import asyncio
 import math
+import numpy as np
 import traceback
 from typing import List, Dict, Any
 from fastapi import HTTPException
 from functools import lru_cache
 
+# Candidates pre-ranked with the offline estimator; only this many get a paid Routes lookup
+ROUTES_TOP_K = 10
+
+# Per-truck-type Truckstop searches in get_loads run side by side
+TRUCK_TYPE_SEARCH = {
+    "MAX_CONCURRENT": 3,
+    "TIMEOUT_SECONDS": 20,
+}
+
 @lru_cache(maxsize=500)
 def parse_date(date_str: str) -> datetime:
     """Parse a date string into a datetime object"""
@@ -38,11 +52,10 @@ async def get_loads(
     try:
         print(f"[BRUTEFORCE] Searching for loads from {origin_city}, {origin_state} on {date}")
         
-        all_loads = []
         base_date = datetime.strptime(date, "%Y-%m-%d")
+        semaphore = asyncio.Semaphore(TRUCK_TYPE_SEARCH["MAX_CONCURRENT"])
         
-        # Search for each truck type
-        for truck_type in truck_types:
+        async def search_truck_type(truck_type):
             search_params = LoadSearchRequest(
                 origin_city=origin_city,
                 origin_state=origin_state,
@@ -55,8 +68,10 @@ async def get_loads(
                 data_source="truckstop",
                 backhaul_search=backhaul_search
             )
-            
-            response = await search_loads(search_params)
+            async with semaphore:
+                response = await asyncio.wait_for(
+                    search_loads(search_params), TRUCK_TYPE_SEARCH["TIMEOUT_SECONDS"]
+                )
             
             # Filter loads within +3 days of requested date
             filtered_loads = []
@@ -65,8 +80,30 @@ async def get_loads(
                 days_diff = (load_date - base_date).days
                 if 0 <= days_diff <= 3:  # Allow current date up to 3 days later
                     filtered_loads.append(load)
-            
-            all_loads.extend(filtered_loads)
+            return filtered_loads
+        
+        # Search all truck types concurrently; one slow or failing type doesn't sink the rest
+        results = await asyncio.gather(
+            *(search_truck_type(truck_type) for truck_type in truck_types),
+            return_exceptions=True
+        )
+        
+        # Merge, de-duplicating loads that match more than one truck type
+        all_loads = []
+        seen_ids = set()
+        for truck_type, result in zip(truck_types, results):
+            if isinstance(result, asyncio.TimeoutError):
+                print(f"[BRUTEFORCE] Search for truck type {truck_type} timed out")
+                continue
+            if isinstance(result, Exception):
+                print(f"[BRUTEFORCE ERROR] Search for truck type {truck_type} failed: {str(result)}")
+                continue
+            for load in result:
+                if load.id:
+                    if load.id in seen_ids:
+                        continue
+                    seen_ids.add(load.id)
+                all_loads.append(load)
         
         # Sort all loads by score
         all_loads.sort(key=lambda x: x.score, reverse=True)
@@ -123,24 +160,10 @@ def calculate_time_penalty(days):
     else:
         return 2.0
 
-async def score_load(load, start_city, start_state, current_date=None, trip_start_date=None):
-    """Score a load based on revenue, deadhead miles, distance from origin, and time on road"""
+def _score_with_distance(load, distance_to_origin, days_penalty):
+    """Revenue minus the home-gravity penalty for a load whose distance back to origin is known"""
     revenue = safe_float(load.get("rate_per_mile_est", 0)) * safe_float(load.get("distance", 0))
     
-    # Calculate distance from load destination back to origin
-    distance_to_origin = await calculate_distance_from_origin(
-        load.get("destination_city"), 
-        load.get("destination_state"),
-        start_city, 
-        start_state
-    )
-    
-    # Calculate days on road if dates are provided
-    days_penalty = 1
-    if current_date and trip_start_date:
-        days_on_road = (current_date - trip_start_date).days
-        days_penalty = calculate_time_penalty(days_on_road)
-    
     # Base score is revenue
     base_score = revenue
     
@@ -158,6 +181,76 @@ async def score_load(load, start_city, start_state, current_date=None, trip_star
     
     return final_score
 
+def _days_penalty(current_date=None, trip_start_date=None):
+    # Calculate days on road if dates are provided
+    if current_date and trip_start_date:
+        days_on_road = (current_date - trip_start_date).days
+        return calculate_time_penalty(days_on_road)
+    return 1
+
+async def score_load(load, start_city, start_state, current_date=None, trip_start_date=None):
+    """Score a load based on revenue, deadhead miles, distance from origin, and time on road"""
+    # Calculate distance from load destination back to origin
+    distance_to_origin = await calculate_distance_from_origin(
+        load.get("destination_city"), 
+        load.get("destination_state"),
+        start_city, 
+        start_state
+    )
+    
+    return _score_with_distance(load, distance_to_origin, _days_penalty(current_date, trip_start_date))
+
+async def calculate_distances_from_origin(loads, origin_city, origin_state):
+    """Distance from every load destination back to origin, resolved in one batched lookup"""
+    destinations = [(load.get("destination_city"), load.get("destination_state")) for load in loads]
+    try:
+        distances = await google_maps_service.get_driving_distances_to(
+            destinations, origin_city, origin_state
+        )
+    except Exception as e:
+        print(f"[ROUTE_PLANNER] Error calculating batch distance to origin: {e}")
+        distances = {}
+    return [safe_float(distances.get(destination, (None, None))[0]) for destination in destinations]
+
+async def score_loads(loads, start_city, start_state, current_date=None, trip_start_date=None, top_k=ROUTES_TOP_K):
+    """
+    Score a whole candidate list at once; returns scores in the same order as loads.
+    Every load is pre-ranked with the offline distance estimate, then only the top_k
+    (plus any the estimator could not place) are re-scored with Routes API distances.
+    Loads scored from the estimate alone are flagged with distance_estimated.
+    """
+    if not loads:
+        return []
+    days_penalty = _days_penalty(current_date, trip_start_date)
+    destinations = [(load.get("destination_city"), load.get("destination_state")) for load in loads]
+    estimates = estimate_distances_to(destinations, start_city, start_state)
+    revenues = np.array([
+        safe_float(load.get("rate_per_mile_est", 0)) * safe_float(load.get("distance", 0)) for load in loads
+    ])
+    estimated_scores = home_gravity_scores(revenues, estimates, days_penalty)
+
+    # Unknown cities rank first so they always get a real lookup
+    unresolved = int(np.isnan(estimated_scores).sum())
+    refine = [int(i) for i in top_k_indices(np.nan_to_num(estimated_scores, nan=np.inf), top_k + unresolved)]
+
+    refined_distances = await calculate_distances_from_origin(
+        [loads[i] for i in refine], start_city, start_state
+    )
+    ESTIMATOR_STATS["routes_lookups_skipped"] += len(loads) - len(refine)
+    print(f"[ROUTE_PLANNER] Pre-ranked {len(loads)} loads by estimate, {len(refine)} refined with Routes API")
+
+    scores = [float(score) for score in estimated_scores]
+    for load in loads:
+        load["distance_estimated"] = True
+    for i, distance in zip(refine, refined_distances):
+        scores[i] = _score_with_distance(loads[i], distance, days_penalty)
+        loads[i]["distance_estimated"] = False
+    return scores
+
+def planner_rank_key(load):
+    """Sort key that keeps Routes-verified loads ahead of estimate-only ones"""
+    return (not load.get("distance_estimated", False), load.get("score", 0))
+
 async def get_best_load(loads, start_city, start_state, filter_dest=None, current_date=None, trip_start_date=None):
     """Get best load from a list of loads, optionally filtering by destination"""
     if filter_dest:
@@ -168,17 +261,11 @@ async def get_best_load(loads, start_city, start_state, filter_dest=None, curren
         return None
         
     # Score all loads
-    scored_loads = []
-    for load in loads:
-        score = await score_load(load, start_city, start_state, current_date, trip_start_date)
-        scored_loads.append((load, score))
-    
-    # Sort by score and take top 3
-    scored_loads.sort(key=lambda x: x[1], reverse=True)
-    top_loads = scored_loads[:3]
+    scores = await score_loads(loads, start_city, start_state, current_date, trip_start_date)
+    scored_loads = [(load, score) for load, score in zip(loads, scores) if not load.get("distance_estimated")]
     
     # Return the load with best score
-    return max(top_loads, key=lambda x: x[1])[0] if top_loads else None
+    return max(scored_loads, key=lambda x: x[1])[0] if scored_loads else None
 
 def is_nearby_city(city1, state1, city2, state2):
     """Check if two cities are in the same state or neighboring states"""
@@ -427,21 +514,19 @@ async def brute_force_with_home_gravity(
             
             print(f"[ROUTE_PLANNER] Found {len(loads)} potential loads")
             
-            # Score each load
-            for load in loads:
-                load["score"] = await score_load(
-                    load, 
-                    start_city, 
-                    start_state,
-                    current_date,
-                    start_date
-                )
-            
-            # Sort loads by score
-            loads.sort(key=lambda x: x["score"], reverse=True)
+            # Score all candidate loads with one batched distance lookup
+            scores = await score_loads(
+                loads,
+                start_city,
+                start_state,
+                current_date,
+                start_date
+            )
+            for load, score in zip(loads, scores):
+                load["score"] = score
             
-            # Take the best load
-            best_load = loads[0]
+            # Take the best load, Routes-verified candidates first
+            best_load = max(loads, key=planner_rank_key)
             print(f"[ROUTE_PLANNER] Selected best load:")
             print(f"  From: {best_load['origin_city']}, {best_load['origin_state']}")
             print(f"  To: {best_load['destination_city']}, {best_load['destination_state']}")
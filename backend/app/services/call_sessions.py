@@ -0,0 +1,114 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CALL_SESSION_CONFIG = {
+    "IDLE_TTL_SECONDS": int(os.getenv("CALL_IDLE_TTL", "900")),  # no webhook for this long = call is gone
+    "MAX_CALLS": int(os.getenv("MAX_ACTIVE_CALLS", "500")),
+    "TOP_CALLS_REPORTED": 10,
+}
+
+class CallSessions:
+    """
+    call_sid -> DispatchAgent for live calls.
+    Twilio doesn't always post a terminal status, so agents idle for longer
+    than IDLE_TTL_SECONDS are evicted, checked on every access. Entries are
+    kept in last-access order, which makes the idle sweep a scan from the front.
+    """
+
+    def __init__(self, idle_ttl: int = CALL_SESSION_CONFIG["IDLE_TTL_SECONDS"], max_calls: int = CALL_SESSION_CONFIG["MAX_CALLS"]):
+        self.idle_ttl = idle_ttl
+        self.max_calls = max_calls
+        self._sessions: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # Called with the call SID whenever a call ends or is evicted (e.g. to free its audio)
+        self.listeners: List[Callable[[str], object]] = []
+        self.stats_counters: Dict[str, int] = {
+            "started": 0,
+            "ended": 0,
+            "evicted_idle": 0,
+            "evicted_capacity": 0,
+        }
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        cutoff = (now or time.time()) - self.idle_ttl
+        evicted = 0
+        while self._sessions:
+            call_sid, (_, last_seen) = next(iter(self._sessions.items()))
+            if last_seen >= cutoff:
+                break
+            del self._sessions[call_sid]
+            evicted += 1
+            print(f"[CALLS] Evicted agent for idle call {call_sid}")
+            self._notify(call_sid)
+        self.stats_counters["evicted_idle"] += evicted
+        return evicted
+
+    def __setitem__(self, call_sid: str, agent: Any):
+        self.evict_idle()
+        if call_sid not in self._sessions:
+            self.stats_counters["started"] += 1
+        self._sessions[call_sid] = (agent, time.time())
+        self._sessions.move_to_end(call_sid)
+        while len(self._sessions) > self.max_calls:
+            evicted_sid, _ = self._sessions.popitem(last=False)
+            self.stats_counters["evicted_capacity"] += 1
+            self._notify(evicted_sid)
+
+    def _notify(self, call_sid: str):
+        for listener in self.listeners:
+            try:
+                listener(call_sid)
+            except Exception as e:
+                print(f"[CALLS] Listener failed for {call_sid}: {str(e)}")
+
+    def get(self, call_sid: str, default: Any = None) -> Any:
+        """The call's agent, marking the call as active"""
+        self.evict_idle()
+        entry = self._sessions.get(call_sid)
+        if entry is None:
+            return default
+        self._sessions[call_sid] = (entry[0], time.time())
+        self._sessions.move_to_end(call_sid)
+        return entry[0]
+
+    def __getitem__(self, call_sid: str) -> Any:
+        agent = self.get(call_sid)
+        if agent is None:
+            raise KeyError(call_sid)
+        return agent
+
+    def __contains__(self, call_sid: str) -> bool:
+        return call_sid in self._sessions
+
+    def __delitem__(self, call_sid: str):
+        del self._sessions[call_sid]
+        self.stats_counters["ended"] += 1
+        self._notify(call_sid)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def keys(self) -> List[str]:
+        return list(self._sessions.keys())
+
+    def stats(self) -> Dict[str, object]:
+        self.evict_idle()
+        now = time.time()
+        calls = []
+        for call_sid, (agent, last_seen) in self._sessions.items():
+            memory = agent.memory_stats() if hasattr(agent, "memory_stats") else {}
+            calls.append({"call_sid": call_sid, "idle_seconds": round(now - last_seen, 1), **memory})
+        chars = [call.get("memory_chars", 0) for call in calls]
+        counters = dict(self.stats_counters)
+        counters.update({
+            "active_calls": len(calls),
+            "idle_ttl_seconds": self.idle_ttl,
+            "memory_chars_total": sum(chars),
+            "memory_chars_max": max(chars, default=0),
+            "largest_calls": sorted(calls, key=lambda c: c.get("memory_chars", 0), reverse=True)[:CALL_SESSION_CONFIG["TOP_CALLS_REPORTED"]],
+        })
+        return counters
+
+# Create a singleton instance
+active_calls = CallSessions()
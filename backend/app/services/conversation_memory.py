@@ -0,0 +1,99 @@
+import os
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+MEMORY_CONFIG = {
+    "WINDOW_MESSAGES": int(os.getenv("CALL_MEMORY_WINDOW", "12")),     # verbatim messages kept per store
+    "MAX_CHARS": int(os.getenv("CALL_MEMORY_MAX_CHARS", "12000")),    # hard budget: window + summary
+    "SUMMARY_MAX_CHARS": 800,
+    "SNIPPET_CHARS": 120,   # how much of an old message survives in the summary
+}
+
+SPEAKER_LABELS = {"user": "Driver", "assistant": "Skye"}
+
+class ConversationMemory:
+    """
+    Fixed-size ring buffer of (role, text) messages with a rolling summary.
+    Messages pushed out of the window are folded into the summary as short
+    snippets; the oldest snippets go first once the summary or the per-call
+    character budget is exceeded. Rendered transcripts are cached until the
+    next append.
+    """
+
+    def __init__(self, window: Optional[int] = None, max_chars: Optional[int] = None):
+        self.messages: Deque[Tuple[str, str]] = deque(maxlen=window or MEMORY_CONFIG["WINDOW_MESSAGES"])
+        self.max_chars = max_chars or MEMORY_CONFIG["MAX_CHARS"]
+        self.summary_parts: Deque[str] = deque()
+        self.chars = 0
+        self.summary_chars = 0
+        self.total_messages = 0
+        self.summarized_messages = 0
+        self.dropped_snippets = 0
+        self._rendered: Dict[tuple, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def append(self, role: str, text: str):
+        # No single message may take more than half the budget
+        text = text[:self.max_chars // 2]
+        if len(self.messages) == self.messages.maxlen:
+            self._fold(self.messages.popleft())
+        self.messages.append((role, text))
+        self.chars += len(text)
+        self.total_messages += 1
+        self._enforce_budget()
+        self._rendered.clear()
+
+    def _fold(self, message: Tuple[str, str]):
+        role, text = message
+        self.chars -= len(text)
+        self.summarized_messages += 1
+        snippet = " ".join(text.split())
+        limit = MEMORY_CONFIG["SNIPPET_CHARS"]
+        if len(snippet) > limit:
+            snippet = snippet[:limit].rsplit(" ", 1)[0] + "..."
+        part = f"{SPEAKER_LABELS.get(role, role)}: {snippet}"
+        self.summary_parts.append(part)
+        self.summary_chars += len(part)
+        while self.summary_chars > MEMORY_CONFIG["SUMMARY_MAX_CHARS"]:
+            self._drop_snippet()
+
+    def _drop_snippet(self):
+        self.summary_chars -= len(self.summary_parts.popleft())
+        self.dropped_snippets += 1
+
+    def _enforce_budget(self):
+        while self.chars + self.summary_chars > self.max_chars and self.summary_parts:
+            self._drop_snippet()
+        while self.chars + self.summary_chars > self.max_chars and len(self.messages) > 1:
+            self._fold(self.messages.popleft())
+            while self.chars + self.summary_chars > self.max_chars and self.summary_parts:
+                self._drop_snippet()
+
+    @property
+    def summary(self) -> str:
+        return " | ".join(self.summary_parts)
+
+    def render(self, last: int, labels: Optional[Dict[str, str]] = None) -> str:
+        """
+        The last `last` messages as "Label: text" lines. Only roles present in
+        labels are included (after taking the last messages, like slicing a list).
+        """
+        labels = labels or SPEAKER_LABELS
+        key = (last, tuple(labels.items()))
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            window = list(self.messages)[-last:] if last else []
+            rendered = "\n".join(f"{labels[role]}: {text}" for role, text in window if role in labels)
+            self._rendered[key] = rendered
+        return rendered
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "messages": len(self.messages),
+            "total_messages": self.total_messages,
+            "summarized_messages": self.summarized_messages,
+            "dropped_snippets": self.dropped_snippets,
+            "chars": self.chars + self.summary_chars,
+        }
@@ -0,0 +1,75 @@
+import json
+import os
+from typing import Dict, Optional, Tuple
+from cachetools import TTLCache
+from app.services.geocoding_service import normalize_city, normalize_state
+from app.services.persistent_store import PersistentStore
+
+# Driving distances barely change; durations drift with traffic, so keep a week by default
+DISTANCE_CACHE_TTL = int(os.getenv("DISTANCE_CACHE_TTL", str(7 * 24 * 3600)))
+DISTANCE_CACHE_SIZE = int(os.getenv("DISTANCE_CACHE_SIZE", "20000"))
+
+def distance_key(origin_city: str, origin_state: str, dest_city: str, dest_state: str) -> str:
+    """Symmetric cache key: A->B and B->A share an entry"""
+    origin = f"{normalize_city(origin_city)}|{normalize_state(origin_state)}"
+    destination = f"{normalize_city(dest_city)}|{normalize_state(dest_state)}"
+    return "::".join(sorted((origin, destination)))
+
+class DistanceCache:
+    """
+    Two-tier driving distance cache.
+    Tier 1 is an in-process LRU with TTL, tier 2 a SQLite store shared by all workers.
+    Values are (distance_miles, duration_hours).
+    """
+
+    def __init__(self, ttl: int = DISTANCE_CACHE_TTL, maxsize: int = DISTANCE_CACHE_SIZE):
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.store = PersistentStore("driving_distance")
+        self.stats_counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "store_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "api_calls": 0,
+            "api_errors": 0,
+        }
+
+    def get(self, key: str) -> Optional[Tuple[float, float]]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats_counters["memory_hits"] += 1
+            return value
+
+        stored = self.store.get(key, max_age=self.ttl)
+        if stored is not None:
+            self.stats_counters["store_hits"] += 1
+            distance, duration = json.loads(stored[0])
+            value = (distance, duration)
+            self.memory[key] = value
+            return value
+
+        self.stats_counters["misses"] += 1
+        return None
+
+    def set(self, key: str, distance: float, duration: float):
+        value = (distance, duration)
+        self.memory[key] = value
+        self.store.set(key, json.dumps(value).encode())
+
+    def stats(self) -> Dict[str, object]:
+        counters = dict(self.stats_counters)
+        lookups = counters["memory_hits"] + counters["store_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["store_hits"]
+        counters.update({
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "ttl_seconds": self.ttl,
+        })
+        return counters
+
+    def purge_expired(self) -> int:
+        """Drop shared-tier entries past their TTL"""
+        return self.store.purge_older_than(self.ttl)
+
+distance_cache = DistanceCache()
@@ -0,0 +1,82 @@
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from app.services.geocoding_service import get_gazetteer, normalize_state
+
+EARTH_RADIUS_MILES = 3958.8
+
+# US Census regions, used to pick a road circuity factor
+REGION_BY_STATE = {
+    **dict.fromkeys(["CT", "ME", "MA", "NH", "RI", "VT", "NJ", "NY", "PA"], "northeast"),
+    **dict.fromkeys(["IL", "IN", "MI", "OH", "WI", "IA", "KS", "MN", "MO", "NE", "ND", "SD"], "midwest"),
+    **dict.fromkeys(["DE", "DC", "FL", "GA", "MD", "NC", "SC", "VA", "WV", "AL", "KY", "MS", "TN",
+                     "AR", "LA", "OK", "TX"], "south"),
+    **dict.fromkeys(["AZ", "CO", "ID", "MT", "NV", "NM", "UT", "WY", "AK", "CA", "HI", "OR", "WA"], "west"),
+}
+
+# Driving miles per great-circle mile. Grid-like Midwest roads are the most direct,
+# mountain and coastal routing in the West the least. Re-check against
+# benchmarks/distance_estimator_report.py when the cached Routes sample grows.
+ROAD_CIRCUITY_FACTORS = {
+    "northeast": 1.22,
+    "midwest": 1.17,
+    "south": 1.20,
+    "west": 1.25,
+    "default": 1.20,
+}
+
+ESTIMATOR_STATS = {
+    "estimates": 0,
+    "unresolved": 0,
+    "routes_lookups_skipped": 0,
+}
+
+def region_for_state(state: str) -> str:
+    return REGION_BY_STATE.get(normalize_state(state), "default")
+
+def haversine_miles(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in miles, vectorized over arrays of coordinates in degrees"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def city_coordinates(cities: Iterable[Tuple[str, str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude and longitude arrays for (city, state) pairs; NaN where the gazetteer has no match"""
+    gazetteer = get_gazetteer()
+    rows = [gazetteer.find(city, state) for city, state in cities]
+    found = np.array([row is not None for row in rows], dtype=bool)
+    index = np.array([row if row is not None else 0 for row in rows], dtype=np.int64)
+    lats = np.where(found, gazetteer.latitudes[index], np.nan)
+    lons = np.where(found, gazetteer.longitudes[index], np.nan)
+    return lats, lons
+
+def road_factors(origin_states: Iterable[str], dest_states: Iterable[str]) -> np.ndarray:
+    """Circuity factor per pair; lanes that cross regions get the mean of both ends"""
+    origin = np.array([ROAD_CIRCUITY_FACTORS[region_for_state(s)] for s in origin_states], dtype=np.float64)
+    dest = np.array([ROAD_CIRCUITY_FACTORS[region_for_state(s)] for s in dest_states], dtype=np.float64)
+    return (origin + dest) / 2
+
+def estimate_driving_miles(
+    origins: List[Tuple[str, str]],
+    destinations: List[Tuple[str, str]]
+) -> np.ndarray:
+    """
+    Offline driving distance estimate for aligned lists of (city, state) pairs:
+    haversine distance times the regional road circuity factor. NaN where a city is unknown.
+    """
+    if not origins:
+        return np.empty(0, dtype=np.float64)
+    o_lats, o_lons = city_coordinates(origins)
+    d_lats, d_lons = city_coordinates(destinations)
+    factors = road_factors([state for _, state in origins], [state for _, state in destinations])
+    estimates = haversine_miles(o_lats, o_lons, d_lats, d_lons) * factors
+
+    ESTIMATOR_STATS["estimates"] += len(estimates)
+    ESTIMATOR_STATS["unresolved"] += int(np.isnan(estimates).sum())
+    return estimates
+
+def estimate_distances_to(origins: List[Tuple[str, str]], dest_city: str, dest_state: str) -> np.ndarray:
+    """Estimated driving miles from each origin to a single destination"""
+    return estimate_driving_miles(origins, [(dest_city, dest_state)] * len(origins))
+
+def estimator_stats() -> Dict[str, int]:
+    return dict(ESTIMATOR_STATS)
@@ -0,0 +1,172 @@
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from geopy.geocoders import Nominatim
+from app.services.persistent_store import PersistentStore
+
+# Bundled US city gazetteer (GeoNames, places with population >= 1000)
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "us_cities.tsv.gz")
+
+# Remote geocoder is only used when the gazetteer misses
+geolocator = Nominatim(user_agent="skywaze_app")
+
+# Abbreviations expanded during normalization ("St. Louis" == "Saint Louis")
+TOKEN_ALIASES = {
+    "st": "saint",
+    "ste": "sainte",
+    "ft": "fort",
+    "mt": "mount",
+    "pt": "point",
+}
+
+# GeoNames names that differ from what load boards send (gazetteer name -> extra lookup key)
+CITY_ALIASES = {
+    "new york city": "new york",
+}
+
+_PUNCTUATION = re.compile(r"[.,'`’]")
+_SEPARATORS = re.compile(r"[\s\-_/]+")
+
+def normalize_city(city: str) -> str:
+    """Normalize a city name for lookups: case, punctuation and St./Saint style abbreviations"""
+    if not city:
+        return ""
+    text = _PUNCTUATION.sub("", city.lower())
+    tokens = _SEPARATORS.split(text.strip())
+    return " ".join(TOKEN_ALIASES.get(token, token) for token in tokens if token)
+
+def normalize_state(state: str) -> str:
+    return (state or "").strip().upper()
+
+class Gazetteer:
+    """
+    In-memory US city/state -> lat/lon table.
+    Coordinates and populations are kept in NumPy arrays; lookups go through
+    dict indexes on the normalized name.
+    """
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        names: List[str] = []
+        states: List[str] = []
+        lats: List[float] = []
+        lons: List[float] = []
+        populations: List[int] = []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#"):
+                    continue
+                name, state, lat, lon, population = line.rstrip("\n").split("\t")
+                names.append(name)
+                states.append(state)
+                lats.append(float(lat))
+                lons.append(float(lon))
+                populations.append(int(population))
+
+        self.names = names
+        self.states = states
+        self.latitudes = np.array(lats, dtype=np.float64)
+        self.longitudes = np.array(lons, dtype=np.float64)
+        self.populations = np.array(populations, dtype=np.int64)
+
+        # (normalized city, state) -> row; most populous wins on duplicates
+        self.index: Dict[Tuple[str, str], int] = {}
+        # normalized city -> rows ordered by population, for state-less lookups
+        self.by_name: Dict[str, List[int]] = {}
+        for row in np.argsort(-self.populations, kind="stable"):
+            row = int(row)
+            key = normalize_city(names[row])
+            self.index.setdefault((key, states[row]), row)
+            self.by_name.setdefault(key, []).append(row)
+            alias = CITY_ALIASES.get(key)
+            if alias:
+                self.index.setdefault((alias, states[row]), row)
+                self.by_name.setdefault(alias, []).append(row)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def find(self, city: str, state: str = "") -> Optional[int]:
+        """Row index for a city, optionally constrained to a state"""
+        key = normalize_city(city)
+        if not key:
+            return None
+        state = normalize_state(state)
+        if state:
+            return self.index.get((key, state))
+        rows = self.by_name.get(key)
+        return rows[0] if rows else None
+
+    def lookup(self, city: str, state: str = "") -> Optional[Tuple[float, float]]:
+        """(latitude, longitude) for a city or None"""
+        row = self.find(city, state)
+        if row is None:
+            return None
+        return float(self.latitudes[row]), float(self.longitudes[row])
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer() -> Gazetteer:
+    """Load the bundled gazetteer once per process"""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                start_time = time.time()
+                _gazetteer = Gazetteer()
+                print(f"[GEOCODE] Loaded gazetteer with {len(_gazetteer)} cities in {time.time() - start_time:.2f}s")
+    return _gazetteer
+
+# Remote geocoder results, shared by all workers on the machine
+geocode_store = PersistentStore("geocode")
+_remote_results: Dict[Tuple[str, str], Optional[Tuple[float, float]]] = {}
+
+GEOCODE_STATS = {
+    "gazetteer_hits": 0,
+    "store_hits": 0,
+    "remote_lookups": 0,
+    "remote_failures": 0,
+}
+
+def geocode(city: str, state: str) -> Optional[Tuple[float, float]]:
+    """
+    Resolve a US city/state to (latitude, longitude).
+    Order: bundled gazetteer -> persistent store -> Nominatim (written back to the store).
+    """
+    coords = get_gazetteer().lookup(city, state)
+    if coords is not None:
+        GEOCODE_STATS["gazetteer_hits"] += 1
+        return coords
+
+    key = (normalize_city(city), normalize_state(state))
+    if key in _remote_results:
+        GEOCODE_STATS["store_hits"] += 1
+        return _remote_results[key]
+
+    store_key = f"{key[0]}|{key[1]}"
+    stored = geocode_store.get(store_key)
+    if stored is not None:
+        GEOCODE_STATS["store_hits"] += 1
+        value = json.loads(stored[0])
+        coords = (value[0], value[1]) if value else None
+        _remote_results[key] = coords
+        return coords
+
+    GEOCODE_STATS["remote_lookups"] += 1
+    try:
+        location = geolocator.geocode(f"{city}, {state}")
+    except Exception as e:
+        # Don't cache transient failures
+        GEOCODE_STATS["remote_failures"] += 1
+        print(f"[GEOCODE ERROR] Remote geocode failed for {city}, {state}: {e}")
+        return None
+
+    coords = (location.latitude, location.longitude) if location else None
+    _remote_results[key] = coords
+    geocode_store.set(store_key, json.dumps(list(coords) if coords else None).encode())
+    return coords
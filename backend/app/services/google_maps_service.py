@@ -1,11 +1,21 @@
 import os
-import httpx
-from typing import Optional, Tuple
+import asyncio
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.services.http_client import shared_http_client
+from app.services.distance_cache import distance_cache, distance_key
+
+# computeRouteMatrix allows at most 50 address waypoints per request
+MATRIX_CHUNK_SIZE = 25
+MATRIX_MAX_CONCURRENCY = 4
 
 class GoogleMapsRoutesService:
     def __init__(self):
         self.api_key = os.getenv('GOOGLE_MAPS_API_KEY')
         self.base_url = "https://routes.googleapis.com/directions/v2:computeRoutes"
+        self.matrix_url = "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
+        self.cache = distance_cache
+        # In-flight requests keyed by cache key, so concurrent identical lookups share one API call
+        self._in_flight: Dict[str, asyncio.Future] = {}
         
         if not self.api_key:
             raise ValueError("GOOGLE_MAPS_API_KEY environment variable is not set")
@@ -19,9 +29,164 @@ class GoogleMapsRoutesService:
     ) -> Tuple[Optional[float], Optional[float]]:
         """
         Get driving distance and duration between two locations using Google Maps Routes API.
+        Results are cached (symmetric key, TTL) in memory and in the shared store.
         Returns a tuple of (distance_in_miles, duration_in_hours)
         """
+        key = distance_key(origin_city, origin_state, dest_city, dest_state)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.cache.stats_counters["coalesced"] += 1
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
         try:
+            result = await self._fetch_driving_distance(origin_city, origin_state, dest_city, dest_state)
+            if result[0] is not None:
+                self.cache.set(key, *result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Coalesced callers weren't cancelled; they get "unknown", as in the batch path
+            future.set_result((None, None))
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def get_driving_distances_to(
+        self,
+        origins: Iterable[Tuple[str, str]],
+        dest_city: str,
+        dest_state: str
+    ) -> Dict[Tuple[str, str], Tuple[Optional[float], Optional[float]]]:
+        """
+        Driving distance and duration from many (city, state) origins to one destination.
+        Unique origins are resolved from the cache first; the rest go to the Routes
+        matrix endpoint in chunks of MATRIX_CHUNK_SIZE with bounded concurrency.
+        Returns {(city, state): (distance_in_miles, duration_in_hours)}
+        """
+        results: Dict[Tuple[str, str], Tuple[Optional[float], Optional[float]]] = {}
+        waiting: Dict[Tuple[str, str], asyncio.Future] = {}
+        to_fetch: Dict[str, Tuple[str, str]] = {}
+        owned: Dict[str, asyncio.Future] = {}
+        loop = asyncio.get_running_loop()
+
+        for origin in dict.fromkeys(origins):
+            key = distance_key(origin[0], origin[1], dest_city, dest_state)
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[origin] = cached
+            elif key in self._in_flight:
+                self.cache.stats_counters["coalesced"] += 1
+                waiting[origin] = self._in_flight[key]
+            elif key in to_fetch:
+                # Same city spelled differently, resolve it once
+                waiting[origin] = owned[key]
+            else:
+                to_fetch[key] = origin
+                owned[key] = loop.create_future()
+                self._in_flight[key] = owned[key]
+
+        if to_fetch:
+            print(f"[GOOGLE_MAPS] Batch distance to {dest_city}, {dest_state}: {len(results)} cached, {len(to_fetch)} to fetch")
+            semaphore = asyncio.Semaphore(MATRIX_MAX_CONCURRENCY)
+            keys = list(to_fetch)
+            chunks = [keys[i:i + MATRIX_CHUNK_SIZE] for i in range(0, len(keys), MATRIX_CHUNK_SIZE)]
+
+            async def resolve_chunk(chunk: List[str]):
+                async with semaphore:
+                    chunk_results = await self._fetch_distance_matrix(
+                        [to_fetch[key] for key in chunk], dest_city, dest_state
+                    )
+                for key, result in zip(chunk, chunk_results):
+                    if result[0] is not None:
+                        self.cache.set(key, *result)
+                    results[to_fetch[key]] = result
+                    owned[key].set_result(result)
+
+            try:
+                await asyncio.gather(*(resolve_chunk(chunk) for chunk in chunks))
+            finally:
+                for key, future in owned.items():
+                    if not future.done():
+                        future.set_result((None, None))
+                    self._in_flight.pop(key, None)
+
+        for origin, future in waiting.items():
+            results[origin] = await asyncio.shield(future)
+        return results
+
+    async def _fetch_distance_matrix(
+        self,
+        origins: List[Tuple[str, str]],
+        dest_city: str,
+        dest_state: str
+    ) -> List[Tuple[Optional[float], Optional[float]]]:
+        """One computeRouteMatrix call for N origins -> 1 destination, falling back to single routes on failure"""
+        results: List[Tuple[Optional[float], Optional[float]]] = [(None, None)] * len(origins)
+        try:
+            self.cache.stats_counters["api_calls"] += 1
+            payload = {
+                "origins": [
+                    {"waypoint": {"address": f"{city}, {state}, USA"}} for city, state in origins
+                ],
+                "destinations": [
+                    {"waypoint": {"address": f"{dest_city}, {dest_state}, USA"}}
+                ],
+                "travelMode": "DRIVE",
+                "routingPreference": "TRAFFIC_AWARE",
+                "extraComputations": ["TOLLS"],
+                "languageCode": "en-US",
+                "units": "IMPERIAL"
+            }
+            headers = {
+                "Content-Type": "application/json",
+                "X-Goog-Api-Key": self.api_key,
+                "X-Goog-FieldMask": "originIndex,destinationIndex,distanceMeters,duration,condition"
+            }
+
+            response = await shared_http_client.post(self.matrix_url, json=payload, headers=headers)
+            if response.status_code != 200:
+                raise ValueError(f"{response.status_code} - {response.text}")
+
+            for element in response.json():
+                index = element.get("originIndex", 0)
+                if element.get("condition") != "ROUTE_EXISTS" or "distanceMeters" not in element:
+                    continue
+                distance_miles = float(element["distanceMeters"]) / 1609.34
+                duration_hours = float(element.get("duration", "0s").rstrip('s')) / 3600
+                results[index] = (distance_miles, duration_hours)
+
+            print(f"[GOOGLE_MAPS] Matrix call resolved {sum(1 for r in results if r[0] is not None)}/{len(origins)} routes")
+            return results
+
+        except Exception as e:
+            self.cache.stats_counters["api_errors"] += 1
+            print(f"[GOOGLE_MAPS] Matrix error, falling back to single routes: {str(e)}")
+            return list(await asyncio.gather(*(
+                self._fetch_driving_distance(city, state, dest_city, dest_state) for city, state in origins
+            )))
+
+    async def _fetch_driving_distance(
+        self,
+        origin_city: str,
+        origin_state: str,
+        dest_city: str,
+        dest_state: str
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Call the Routes API for one origin/destination pair"""
+        try:
+            self.cache.stats_counters["api_calls"] += 1
+
             # Format addresses
             origin = f"{origin_city}, {origin_state}, USA"
             destination = f"{dest_city}, {dest_state}, USA"
@@ -48,38 +213,38 @@ class GoogleMapsRoutesService:
                 "X-Goog-FieldMask": "routes.duration,routes.distanceMeters"
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.base_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=10.0
-                )
-                
-                if response.status_code != 200:
-                    print(f"[GOOGLE_MAPS] Error: {response.status_code} - {response.text}")
-                    return None, None
-                
-                data = response.json()
-                if not data.get("routes"):
-                    print(f"[GOOGLE_MAPS] No routes found for {origin} to {destination}")
-                    return None, None
-                
-                # Get the first (best) route
-                route = data["routes"][0]
-                
-                # Convert meters to miles
-                distance_miles = float(route["distanceMeters"]) / 1609.34
-                
-                # Convert seconds to hours
-                duration_hours = float(route["duration"].rstrip('s')) / 3600
-                
-                print(f"[GOOGLE_MAPS] Found route: {distance_miles:.1f} miles, {duration_hours:.1f} hours")
-                return distance_miles, duration_hours
+            response = await shared_http_client.post(
+                self.base_url,
+                json=payload,
+                headers=headers
+            )
+            
+            if response.status_code != 200:
+                self.cache.stats_counters["api_errors"] += 1
+                print(f"[GOOGLE_MAPS] Error: {response.status_code} - {response.text}")
+                return None, None
+            
+            data = response.json()
+            if not data.get("routes"):
+                print(f"[GOOGLE_MAPS] No routes found for {origin} to {destination}")
+                return None, None
+            
+            # Get the first (best) route
+            route = data["routes"][0]
+            
+            # Convert meters to miles
+            distance_miles = float(route["distanceMeters"]) / 1609.34
+            
+            # Convert seconds to hours
+            duration_hours = float(route["duration"].rstrip('s')) / 3600
+            
+            print(f"[GOOGLE_MAPS] Found route: {distance_miles:.1f} miles, {duration_hours:.1f} hours")
+            return distance_miles, duration_hours
                 
         except Exception as e:
+            self.cache.stats_counters["api_errors"] += 1
             print(f"[GOOGLE_MAPS] Error calculating distance: {str(e)}")
             return None, None
 
 # Create a singleton instance
-google_maps_service = GoogleMapsRoutesService() 
\ No newline at end of file
+google_maps_service = GoogleMapsRoutesService() 
@@ -0,0 +1,169 @@
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Connection pool configuration shared by every outbound provider call
+POOL_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=30.0
+)
+
+DEFAULT_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+
+# Per-host timeouts - Truckstop SOAP searches are slow, Routes calls should fail fast
+HOST_TIMEOUTS = {
+    "webservices.truckstop.com": httpx.Timeout(30.0, connect=5.0),
+    "api.directfreight.com": httpx.Timeout(20.0, connect=5.0),
+    "routes.googleapis.com": httpx.Timeout(10.0, connect=3.0),
+    "api.elevenlabs.io": httpx.Timeout(15.0, connect=3.0),
+    "api.anthropic.com": httpx.Timeout(30.0, connect=5.0),
+}
+
+def get_host_timeout(url: str) -> httpx.Timeout:
+    """Return the configured timeout for the host in the given URL"""
+    return HOST_TIMEOUTS.get(urlsplit(url).hostname or "", DEFAULT_TIMEOUT)
+
+class SharedHttpClient:
+    """
+    App-wide pooled httpx.AsyncClient.
+    Started and closed by the FastAPI lifespan in app/main.py, lazily created
+    when used outside the app (scripts, benchmarks).
+    """
+
+    def __init__(self, limits: httpx.Limits = POOL_LIMITS):
+        self.limits = limits
+        self._client: Optional[httpx.AsyncClient] = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.saturated_requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+
+    async def start(self):
+        """Create the pooled client"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=self.limits,
+                timeout=DEFAULT_TIMEOUT
+            )
+            print(f"[HTTP] Shared client started (http2={HTTP2_AVAILABLE}, max_connections={self.limits.max_connections})")
+
+    async def close(self):
+        """Close the pooled client and all keep-alive connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            print("[HTTP] Shared client closed")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=self.limits,
+                timeout=DEFAULT_TIMEOUT
+            )
+        return self._client
+
+    def _begin(self):
+        self.total_requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        if self.limits.max_connections and self.in_flight > self.limits.max_connections:
+            # Request has to queue for a free connection
+            self.saturated_requests += 1
+
+    def _end(self, start_time: float):
+        self.in_flight -= 1
+        self.total_time += time.perf_counter() - start_time
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool using the per-host timeout"""
+        kwargs.setdefault("timeout", get_host_timeout(url))
+        start_time = time.perf_counter()
+        self._begin()
+        try:
+            return await self.client.request(method, url, **kwargs)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._end(start_time)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    def stream(self, method: str, url: str, **kwargs):
+        """Streaming request through the shared pool, used as `async with`"""
+        kwargs.setdefault("timeout", get_host_timeout(url))
+        return _TrackedStream(self, self.client.stream(method, url, **kwargs))
+
+    def stats(self) -> Dict[str, object]:
+        """Pool saturation metrics"""
+        connections = []
+        if self._client is not None:
+            try:
+                connections = self._client._transport._pool.connections
+            except AttributeError:
+                connections = []
+        idle = sum(1 for conn in connections if conn.is_idle())
+        max_connections = self.limits.max_connections or 0
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "started": self._client is not None,
+            "max_connections": max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "pool_utilization": round(self.in_flight / max_connections, 3) if max_connections else 0.0,
+            "total_requests": self.total_requests,
+            "saturated_requests": self.saturated_requests,
+            "errors": self.errors,
+            "avg_request_time": round(self.total_time / self.total_requests, 4) if self.total_requests else 0.0,
+        }
+
+class _TrackedStream:
+    """Wraps client.stream() so streamed requests count towards pool metrics"""
+
+    def __init__(self, owner: SharedHttpClient, stream_ctx):
+        self.owner = owner
+        self.stream_ctx = stream_ctx
+        self.start_time = 0.0
+
+    async def __aenter__(self) -> httpx.Response:
+        self.start_time = time.perf_counter()
+        self.owner._begin()
+        try:
+            return await self.stream_ctx.__aenter__()
+        except Exception:
+            self.owner.errors += 1
+            self.owner._end(self.start_time)
+            raise
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            return await self.stream_ctx.__aexit__(exc_type, exc, tb)
+        finally:
+            if exc_type is not None:
+                self.owner.errors += 1
+            self.owner._end(self.start_time)
+
+# Create a singleton instance
+shared_http_client = SharedHttpClient()
@@ -0,0 +1,114 @@
+import re
+from typing import Dict, List, Optional, Set
+
+# Intents in priority order: when an utterance matches several, the earlier one wins.
+# Whole-utterance intents only fire when the phrase is everything the caller said.
+INTENT_PHRASES: Dict[str, Dict[str, object]] = {
+    "greeting": {
+        "whole_utterance": True,
+        "phrases": ["hi", "hello", "hey", "start", "begin", "hi there"],
+    },
+    "quit": {
+        "whole_utterance": True,
+        "phrases": ["quit", "exit", "stop", "end", "goodbye", "bye"],
+    },
+    "delete_load": {
+        "phrases": [
+            "remove that load", "delete that load", "cancel that load",
+            "remove the load", "delete the load", "cancel the load",
+            "remove it", "delete it", "cancel it", "take it off",
+            "remove this load", "delete this load", "cancel this load",
+        ],
+    },
+    "next_load": {
+        "phrases": [
+            "next load", "another load", "different load", "what else",
+            "other loads", "show more", "more loads", "what other",
+            "got anything else", "other options",
+        ],
+    },
+    # Explicit booking beats a sign-off in the same breath ("thanks, book it")
+    "book_load": {
+        "phrases": [
+            "book it", "lets book", "book this", "get it booked", "take it",
+            "ill take it", "book that", "get me booked", "ill take that",
+            "go ahead", "do it", "lets do it", "lets go with that",
+        ],
+    },
+    "end_call": {
+        "phrases": [
+            "thats it", "thanks", "thank you", "bye", "goodbye", "done",
+            "thats all", "have a good day", "see you", "take care",
+        ],
+    },
+    # Bare agreement only books when nothing above matched ("great, thanks, bye" ends the call)
+    "confirm": {
+        "phrases": [
+            "sounds good", "yes", "yeah", "sure", "okay", "ok", "great", "perfect",
+            "that works", "thatll work", "yes please", "thats good", "that sounds good",
+            "thatll be great", "thats great", "ill be great", "thats perfect",
+        ],
+    },
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+_TERMINAL = ""
+
+def utterance_words(text: str) -> List[str]:
+    """Lowercased words with apostrophes dropped ("That's it!" -> ["thats", "it"])"""
+    return _WORD.findall((text or "").lower().replace("'", "").replace("’", ""))
+
+class IntentClassifier:
+    """
+    Word-level phrase trie over every intent phrase, so an utterance is
+    tokenized once and scanned once, taking the longest phrase at each word.
+    Phrases match whole words ("ok" doesn't fire inside "book", "yes" not
+    inside "yesterday").
+    """
+
+    def __init__(self, intents: Dict[str, Dict[str, object]] = INTENT_PHRASES):
+        self.priority = list(intents)
+        self.rank = {name: rank for rank, name in enumerate(self.priority)}
+        self.trie: Dict[str, dict] = {}
+        self.whole: Dict[str, str] = {}
+        for name, spec in intents.items():
+            for phrase in spec["phrases"]:
+                words = utterance_words(phrase)
+                if spec.get("whole_utterance"):
+                    self.whole.setdefault(" ".join(words), name)
+                    continue
+                node = self.trie
+                for word in words:
+                    node = node.setdefault(word, {})
+                # A phrase listed under two intents keeps the higher-priority one
+                node.setdefault(_TERMINAL, name)
+
+    def intents(self, text: str) -> List[str]:
+        """All intents present in the utterance, highest priority first"""
+        words = utterance_words(text)
+        found = set()
+        whole = self.whole.get(" ".join(words))
+        if whole:
+            found.add(whole)
+        trie = self.trie
+        for i, word in enumerate(words):
+            node = trie.get(word)
+            longest = None
+            j = i + 1
+            while node is not None:
+                longest = node.get(_TERMINAL, longest)
+                node = node.get(words[j]) if j < len(words) else None
+                j += 1
+            if longest:
+                found.add(longest)
+        return sorted(found, key=self.rank.__getitem__)
+
+    def classify(self, text: str, allowed: Optional[Set[str]] = None) -> Optional[str]:
+        """Highest-priority intent in the utterance, optionally limited to the ones valid right now"""
+        for name in self.intents(text):
+            if allowed is None or name in allowed:
+                return name
+        return None
+
+# Create a singleton instance
+intent_classifier = IntentClassifier()
@@ -0,0 +1,145 @@
+import os
+import time
+from typing import AsyncIterator, Dict, Optional
+import anthropic
+from dotenv import load_dotenv
+from app.services.http_client import get_host_timeout
+
+load_dotenv()
+
+DEFAULT_MODEL = "claude-3-haiku-20240307"
+# Retries are handled by the SDK (exponential backoff on 429/5xx/connection errors)
+LLM_MAX_RETRIES = 2
+
+class SharedLLMClient:
+    """
+    Process-wide AsyncAnthropic client so every agent turn reuses one
+    connection pool instead of blocking the event loop on the sync SDK.
+    One underlying client per API key, normally just the configured one.
+    """
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._clients: Dict[str, anthropic.AsyncAnthropic] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.streams = 0
+        self.first_token_time = 0.0
+
+    def client_for(self, api_key: Optional[str] = None) -> anthropic.AsyncAnthropic:
+        key = api_key or self.api_key or os.getenv("CLAUDE_API_KEY")
+        if not key:
+            raise ValueError("No Anthropic API key configured")
+        client = self._clients.get(key)
+        if client is None:
+            client = anthropic.AsyncAnthropic(
+                api_key=key,
+                timeout=get_host_timeout("https://api.anthropic.com"),
+                max_retries=LLM_MAX_RETRIES
+            )
+            self._clients[key] = client
+        return client
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        model: str = DEFAULT_MODEL,
+        system: Optional[str] = None,
+        api_key: Optional[str] = None
+    ) -> str:
+        """Single-turn completion; returns the text of the first content block"""
+        kwargs = {"system": system} if system else {}
+        start_time = time.perf_counter()
+        self.total_requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await self.client_for(api_key).messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+                **kwargs
+            )
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_time += time.perf_counter() - start_time
+
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.input_tokens += usage.input_tokens
+            self.output_tokens += usage.output_tokens
+        return response.content[0].text
+
+    async def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        model: str = DEFAULT_MODEL,
+        system: Optional[str] = None,
+        api_key: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Single-turn completion, yielding text deltas as they arrive"""
+        kwargs = {"system": system} if system else {}
+        start_time = time.perf_counter()
+        first_token = True
+        self.total_requests += 1
+        self.streams += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            async with self.client_for(api_key).messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+                **kwargs
+            ) as stream:
+                async for text in stream.text_stream:
+                    if first_token:
+                        self.first_token_time += time.perf_counter() - start_time
+                        first_token = False
+                    yield text
+                message = await stream.get_final_message()
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_time += time.perf_counter() - start_time
+
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            self.input_tokens += usage.input_tokens
+            self.output_tokens += usage.output_tokens
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.close()
+        if self._clients:
+            print("[LLM] Shared client closed")
+        self._clients = {}
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "clients": len(self._clients),
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "total_requests": self.total_requests,
+            "errors": self.errors,
+            "avg_request_time": round(self.total_time / self.total_requests, 4) if self.total_requests else 0.0,
+            "streams": self.streams,
+            "avg_time_to_first_token": round(self.first_token_time / self.streams, 4) if self.streams else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+# Create a singleton instance
+shared_llm_client = SharedLLMClient()
@@ -1,10 +1,14 @@
-from typing import List
+from typing import AsyncIterator, List, Tuple
+import asyncio
 from datetime import datetime
-import xml.etree.ElementTree as ET
-import httpx
 from app.models.load import LoadSearchRequest, LoadResponse, LoadSearchResponse
-from app.services.load_service import find_best_loads
+from app.services.load_service import find_best_loads_async
 from app.services.load_service import find_distance
+from app.services.http_client import shared_http_client
+from app.services.truckstop_parser import TruckstopLoadDecoder
+from app.services.scoring import score_truckstop_loads
+from app.services.search_cache import search_result_cache
+from app.services.provider_budget import BudgetExhausted, provider_budgets
 from functools import lru_cache
 
 # Truckstop API Configuration
@@ -19,6 +23,14 @@ TRUCKSTOP_CONFIG = {
     }
 }
 
+# Paging for GetMultipleLoadDetailResults - later pages are fetched concurrently
+TRUCKSTOP_PAGING = {
+    "PAGE_SIZE": 200,
+    "MAX_PAGES": 5,
+    "MAX_RESULTS": 1000,
+    "MAX_CONCURRENT_PAGES": 3
+}
+
 # Equipment type mapping for Truckstop API
 EQUIPMENT_TYPE_MAP = {
     "V": "V",  # Van
@@ -38,41 +50,200 @@ EQUIPMENT_TYPE_MAP = {
 }
 
 async def search_loads(search_params: LoadSearchRequest) -> LoadSearchResponse:
-    """Search for loads based on the provided parameters"""
+    """Search for loads based on the provided parameters, served from the lane cache when possible"""
+    # Checked before the cache so a search without one can't be served another integration's loads
+    if search_params.data_source != "direct_freight" and not search_params.user_integration_id:
+        raise ValueError("Truckstop integration ID is required")
     try:
-        loads = []
-        if search_params.data_source == "direct_freight":
-            print("[API] Using DirectFreight API")
-            loads = find_best_loads(
-                start_city=search_params.origin_city,
-                start_state=search_params.origin_state,
-                dest_city=search_params.destination_city,
-                dest_state=search_params.destination_state,
-                max_weight=search_params.max_weight,
-                truck_type=search_params.truck_type,
-                ship_date=search_params.ship_date
-            )
-        else:
-            print("[API] Using Truckstop API")
-            loads = await truckstop_search(
-                origin_city=search_params.origin_city,
-                origin_state=search_params.origin_state,
-                destination_city=search_params.destination_city,
-                destination_state=search_params.destination_state,
-                max_weight=search_params.max_weight,
-                truck_type=search_params.truck_type,
-                ship_date=search_params.ship_date,
-                origin_range=search_params.origin_range,
-                destination_range=search_params.destination_range,
-                user_integration_id=search_params.user_integration_id
-            )
-        
-        print(f"[API] Found {len(loads)} loads")
-        return LoadSearchResponse(loads=loads)
+        loads, cache_age = await search_result_cache.get_or_fetch(search_params, fetch_search_results)
+        if cache_age is not None:
+            print(f"[API] Found {len(loads)} loads (cached {cache_age:.0f}s ago)")
+        return LoadSearchResponse(
+            loads=loads,
+            from_cache=cache_age is not None,
+            cache_age_seconds=cache_age
+        )
     except Exception as e:
         print(f"[API ERROR] Error searching loads: {str(e)}")
         raise
 
+async def fetch_search_results(search_params: LoadSearchRequest) -> List[LoadResponse]:
+    """Query the load board for a search, bypassing the cache"""
+    loads = []
+    if search_params.data_source == "direct_freight":
+        print("[API] Using DirectFreight API")
+        loads = await find_best_loads_async(
+            start_city=search_params.origin_city,
+            start_state=search_params.origin_state,
+            dest_city=search_params.destination_city,
+            dest_state=search_params.destination_state,
+            max_weight=search_params.max_weight,
+            truck_type=search_params.truck_type,
+            ship_date=search_params.ship_date
+        )
+    else:
+        print("[API] Using Truckstop API")
+        loads = await truckstop_search(
+            origin_city=search_params.origin_city,
+            origin_state=search_params.origin_state,
+            destination_city=search_params.destination_city,
+            destination_state=search_params.destination_state,
+            max_weight=search_params.max_weight,
+            truck_type=search_params.truck_type,
+            ship_date=search_params.ship_date,
+            origin_range=search_params.origin_range,
+            destination_range=search_params.destination_range,
+            user_integration_id=search_params.user_integration_id
+        )
+    
+    print(f"[API] Found {len(loads)} loads")
+    # DirectFreight returns plain dicts
+    return [load if isinstance(load, LoadResponse) else LoadResponse(**load) for load in loads]
+
+async def fetch_truckstop_page(
+    search_kwargs: dict,
+    page_number: int,
+    page_size: int,
+    target_date: str
+) -> Tuple[List[LoadResponse], int]:
+    """
+    Fetch and decode one page of Truckstop results.
+    Returns the date-matched loads and the raw number of results on the page.
+    """
+    soap_envelope = create_truckstop_soap_request(
+        page_number=page_number,
+        page_size=page_size,
+        **search_kwargs
+    )
+
+    loads = []
+    # Stream the response through the incremental decoder so loads are
+    # built while the body is still arriving
+    decoder = TruckstopLoadDecoder()
+    provider_budgets["truckstop"].spend()
+    async with shared_http_client.stream(
+        "POST",
+        TRUCKSTOP_CONFIG["BASE_URL"],
+        content=soap_envelope,
+        headers=TRUCKSTOP_CONFIG["HEADERS"]
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            error_msg = f"Truckstop API returned status code {response.status_code}"
+            print(f"[API ERROR] {error_msg}")
+            print(response.text)
+            raise ValueError(error_msg)
+
+        async for chunk in response.aiter_bytes():
+            loads.extend(await convert_truckstop_loads(decoder.feed(chunk), target_date))
+    loads.extend(await convert_truckstop_loads(decoder.close(), target_date))
+
+    print(f"\n[TRUCKSTOP] Found {decoder.count} load results in XML (page {page_number})\n")
+    return loads, decoder.count
+
+async def iter_truckstop_pages(
+    origin_city: str,
+    origin_state: str,
+    destination_city: str = "",
+    destination_state: str = "",
+    max_weight: int = 45000,
+    truck_type: str = "V",
+    ship_date: str = "2025-06-05",
+    origin_range: int = 100,
+    destination_range: int = 100,
+    user_integration_id: str = None,
+    max_results: int = TRUCKSTOP_PAGING["MAX_RESULTS"]
+) -> AsyncIterator[List[LoadResponse]]:
+    """
+    Yield batches of new (de-duplicated by ID) Truckstop loads as pages arrive.
+    Page 0 is fetched on its own so the first batch arrives as fast as a
+    single-page search; if it comes back full, the remaining pages up to
+    max_results are fetched concurrently.
+    """
+    if not user_integration_id:
+        raise ValueError("Truckstop integration ID is required")
+
+    search_kwargs = dict(
+        origin_city=origin_city,
+        origin_state=origin_state,
+        destination_city=destination_city,
+        destination_state=destination_state,
+        max_weight=max_weight,
+        truck_type=truck_type,
+        ship_date=ship_date,
+        origin_range=origin_range,
+        destination_range=destination_range,
+        user_integration_id=user_integration_id
+    )
+    page_size = TRUCKSTOP_PAGING["PAGE_SIZE"]
+    target_date = ship_date
+    print(f"[TRUCKSTOP] Filtering for exact date match: {target_date}")
+
+    seen_ids = set()
+    remaining = max_results
+
+    def take_new(loads: List[LoadResponse]) -> List[LoadResponse]:
+        nonlocal remaining
+        new_loads = []
+        for load in loads:
+            if remaining <= 0:
+                break
+            if load.id and load.id in seen_ids:
+                continue
+            seen_ids.add(load.id)
+            new_loads.append(load)
+            remaining -= 1
+        return new_loads
+
+    first_loads, first_count = await fetch_truckstop_page(search_kwargs, 0, page_size, target_date)
+    batch = take_new(first_loads)
+    if batch:
+        yield batch
+
+    max_pages = min(TRUCKSTOP_PAGING["MAX_PAGES"], -(-max_results // page_size))
+    if first_count < page_size or max_pages <= 1 or remaining <= 0:
+        return
+
+    print(f"[TRUCKSTOP] Page 0 was full, fetching pages 1-{max_pages - 1} concurrently")
+    semaphore = asyncio.Semaphore(TRUCKSTOP_PAGING["MAX_CONCURRENT_PAGES"])
+
+    async def fetch_page(page_number: int):
+        async with semaphore:
+            loads, count = await fetch_truckstop_page(search_kwargs, page_number, page_size, target_date)
+            return page_number, loads, count
+
+    tasks = {page: asyncio.create_task(fetch_page(page)) for page in range(1, max_pages)}
+    pending = set(tasks.values())
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    continue
+                if isinstance(task.exception(), BudgetExhausted):
+                    # A background search out of budget; its partial results mustn't be cached as the lane's loads
+                    raise task.exception()
+                if task.exception():
+                    print(f"[API ERROR] Error fetching Truckstop page: {str(task.exception())}")
+                    continue
+
+                page_number, loads, count = task.result()
+                if count < page_size:
+                    # Short page - nothing exists past it, drop the later requests
+                    for later_page, later_task in tasks.items():
+                        if later_page > page_number and not later_task.done():
+                            later_task.cancel()
+
+                batch = take_new(loads)
+                if batch:
+                    yield batch
+                if remaining <= 0:
+                    return
+    finally:
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+
 async def truckstop_search(
     origin_city: str,
     origin_state: str,
@@ -83,16 +254,13 @@ async def truckstop_search(
     ship_date: str = "2025-06-05",
     origin_range: int = 100,
     destination_range: int = 100,
-    user_integration_id: str = None
+    user_integration_id: str = None,
+    max_results: int = TRUCKSTOP_PAGING["MAX_RESULTS"]
 ) -> List[LoadResponse]:
     """Search for loads using the Truckstop API"""
     try:
-        # Check if integration ID is provided
-        if not user_integration_id:
-            raise ValueError("Truckstop integration ID is required")
-            
-        # Create SOAP request
-        soap_envelope = create_truckstop_soap_request(
+        loads = []
+        async for batch in iter_truckstop_pages(
             origin_city=origin_city,
             origin_state=origin_state,
             destination_city=destination_city,
@@ -102,133 +270,80 @@ async def truckstop_search(
             ship_date=ship_date,
             origin_range=origin_range,
             destination_range=destination_range,
-            user_integration_id=user_integration_id
-        )
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                TRUCKSTOP_CONFIG["BASE_URL"],
-                content=soap_envelope,
-                headers=TRUCKSTOP_CONFIG["HEADERS"]
-            )
-            
-        if response.status_code != 200:
-            error_msg = f"Truckstop API returned status code {response.status_code}"
-            print(f"[API ERROR] {error_msg}")
-            print(response.text)
-            raise ValueError(error_msg)
-            
-        # Parse XML response
-        root = ET.fromstring(response.text)
-        
-        namespaces = {
-            's': 'http://schemas.xmlsoap.org/soap/envelope/',
-            'a': 'http://schemas.datacontract.org/2004/07/WebServices.Objects',
-            'b': 'http://schemas.datacontract.org/2004/07/Truckstop2.Objects'
-        }
-        
-        load_results = root.findall('.//a:MultipleLoadDetailResult', namespaces)
-        print(f"\n[TRUCKSTOP] Found {len(load_results)} load results in XML\n")
-        
-        loads = []
-        target_date = ship_date
-        print(f"[TRUCKSTOP] Filtering for exact date match: {target_date}")
-        
-        for load in load_results:
-            try:
-                # Helper function to safely convert numeric values
-                def safe_float(value):
-                    if not value or value.isspace():
-                        return 0.0
-                    try:
-                        # Remove $ and , from currency strings
-                        if isinstance(value, str):
-                            value = value.replace('$', '').replace(',', '')
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return 0.0
-                
-                # Get pickup date for filtering
-                pickup_date = load.findtext('a:PickupDate', default='', namespaces=namespaces)
-                if not pickup_date:
-                    print(f"[TRUCKSTOP] Skipping load - no pickup date")
-                    continue
-                    
-                # Convert date to YYYY-MM-DD format if needed
-                try:
-                    if '/' in pickup_date:
-                        # Convert M/D/YY to YYYY-MM-DD
-                        dt = datetime.strptime(pickup_date, "%m/%d/%y")
-                        pickup_date = dt.strftime("%Y-%m-%d")
-                except Exception as e:
-                    print(f"[TRUCKSTOP] Error parsing date {pickup_date}: {e}")
-                    continue
-                    
-                # Skip if not exact date match
-                if pickup_date != target_date:
-                    print(f"[TRUCKSTOP] Skipping load - date mismatch: {pickup_date} != {target_date}")
-                    continue
-                
-                # Parse load details with safe conversion
-                load_dict = {
-                    'id': load.findtext('a:ID', default='', namespaces=namespaces),
-                    'origin_city': load.findtext('a:OriginCity', default='', namespaces=namespaces),
-                    'origin_state': load.findtext('a:OriginState', default='', namespaces=namespaces),
-                    'destination_city': load.findtext('a:DestinationCity', default='', namespaces=namespaces),
-                    'destination_state': load.findtext('a:DestinationState', default='', namespaces=namespaces),
-                    'length': safe_float(load.findtext('a:Length', default='0', namespaces=namespaces)),
-                    'weight': safe_float(load.findtext('a:Weight', default='0', namespaces=namespaces)),
-                    'distance': safe_float(load.findtext('a:Mileage', default='0', namespaces=namespaces)),
-                    'ship_date': pickup_date,
-                    'delivery_date': load.findtext('a:DeliveryDate', default='', namespaces=namespaces),
-                    'pickup_time': load.findtext('a:PickupTime', default='', namespaces=namespaces),
-                    'delivery_time': load.findtext('a:DeliveryTime', default='', namespaces=namespaces),
-                    'destination_distance': safe_float(load.findtext('a:DestinationDistance', default='0', namespaces=namespaces)),
-                    'origin_distance': safe_float(load.findtext('a:OriginDistance', default='0', namespaces=namespaces)),
-                    'contact_name': load.findtext('a:PointOfContact', default='', namespaces=namespaces),
-                    'contact_phone': load.findtext('a:PointOfContactPhone', default='', namespaces=namespaces),
-                    'contact_email': load.findtext('a:TruckCompanyEmail', default='', namespaces=namespaces),
-                    'equipment_type': load.findtext('a:Equipment', default='', namespaces=namespaces),
-                    'description': load.findtext('a:SpecInfo', default='', namespaces=namespaces),
-                    'age': safe_float(load.findtext('a:Age', default='0', namespaces=namespaces)),
-                    'stops': safe_float(load.findtext('a:Stops', default='0', namespaces=namespaces)),
-                    'credit_rating': load.findtext('a:Credit', default='', namespaces=namespaces),
-                    'payment': safe_float(load.findtext('a:PaymentAmount', default='0', namespaces=namespaces)),
-                    'data_source': 'truckstop'
-                }
-                
-                # Calculate rate per mile from payment amount
-                distance = safe_float(load.findtext('a:Mileage', default='0', namespaces=namespaces))
-                payment = safe_float(load.findtext('a:PaymentAmount', default='0', namespaces=namespaces))
-
-                
-                if distance > 0 and payment > 0:
-                    load_dict['rate_per_mile_est'] = payment / distance
-                    print(f"[API] Load {load_dict['id']}: Payment=${payment:.2f}, Distance={distance} miles, Rate=${load_dict['rate_per_mile_est']:.2f}/mile")
-                else:
-                    load_dict['rate_per_mile_est'] = 0.0
-                    print(f"[API] Load {load_dict['id']}: Could not calculate rate. Payment=${payment:.2f}, Distance={distance} miles")
-                load_dict['deadhead_miles'] = load_dict['origin_distance'] + load_dict['destination_distance'] # leg 1/3 deadhead only
-                # Calculate load score
-                load_dict['score'] = await calculate_load_score(load_dict)
-                print(f"[API] Load {load_dict['id']}: Score={load_dict['score']:.2f}")
-                
-                loads.append(LoadResponse(**load_dict))
-                
-            except Exception as e:
-                print(f"[API ERROR] Error parsing load: {str(e)}")
-                continue
-        
+            user_integration_id=user_integration_id,
+            max_results=max_results
+        ):
+            loads.extend(batch)
+
         # Sort loads by score in descending order
         loads.sort(key=lambda x: x.score, reverse=True)
         
-        print(f"[API] Found {len(loads)} loads from Truckstop matching exact date {target_date}")
+        print(f"[API] Found {len(loads)} loads from Truckstop matching exact date {ship_date}")
         return loads
             
     except Exception as e:
         print(f"[API ERROR] Error searching Truckstop loads: {str(e)}")
         raise
 
+async def convert_truckstop_loads(raw_loads: List[dict], target_date: str) -> List[LoadResponse]:
+    """Filter decoded Truckstop loads to the target date and turn them into scored LoadResponses"""
+    load_dicts = []
+    for load_dict in raw_loads:
+        try:
+            # Get pickup date for filtering
+            pickup_date = load_dict['ship_date']
+            if not pickup_date:
+                print(f"[TRUCKSTOP] Skipping load - no pickup date")
+                continue
+
+            # Convert date to YYYY-MM-DD format if needed
+            try:
+                if '/' in pickup_date:
+                    # Convert M/D/YY to YYYY-MM-DD
+                    dt = datetime.strptime(pickup_date, "%m/%d/%y")
+                    pickup_date = dt.strftime("%Y-%m-%d")
+            except Exception as e:
+                print(f"[TRUCKSTOP] Error parsing date {pickup_date}: {e}")
+                continue
+
+            # Skip if not exact date match
+            if pickup_date != target_date:
+                print(f"[TRUCKSTOP] Skipping load - date mismatch: {pickup_date} != {target_date}")
+                continue
+
+            load_dict['ship_date'] = pickup_date
+            load_dict['data_source'] = 'truckstop'
+
+            # Calculate rate per mile from payment amount
+            distance = load_dict['distance']
+            payment = load_dict['payment']
+
+            if distance > 0 and payment > 0:
+                load_dict['rate_per_mile_est'] = payment / distance
+                print(f"[API] Load {load_dict['id']}: Payment=${payment:.2f}, Distance={distance} miles, Rate=${load_dict['rate_per_mile_est']:.2f}/mile")
+            else:
+                load_dict['rate_per_mile_est'] = 0.0
+                print(f"[API] Load {load_dict['id']}: Could not calculate rate. Payment=${payment:.2f}, Distance={distance} miles")
+            load_dict['deadhead_miles'] = load_dict['origin_distance'] + load_dict['destination_distance'] # leg 1/3 deadhead only
+            load_dicts.append(load_dict)
+
+        except Exception as e:
+            print(f"[API ERROR] Error parsing load: {str(e)}")
+            continue
+
+    # Score the whole page in one vectorized call
+    scores = score_truckstop_loads(load_dicts)
+    loads = []
+    for load_dict, score in zip(load_dicts, scores):
+        load_dict['score'] = float(score)
+        try:
+            loads.append(LoadResponse(**load_dict))
+        except Exception as e:
+            print(f"[API ERROR] Error parsing load: {str(e)}")
+    if loads:
+        print(f"[API] Scored {len(loads)} Truckstop loads, best {max(load.score for load in loads):.2f}")
+    return loads
+
 def create_truckstop_soap_request(
     origin_city: str,
     origin_state: str,
@@ -239,7 +354,9 @@ def create_truckstop_soap_request(
     ship_date: str = "2025-06-05",
     origin_range: int = 100,
     destination_range: int = 100,
-    user_integration_id: str = None
+    user_integration_id: str = None,
+    page_number: int = 0,
+    page_size: int = TRUCKSTOP_PAGING["PAGE_SIZE"]
 ) -> str:
     """Create SOAP envelope for Truckstop API request"""
     # Map equipment type
@@ -279,8 +396,8 @@ def create_truckstop_soap_request(
                             <web1:OriginCountry>usa</web1:OriginCountry>
                     <web1:OriginRange>{origin_range}</web1:OriginRange>
                     <web1:OriginState>{origin_state}</web1:OriginState>
-                            <web1:PageNumber>0</web1:PageNumber>
-                            <web1:PageSize>200</web1:PageSize>
+                            <web1:PageNumber>{page_number}</web1:PageNumber>
+                            <web1:PageSize>{page_size}</web1:PageSize>
                     <web1:PickupDate>{pickup_date}</web1:PickupDate>
                             <web1:SortBy>Age</web1:SortBy>
                             <web1:SortDescending>false</web1:SortDescending>
@@ -293,63 +410,7 @@ def create_truckstop_soap_request(
 
     print(f"[API] Created SOAP request for {origin_city}, {origin_state} to {destination_city}, {destination_state}")
     print(f"[API] Equipment type: {equipment_type}, Max weight: {max_weight}")
-    print(f"[API] Exact pickup date: {pickup_date}")
+    print(f"[API] Exact pickup date: {pickup_date}, page {page_number} (size {page_size})")
     print(f"[API] Using integration ID: {user_integration_id}")
     
     return soap_envelope
-
-async def calculate_load_score(load_data: dict) -> float:
-    """
-    Calculate a score for a load based on various factors.
-    Returns a score between 0 and 1, with 0 for loads missing rates.
-    """
-    try:
-        # Check if rate is missing or zero - rank these loads at the bottom
-        rate = load_data.get('rate_per_mile_est', 0)
-        if not rate or rate <= 0:
-            print(f"[API] Load {load_data.get('id', 'unknown')}: No rate or zero rate - ranking at bottom")
-            return 0.0
-            
-        score = 0.0
-        
-        # Factor 1: Rate per mile (higher is better) - 45% weight
-        rate_score = min(rate / 5.0, 1.0)  # Normalize to 0-1, assuming $5/mile is excellent
-        score += rate_score * 0.45
-        
-        # Factor 2: Distance (prefer medium-range loads) - 25% weight
-        distance = load_data.get('distance', 0)
-        if distance > 0:
-            # Score peaks at 500 miles, falls off for shorter or longer
-            distance_score = 1.0 - abs(distance - 500) / 1000
-            distance_score = max(0, min(distance_score, 1))  # Clamp between 0 and 1
-            score += distance_score * 0.25
-        
-        # Factor 3: Age of posting (newer is better) - 15% weight
-        if load_data.get('age', 0) > 0:
-            age_score = 1.0 - min(load_data['age'] / 48, 1)  # Normalize to 0-1, 48 hours old = 0
-            score += age_score * 0.15
-        
-        # Factor 4: Number of stops (fewer is better) - 5% weight
-        if load_data.get('stops') is not None:
-            stops_score = 1.0 - min(load_data['stops'] / 3, 1)  # 0 stops = 1.0, 3+ stops = 0
-            score += stops_score * 0.05
-
-        # Factor 5: Deadhead miles (less is better) - 10% weight
-        deadhead_miles = load_data.get('deadhead_miles', 0)
-        # Normalize: 0 miles = 1.0, 300+ miles = 0.0
-        deadhead_score = 1.0 - min(deadhead_miles / 300, 1.0)
-        score += deadhead_score * 0.10
-
-        print(f"[API] Load {load_data.get('id', 'unknown')} score breakdown:")
-        print(f"  Rate: ${rate}/mile -> Score contribution: {rate_score * 0.45:.2f}")
-        print(f"  Distance: {distance} miles -> Score contribution: {distance_score * 0.25:.2f}")
-        print(f"  Age: {load_data.get('age', 0)} hours -> Score contribution: {age_score * 0.15:.2f}")
-        print(f"  Stops: {load_data.get('stops', 0)} -> Score contribution: {stops_score * 0.05:.2f}")
-        print(f"  Deadhead miles: {deadhead_miles} -> Score contribution: {deadhead_score * 0.10:.2f}")
-        print(f"  Final score: {score:.2f}")
-        
-        return min(max(score, 0), 1)  # Ensure final score is between 0 and 1
-
-    except Exception as e:
-        print(f"[API WARNING] Error calculating score: {str(e)}")
-        return 0.0  # Return 0 on error to rank at bottom
\ No newline at end of file
@@ -1,38 +1,34 @@
-import http.client
+import asyncio
 import json
 import os
 import time
 from typing import List, Optional
 import geopy.distance
-from geopy.geocoders import Nominatim
 from dotenv import load_dotenv
 from datetime import datetime
-from functools import lru_cache
+from app.services.http_client import SharedHttpClient, shared_http_client
+from app.services.geocoding_service import geocode
+from app.services.scoring import score_direct_freight_loads
+from app.services.provider_budget import BudgetExhausted, provider_budgets
+from app.services.ranking import top_k_indices
 
 # Load API token from environment variables
 load_dotenv()
 API_TOKEN = os.getenv("DIRECT_FREIGHT_API_TOKEN", "42b0866391150f615ae603d97015920ba0e72ef7")
-geolocator = Nominatim(user_agent="skywaze_app")
-
-@lru_cache(maxsize=500)
-def geocode_cached(city_state):
-    return geolocator.geocode(city_state)
 
 def find_distance(start_city: str, start_state: str, dest_city: str, dest_state: str) -> Optional[float]:
     """
-    Finds the distance between two cities using the geopy library
+    Finds the distance between two cities using the geopy library.
+    Coordinates come from the bundled gazetteer, falling back to Nominatim on a miss.
     """
     try:
         print(f"[DISTANCE] Finding distance from {start_city}, {start_state} to {dest_city}, {dest_state}")
         start_time = time.time()
-        start_location = geocode_cached(f"{start_city}, {start_state}")
-        dest_location = geocode_cached(f"{dest_city}, {dest_state}")
+        start_location = geocode(start_city, start_state)
+        dest_location = geocode(dest_city, dest_state)
 
         if start_location and dest_location:
-            distance = geopy.distance.distance(
-                (start_location.latitude, start_location.longitude),
-                (dest_location.latitude, dest_location.longitude)
-            ).miles
+            distance = geopy.distance.distance(start_location, dest_location).miles
             
             elapsed = time.time() - start_time
             print(f"[DISTANCE] Found distance: {distance} miles (took {elapsed:.2f}s)")
@@ -44,18 +40,91 @@ def find_distance(start_city: str, start_state: str, dest_city: str, dest_state:
         print(f"[DISTANCE ERROR] Error finding distance: {e}")
         return None
 
-def find_loads(
+DIRECT_FREIGHT_CONFIG = {
+    "BASE_URL": "https://api.directfreight.com/v1/boards/loads",
+    "MAX_PAGES": 3,  # Limit to 3 pages for performance
+    "ITEM_COUNT": 50
+}
+
+def _direct_freight_headers() -> dict:
+    return {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+        "end-user-token": "01234567890abc",
+        "x-dont-update-user-last-date": "NO DEFAULT",
+        "api-token": API_TOKEN
+    }
+
+def _direct_freight_payload(
+    start_city: str,
+    start_state: str,
+    dest_city: str,
+    dest_state: str,
+    max_weight: int,
+    truck_types: List[str],
+    ship_date: str,
+    page_number: int
+) -> dict:
+    payload = {
+        "origin_city": start_city,
+        "origin_state": [start_state],
+        "origin_radius": 200,
+        "ship_date": [ship_date],
+        "max_weight": max_weight,
+        "trailer_type": truck_types,
+        "full_load": False,
+        "item_count": DIRECT_FREIGHT_CONFIG["ITEM_COUNT"],
+        "sort_parameter": "age",
+        "sort_direction": "asc",
+        "page_number": page_number
+    }
+    if dest_city:
+        payload.update({
+            "destination_city": dest_city,
+            "destination_state": [dest_state],
+            "destination_radius": 200
+        })
+    return payload
+
+async def fetch_direct_freight_page(http: SharedHttpClient, payload: dict) -> dict:
+    """POST one page of a DirectFreight board search and return the decoded response"""
+    page_number = payload["page_number"]
+    print(f"[DIRECT_FREIGHT] Requesting page {page_number+1}")
+    start_time = time.time()
+    provider_budgets["direct_freight"].spend()
+
+    response = await http.post(
+        DIRECT_FREIGHT_CONFIG["BASE_URL"],
+        content=json.dumps(payload),
+        headers=_direct_freight_headers()
+    )
+
+    elapsed = time.time() - start_time
+    print(f"[DIRECT_FREIGHT] Received response in {elapsed:.2f}s with status: {response.status_code}")
+
+    if response.status_code != 200:
+        print(f"[DIRECT_FREIGHT] Error response: {response.text}")
+
+    result = response.json()
+    print(f"[DIRECT_FREIGHT] Got {len(result.get('list', []))} loads from page {page_number+1}")
+    return result
+
+async def find_loads_async(
     start_city: str, 
     start_state: str, 
     dest_city: str = "", 
     dest_state: str = "", 
     max_weight: int = 45000, 
     truck_type: str = "V",
-    ship_date: str = "2023-04-20"
+    ship_date: str = "2023-04-20",
+    http: Optional[SharedHttpClient] = None
 ) -> List[dict]:
     """
-    Finds loads based on search criteria using the DirectFreight API
+    Finds loads based on search criteria using the DirectFreight API.
+    Page 1 tells us total_pages; pages 2..N are then fetched concurrently
+    over the shared connection pool.
     """
+    http = http or shared_http_client
     print(f"[DIRECT_FREIGHT] Searching for loads from {start_city}, {start_state} to {dest_city}, {dest_state}")
     print(f"[DIRECT_FREIGHT] Parameters: truck_type={truck_type}, max_weight={max_weight}, ship_date={ship_date}")
     
@@ -67,83 +136,79 @@ def find_loads(
         print(f"[DIRECT_FREIGHT] Invalid date format: {ship_date}, using default")
         ship_date = datetime.now().strftime("%Y-%m-%d")
     
-    all_results = []
-    page_number = 0
-    total_pages = 1  # placeholder to enter the loop
-    
     # Convert truck_type to list if it's a string
     truck_types = [truck_type] if isinstance(truck_type, str) else truck_type
-    
-    while page_number < total_pages and page_number < 3:  # Limit to 3 pages for performance
-        try:
-            print(f"[DIRECT_FREIGHT] Requesting page {page_number+1}")
-            start_time = time.time()
-            
-            conn = http.client.HTTPSConnection("api.directfreight.com")
-            payload = {
-                "origin_city": start_city,
-                "origin_state": [start_state],
-                "origin_radius": 200,
-                "ship_date": [ship_date],
-                "max_weight": max_weight,
-                "trailer_type": truck_types,
-                "full_load": False,
-                "item_count": 50,
-                "sort_parameter": "age",
-                "sort_direction": "asc",
-                "page_number": page_number
-            }
-
-            if dest_city:
-                print("[DIRECT_FREIGHT] Using origin-destination search payload")
-                payload.update({
-                    "destination_city": dest_city,
-                    "destination_state": [dest_state],
-                    "destination_radius": 200
-                })
-            else:
-                print("[DIRECT_FREIGHT] Using origin-only search payload")
-
-            headers = {
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-                "end-user-token": "01234567890abc",
-                "x-dont-update-user-last-date": "NO DEFAULT",
-                "api-token": API_TOKEN
-            }
-
-            print(f"[DIRECT_FREIGHT] Sending request to DirectFreight API with payload: {json.dumps(payload)}")
-            
-            conn.request("POST", "/v1/boards/loads", json.dumps(payload), headers)
-            
-            print("[DIRECT_FREIGHT] Waiting for response...")
-            res = conn.getresponse()
-            data = res.read()
-            conn.close()
 
-            elapsed = time.time() - start_time
-            print(f"[DIRECT_FREIGHT] Received response in {elapsed:.2f}s with status: {res.status}")
-            
-            if res.status != 200:
-                print(f"[DIRECT_FREIGHT] Error response: {data.decode('utf-8')}")
-                
-            response = json.loads(data.decode("utf-8"))
-            page_results = response.get("list", [])
-            
-            print(f"[DIRECT_FREIGHT] Got {len(page_results)} loads from page {page_number+1}")
-            all_results.extend(page_results)
+    if dest_city:
+        print("[DIRECT_FREIGHT] Using origin-destination search payload")
+    else:
+        print("[DIRECT_FREIGHT] Using origin-only search payload")
 
-            total_pages = response.get("total_pages", 1)
-            page_number += 1
-            
-        except Exception as e:
-            print(f"[DIRECT_FREIGHT ERROR] Error finding loads: {e}")
-            break
+    def payload_for(page_number: int) -> dict:
+        return _direct_freight_payload(
+            start_city, start_state, dest_city, dest_state,
+            max_weight, truck_types, ship_date, page_number
+        )
+
+    try:
+        first_page = await fetch_direct_freight_page(http, payload_for(0))
+    except BudgetExhausted:
+        raise
+    except Exception as e:
+        print(f"[DIRECT_FREIGHT ERROR] Error finding loads: {e}")
+        return []
+
+    all_results = list(first_page.get("list", []))
+    total_pages = min(first_page.get("total_pages", 1) or 1, DIRECT_FREIGHT_CONFIG["MAX_PAGES"])
+
+    if total_pages > 1:
+        print(f"[DIRECT_FREIGHT] Fetching pages 2-{total_pages} concurrently")
+        pages = await asyncio.gather(
+            *(fetch_direct_freight_page(http, payload_for(page)) for page in range(1, total_pages)),
+            return_exceptions=True
+        )
+        for page in pages:
+            if isinstance(page, BudgetExhausted):
+                raise page
+            if isinstance(page, Exception):
+                print(f"[DIRECT_FREIGHT ERROR] Error finding loads: {page}")
+                continue
+            all_results.extend(page.get("list", []))
 
     print(f"[DIRECT_FREIGHT] Completed search with {len(all_results)} total loads")
     return all_results
 
-def find_best_loads(
+def _run_sync(coro_fn, *args, **kwargs):
+    """
+    Run an async DirectFreight call from synchronous code.
+    Uses its own short-lived client because the shared pool belongs to the server's event loop.
+    """
+    async def runner():
+        http = SharedHttpClient()
+        try:
+            return await coro_fn(*args, http=http, **kwargs)
+        finally:
+            await http.close()
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(runner())
+    raise RuntimeError(f"{coro_fn.__name__[:-len('_async')]}() called from a running event loop - await {coro_fn.__name__}() instead")
+
+def find_loads(
+    start_city: str, 
+    start_state: str, 
+    dest_city: str = "", 
+    dest_state: str = "", 
+    max_weight: int = 45000, 
+    truck_type: str = "V",
+    ship_date: str = "2023-04-20"
+) -> List[dict]:
+    """Synchronous wrapper around find_loads_async for non-async callers"""
+    return _run_sync(find_loads_async, start_city, start_state, dest_city, dest_state, max_weight, truck_type, ship_date)
+
+async def find_best_loads_async(
     start_city: str, 
     start_state: str, 
     dest_city: str = "", 
@@ -152,7 +217,8 @@ def find_best_loads(
     truck_type: str = "V",
     ship_date: str = "2023-04-20",
     origin_city: str = None, 
-    origin_state: str = None
+    origin_state: str = None,
+    http: Optional[SharedHttpClient] = None
 ) -> List[dict]:
     """
     Finds the best loads for a given start city and destination city.
@@ -166,61 +232,42 @@ def find_best_loads(
     if not origin_state:
         origin_state = start_state
 
-    # Define weights for ranking criteria
-    length_weight = -0.2  # Less is better
-    weight_weight = -0.1  # Less is better
-    rate_weight = 0.4     # Higher is better
-    age_weight = -0.1     # Less is better
-    deadhead_weight = -0.2  # Less is better
-
-    loads = find_loads(start_city, start_state, dest_city, dest_state, max_weight, truck_type, ship_date)
+    loads = await find_loads_async(start_city, start_state, dest_city, dest_state, max_weight, truck_type, ship_date, http=http)
     
     if not loads:
         print("[BEST_LOADS] No loads found, returning empty list")
         return []
     
     print(f"[BEST_LOADS] Found {len(loads)} loads, applying ranking algorithm")
-        
-    # Extract values for normalization
-    lengths = [load.get("length", 0) or 0 for load in loads]
-    weights = [load.get("weight", 0) or 0 for load in loads]
-    pay_rates = [load.get("rate_per_mile_est", 0) or 0 for load in loads]
-    deadheads = [load.get("dead_head", 0) or 0 for load in loads]
-    ages = [load.get("age", 0) or 0 for load in loads]
-
-    # Compute min/max for normalization
-    min_len, max_len = min(lengths) if lengths else 0, max(lengths) if lengths else 1
-    min_wt, max_wt = min(weights) if weights else 0, max(weights) if weights else 1
-    min_rate, max_rate = min(pay_rates) if pay_rates else 0, max(pay_rates) if pay_rates else 1
-    min_dead, max_dead = min(deadheads) if deadheads else 0, max(deadheads) if deadheads else 1
-    min_age, max_age = min(ages) if ages else 0, max(ages) if ages else 1
-
-    def normalize(value, min_val, max_val):
-        if max_val == min_val:
-            return 0  # Avoid divide-by-zero; treat as neutral
-        return (value - min_val) / (max_val - min_val)
-    
-    criteria = [
-    ("length", length_weight, min_len, max_len),
-    ("weight", weight_weight, min_wt, max_wt),
-    ("rate_per_mile_est", rate_weight, min_rate, max_rate),
-    ("dead_head", deadhead_weight, min_dead, max_dead),
-    ("age", age_weight, min_age, max_age),
-]
-        
-    def score(load):
-        total = 0
-        for key, weight, min_val, max_val in criteria:
-            val = normalize(load.get(key, 0) or 0, min_val, max_val)
-            total += weight * val
-        load["score"] = round(total, 2) # Add the score to the load object
-        return total
-
-    # Sort loads by score in descending order
-    sorted_loads = sorted(loads, key=score, reverse=True)
-    
-    # Limit to top 10 results (changed from 20 back to 10 as requested)
-    result = sorted_loads[:10] if len(sorted_loads) > 10 else sorted_loads
+    result = rank_best_loads(loads)
     print(f"[BEST_LOADS] Returning top {len(result)} loads")
     
-    return result 
\ No newline at end of file
+    return result
+
+def rank_best_loads(loads: List[dict], k: int = 10) -> List[dict]:
+    """Score a batch of DirectFreight loads and return the best k, best first"""
+    # Score every load in one vectorized pass (weights in scoring.DIRECT_FREIGHT_RANK_WEIGHTS)
+    scores = score_direct_freight_loads(loads)
+    for load, score in zip(loads, scores):
+        load["score"] = round(float(score), 2) # Add the score to the load object
+
+    # Keep the top 10 results (changed from 20 back to 10 as requested) without sorting the rest
+    return [loads[i] for i in top_k_indices(scores, k)]
+
+def find_best_loads(
+    start_city: str, 
+    start_state: str, 
+    dest_city: str = "", 
+    dest_state: str = "", 
+    max_weight: int = 45000, 
+    truck_type: str = "V",
+    ship_date: str = "2023-04-20",
+    origin_city: str = None, 
+    origin_state: str = None
+) -> List[dict]:
+    """Synchronous wrapper around find_best_loads_async for non-async callers"""
+    return _run_sync(
+        find_best_loads_async,
+        start_city, start_state, dest_city, dest_state,
+        max_weight, truck_type, ship_date, origin_city, origin_state
+    )
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+# SQLite files live on local disk so every uvicorn worker on the machine shares them
+CACHE_DIR = os.getenv("SKYWAZE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "skywaze_cache"))
+
+class PersistentStore:
+    """
+    Small key/value table backed by a SQLite file.
+    Values are stored as blobs with the time they were written; callers decide
+    on serialization and freshness.
+    """
+
+    def __init__(self, name: str, path: Optional[str] = None):
+        self.name = name
+        self.path = path or os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            # WAL lets readers in other workers proceed while one worker writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[bytes, float]]:
+        """Return (value, updated_at) or None if missing or older than max_age seconds"""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value, updated_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"[STORE] Error reading {self.name}: {str(e)}")
+            return None
+        if row is None:
+            return None
+        if max_age is not None and time.time() - row[1] > max_age:
+            return None
+        return row[0], row[1]
+
+    def set(self, key: str, value: bytes, updated_at: Optional[float] = None):
+        """Insert or replace a value"""
+        try:
+            with self._lock:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO entries (key, value, updated_at) VALUES (?, ?, ?)",
+                    (key, value, updated_at if updated_at is not None else time.time())
+                )
+        except sqlite3.Error as e:
+            print(f"[STORE] Error writing {self.name}: {str(e)}")
+
+    def delete(self, key: str):
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            print(f"[STORE] Error deleting from {self.name}: {str(e)}")
+
+    def purge_older_than(self, max_age: float) -> int:
+        """Delete entries older than max_age seconds, returns the number removed"""
+        try:
+            with self._lock:
+                cursor = self._connect().execute(
+                    "DELETE FROM entries WHERE updated_at < ?", (time.time() - max_age,)
+                )
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"[STORE] Error purging {self.name}: {str(e)}")
+            return 0
+
+    def items(self) -> Iterator[Tuple[str, bytes, float]]:
+        """Snapshot of every (key, value, updated_at) row"""
+        try:
+            with self._lock:
+                rows = self._connect().execute("SELECT key, value, updated_at FROM entries").fetchall()
+        except sqlite3.Error as e:
+            print(f"[STORE] Error reading {self.name}: {str(e)}")
+            return iter(())
+        return iter(rows)
+
+    def count(self) -> int:
+        try:
+            with self._lock:
+                return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
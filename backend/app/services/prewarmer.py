@@ -0,0 +1,168 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from app.database import voice_preferences_collection, user_profiles_collection
+from app.models.load import LoadSearchRequest
+from app.services.load_search_service import fetch_search_results
+from app.services.provider_budget import BudgetExhausted, background_reserve, provider_budgets
+from app.services.search_cache import search_cache_key, search_result_cache
+
+PREWARM_CONFIG = {
+    "ENABLED": os.getenv("PREWARM_ENABLED", "true").lower() == "true",
+    "INTERVAL_SECONDS": int(os.getenv("PREWARM_INTERVAL", "120")),
+    "RECENT_LANE_WINDOW": 3600,   # re-warm DirectFreight lanes someone searched in the last hour
+    "INTEGRATION_LANE_WINDOW": 600,  # Truckstop lanes run on the searcher's integration ID: only shortly after their search
+    "MAX_UNHIT_REFRESHES": 2,     # stop warming a lane after this many refreshes nobody searched
+    "DAYS_AHEAD": 1,              # voice preference lanes: today and tomorrow
+    "MAX_LANES_PER_CYCLE": 50,
+    "BUDGET_RESERVE": 20,         # provider tokens always left for interactive traffic
+    "MAX_CONCURRENT": 2,
+}
+
+class LanePrewarmer:
+    """
+    Background task that keeps the search cache warm for lanes people are
+    likely to ask for: active voice preferences and recently searched lanes.
+    Only spends provider budget above BUDGET_RESERVE, checked on every page.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.stats_counters: Dict[str, int] = {
+            "cycles": 0,
+            "lanes_considered": 0,
+            "lanes_warmed": 0,
+            "skipped_fresh": 0,
+            "skipped_budget": 0,
+            "errors": 0,
+        }
+
+    async def start(self):
+        if not PREWARM_CONFIG["ENABLED"] or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        print(f"[PREWARM] Started, cycle every {PREWARM_CONFIG['INTERVAL_SECONDS']}s")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_cycle()
+            except Exception as e:
+                self.stats_counters["errors"] += 1
+                print(f"[PREWARM ERROR] Cycle failed: {str(e)}")
+            await asyncio.sleep(PREWARM_CONFIG["INTERVAL_SECONDS"])
+
+    async def voice_preference_lanes(self) -> List[LoadSearchRequest]:
+        """Origin-only lanes for every active voice preference, today through DAYS_AHEAD"""
+        preferences = await voice_preferences_collection.find({"is_active": True}).to_list(length=500)
+        preferences = [p for p in preferences if p.get("origin_city") and p.get("origin_state")]
+        if not preferences:
+            return []
+
+        profiles = await user_profiles_collection.find(
+            {"email": {"$in": [p["user_id"] for p in preferences]}},
+            {"email": 1, "truckstop_integration_id": 1}
+        ).to_list(length=500)
+        integration_ids = {p["email"]: p.get("truckstop_integration_id") for p in profiles}
+
+        today = datetime.now()
+        lanes = []
+        for preference in preferences:
+            integration_id = integration_ids.get(preference["user_id"])
+            for day in range(PREWARM_CONFIG["DAYS_AHEAD"] + 1):
+                lanes.append(LoadSearchRequest(
+                    origin_city=preference["origin_city"],
+                    origin_state=preference["origin_state"],
+                    truck_type=preference.get("truck_type") or "V",
+                    ship_date=(today + timedelta(days=day)).strftime("%Y-%m-%d"),
+                    # Truckstop needs the user's integration ID; fall back to DirectFreight without one
+                    data_source="truckstop" if integration_id else "direct_freight",
+                    user_integration_id=integration_id
+                ))
+        return lanes
+
+    async def collect_lanes(self) -> List[LoadSearchRequest]:
+        """Unique lanes to warm this cycle, recent searches first"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        lanes = [
+            lane for lane in search_result_cache.recent_searches(PREWARM_CONFIG["INTEGRATION_LANE_WINDOW"])
+            if lane.data_source != "direct_freight"
+        ] + [
+            lane for lane in search_result_cache.recent_searches(PREWARM_CONFIG["RECENT_LANE_WINDOW"])
+            if lane.data_source == "direct_freight"
+        ]
+        try:
+            lanes += await self.voice_preference_lanes()
+        except Exception as e:
+            print(f"[PREWARM ERROR] Could not read voice preferences: {str(e)}")
+
+        unique: Dict[str, LoadSearchRequest] = {}
+        for lane in lanes:
+            if lane.ship_date < today:
+                continue
+            unique.setdefault(search_cache_key(lane), lane)
+        return list(unique.values())[:PREWARM_CONFIG["MAX_LANES_PER_CYCLE"]]
+
+    async def run_cycle(self):
+        lanes = await self.collect_lanes()
+        self.stats_counters["cycles"] += 1
+        self.stats_counters["lanes_considered"] += len(lanes)
+        semaphore = asyncio.Semaphore(PREWARM_CONFIG["MAX_CONCURRENT"])
+
+        async def warm(lane: LoadSearchRequest):
+            async with semaphore:
+                budget = provider_budgets.get(lane.data_source or "truckstop")
+                if budget is not None and not budget.has_headroom(PREWARM_CONFIG["BUDGET_RESERVE"]):
+                    self.stats_counters["skipped_budget"] += 1
+                    return
+                # Every page the fetch makes stops at the reserve, not just this first check
+                reserve = background_reserve.set(PREWARM_CONFIG["BUDGET_RESERVE"])
+                try:
+                    # Only lanes that have gone stale are refetched; until then searches are served the stale entry
+                    warmed = await search_result_cache.warm(
+                        lane, fetch_search_results, max_unhit=PREWARM_CONFIG["MAX_UNHIT_REFRESHES"]
+                    )
+                except BudgetExhausted:
+                    self.stats_counters["skipped_budget"] += 1
+                    return
+                except Exception as e:
+                    self.stats_counters["errors"] += 1
+                    print(f"[PREWARM ERROR] {lane.origin_city}, {lane.origin_state} ({lane.truck_type}, {lane.ship_date}): {str(e)}")
+                    return
+                finally:
+                    background_reserve.reset(reserve)
+                self.stats_counters["lanes_warmed" if warmed else "skipped_fresh"] += 1
+
+        await asyncio.gather(*(warm(lane) for lane in lanes))
+        print(f"[PREWARM] Cycle {self.stats_counters['cycles']}: {len(lanes)} lanes, {self.stats_counters['lanes_warmed']} warmed so far")
+
+    def stats(self) -> Dict[str, object]:
+        counters = dict(self.stats_counters)
+        cache = search_result_cache.stats_counters
+        fetches = cache["prewarm_fetches"]
+        hits = cache["prewarm_hits"]
+        counters.update({
+            "running": self._task is not None and not self._task.done(),
+            "prewarm_fetches": fetches,
+            "prewarm_hits": hits,
+            # Searches answered from a pre-warmed entry per pre-warm fetch spent
+            "prewarm_hit_rate": round(hits / fetches, 3) if fetches else 0.0,
+            # Net board searches avoided: interactive searches served warm minus pre-warm searches made
+            "provider_calls_saved": hits - fetches,
+            "budgets": {name: bucket.stats() for name, bucket in provider_budgets.items()},
+        })
+        return counters
+
+# Create a singleton instance
+lane_prewarmer = LanePrewarmer()
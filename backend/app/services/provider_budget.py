@@ -0,0 +1,66 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Outbound requests per minute each load board gets from this process
+PROVIDER_BUDGETS = {
+    "truckstop": int(os.getenv("TRUCKSTOP_REQUESTS_PER_MINUTE", "60")),
+    "direct_freight": int(os.getenv("DIRECT_FREIGHT_REQUESTS_PER_MINUTE", "60")),
+}
+
+class BudgetExhausted(Exception):
+    """A background request would have spent tokens kept for interactive traffic"""
+
+# Set by background work (the pre-warmer) to the tokens it has to leave alone.
+# Checked on every request, so a multi-page search stops at the reserve
+# rather than only being checked before it starts.
+background_reserve: ContextVar[Optional[float]] = ContextVar("background_reserve", default=None)
+
+class TokenBucket:
+    """
+    Request budget refilled continuously at rate_per_minute, holding at most
+    one minute of burst. Interactive traffic always spends (the balance may go
+    negative); background work only runs while there is headroom.
+    """
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.spent = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def spend(self, cost: int = 1):
+        """
+        Record requests that are going out. Interactive traffic always goes out;
+        under background_reserve, BudgetExhausted is raised instead.
+        """
+        self._refill()
+        reserve = background_reserve.get()
+        if reserve is not None and self.tokens - cost < reserve:
+            raise BudgetExhausted(f"{self.tokens:.0f} tokens left, {reserve:.0f} reserved for interactive traffic")
+        self.tokens = max(-self.capacity, self.tokens - cost)
+        self.spent += cost
+
+    def has_headroom(self, reserve: float) -> bool:
+        """True while more than `reserve` tokens are left for interactive traffic"""
+        return self.available() > reserve
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "available": round(self.available(), 1),
+            "per_minute": self.capacity,
+            "spent": self.spent,
+        }
+
+provider_budgets: Dict[str, TokenBucket] = {name: TokenBucket(rate) for name, rate in PROVIDER_BUDGETS.items()}
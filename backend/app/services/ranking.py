@@ -0,0 +1,67 @@
+import heapq
+import itertools
+from typing import Generic, List, Optional, Tuple, TypeVar
+import numpy as np
+
+T = TypeVar("T")
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, without sorting the whole array.
+    Ties keep their original order, matching a stable descending sort.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        # argpartition picks an arbitrary subset of tied scores at the cut; take the earliest ones
+        cutoff = scores[candidates].min()
+        above = np.flatnonzero(scores > cutoff)
+        tied = np.flatnonzero(scores == cutoff)[:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(n)
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+class TopKAccumulator(Generic[T]):
+    """
+    Streaming top-K: keeps the best k (score, item) pairs seen so far in a min-heap.
+    Use accepts() before building an expensive item to skip ones that can't make the cut.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, int, T]] = []
+        # Earlier items win ties, like a stable sort
+        self._order = itertools.count(0, -1)
+        self.seen = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def threshold(self) -> Optional[float]:
+        """Score an item must beat once the accumulator is full"""
+        return self._heap[0][0] if len(self._heap) >= self.k else None
+
+    def accepts(self, score: float) -> bool:
+        if self.k <= 0:
+            return False
+        return len(self._heap) < self.k or score > self._heap[0][0]
+
+    def push(self, score: float, item: T) -> bool:
+        """Offer an item; returns whether it was kept"""
+        self.seen += 1
+        if not self.accepts(score):
+            return False
+        entry = (score, next(self._order), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heapreplace(self._heap, entry)
+        return True
+
+    def items(self) -> List[T]:
+        """Kept items, best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: (entry[0], entry[1]), reverse=True)]
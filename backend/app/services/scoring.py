@@ -0,0 +1,143 @@
+from typing import Dict, Iterable, List
+import numpy as np
+
+# Truckstop absolute score: weighted factors, each normalized to 0-1
+TRUCKSTOP_SCORE_WEIGHTS = {
+    "rate": 0.45,
+    "distance": 0.25,
+    "age": 0.15,
+    "stops": 0.05,
+    "deadhead": 0.10,
+}
+
+TRUCKSTOP_SCORE_SCALES = {
+    "EXCELLENT_RATE": 5.0,      # $/mile that earns the full rate score
+    "IDEAL_DISTANCE": 500,      # distance score peaks here...
+    "DISTANCE_FALLOFF": 1000,   # ...and reaches 0 this many miles away
+    "MAX_AGE_HOURS": 48,
+    "MAX_STOPS": 3,
+    "MAX_DEADHEAD": 300,
+}
+
+# DirectFreight relative ranking: min-max normalized columns, signed weights
+DIRECT_FREIGHT_RANK_WEIGHTS = {
+    "length": -0.2,             # Less is better
+    "weight": -0.1,             # Less is better
+    "rate_per_mile_est": 0.4,   # Higher is better
+    "dead_head": -0.2,          # Less is better
+    "age": -0.1,                # Less is better
+}
+
+# Backhaul pairs: miles driven per day and the bonus per dollar earned per day
+BACKHAUL_SCORE = {
+    "MILES_PER_DAY": 550,
+    "BASE_DAYS": 2,
+    "DAY_REVENUE_WEIGHT": 0.004,
+}
+
+def column(loads: List[dict], key: str, missing: float = 0.0) -> np.ndarray:
+    """One field of a list of load dicts as a float array; None and absent values become `missing`"""
+    values = (load.get(key) for load in loads)
+    return np.fromiter((missing if value is None else value for value in values), dtype=np.float64, count=len(loads))
+
+def columns(loads: List[dict], keys: Iterable[str], missing: float = 0.0) -> Dict[str, np.ndarray]:
+    """Columnar view of a batch of loads"""
+    return {key: column(loads, key, missing) for key in keys}
+
+def truckstop_scores(
+    rate: np.ndarray,
+    distance: np.ndarray,
+    age: np.ndarray,
+    stops: np.ndarray,
+    deadhead: np.ndarray
+) -> np.ndarray:
+    """
+    Absolute 0-1 score for a batch of Truckstop loads.
+    Loads without a rate score 0. A zero distance or NaN age/stops adds nothing
+    for that factor instead of failing the whole load.
+    """
+    w = TRUCKSTOP_SCORE_WEIGHTS
+    s = TRUCKSTOP_SCORE_SCALES
+
+    rate_score = np.minimum(rate / s["EXCELLENT_RATE"], 1.0)
+    distance_score = np.where(
+        distance > 0,
+        np.clip(1.0 - np.abs(distance - s["IDEAL_DISTANCE"]) / s["DISTANCE_FALLOFF"], 0.0, 1.0),
+        0.0
+    )
+    age_score = np.nan_to_num(1.0 - np.minimum(age / s["MAX_AGE_HOURS"], 1.0), nan=0.0)
+    stops_score = np.nan_to_num(1.0 - np.minimum(stops / s["MAX_STOPS"], 1.0), nan=0.0)
+    deadhead_score = 1.0 - np.minimum(deadhead / s["MAX_DEADHEAD"], 1.0)
+
+    score = (
+        rate_score * w["rate"]
+        + distance_score * w["distance"]
+        + age_score * w["age"]
+        + stops_score * w["stops"]
+        + deadhead_score * w["deadhead"]
+    )
+    return np.where(rate > 0, np.clip(score, 0.0, 1.0), 0.0)
+
+def score_truckstop_loads(loads: List[dict]) -> np.ndarray:
+    """truckstop_scores over a list of load dicts"""
+    if not loads:
+        return np.empty(0, dtype=np.float64)
+    return truckstop_scores(
+        column(loads, "rate_per_mile_est"),
+        column(loads, "distance"),
+        column(loads, "age", missing=np.nan),
+        column(loads, "stops", missing=np.nan),
+        column(loads, "deadhead_miles"),
+    )
+
+def relative_rank_scores(batch: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    """Weighted sum of min-max normalized columns; a constant column is neutral"""
+    total = None
+    for key, weight in weights.items():
+        values = batch[key]
+        low, high = values.min(), values.max()
+        normalized = (values - low) / (high - low) if high != low else np.zeros_like(values)
+        total = normalized * weight if total is None else total + normalized * weight
+    return total
+
+def score_direct_freight_loads(loads: List[dict]) -> np.ndarray:
+    """Relative ranking score for a batch of DirectFreight loads"""
+    if not loads:
+        return np.empty(0, dtype=np.float64)
+    return relative_rank_scores(columns(loads, DIRECT_FREIGHT_RANK_WEIGHTS), DIRECT_FREIGHT_RANK_WEIGHTS)
+
+def backhaul_pair_scores(outbound: dict, return_batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Score one outbound load against a batch of return loads.
+    Returns deadhead_miles, total_revenue, total_miles and combined_score arrays.
+    """
+    b = BACKHAUL_SCORE
+    out_distance = outbound.get('distance', 0) or 0
+    out_origin_distance = outbound.get('origin_distance', 0) or 0
+    out_revenue = (outbound.get('rate_per_mile_est', 0) or 0) * out_distance
+
+    ret_distance = return_batch['distance']
+    ret_origin_distance = return_batch['origin_distance']
+    ret_dest_distance = return_batch['destination_distance']
+
+    deadhead_miles = out_origin_distance + ret_origin_distance + ret_dest_distance
+    total_miles = deadhead_miles + out_distance + ret_distance
+    total_revenue = out_revenue + return_batch['rate_per_mile_est'] * ret_distance
+
+    # Days on the road, whichever side the return pickup deadhead lands on
+    per_day = b["MILES_PER_DAY"]
+    estimate_1 = (out_distance + out_origin_distance + ret_origin_distance) // per_day + (ret_distance + ret_dest_distance) // per_day
+    estimate_2 = (out_distance + out_origin_distance) // per_day + (ret_distance + ret_dest_distance + ret_origin_distance) // per_day
+    estimated_days = b["BASE_DAYS"] + np.minimum(estimate_1, estimate_2)
+
+    combined_score = total_revenue / total_miles + b["DAY_REVENUE_WEIGHT"] * (total_revenue / estimated_days)
+    return {
+        "deadhead_miles": deadhead_miles,
+        "total_revenue": total_revenue,
+        "total_miles": total_miles,
+        "combined_score": combined_score,
+    }
+
+def home_gravity_scores(revenue: np.ndarray, distance_to_origin: np.ndarray, days_penalty: float) -> np.ndarray:
+    """Trip planner score: revenue minus a distance-from-home penalty that grows with days on the road"""
+    return revenue - (distance_to_origin / 100) * days_penalty
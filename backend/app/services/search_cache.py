@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from cachetools import LRUCache
+from app.models.load import LoadSearchRequest, LoadResponse
+from app.services.geocoding_service import normalize_city, normalize_state
+from app.services.persistent_store import PersistentStore
+from app.services.provider_budget import BudgetExhausted
+
+# Load boards churn in minutes: serve fresh results for TTL seconds, then
+# serve stale ones for up to STALE seconds more while a refresh runs
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "180"))
+SEARCH_CACHE_STALE = int(os.getenv("SEARCH_CACHE_STALE", "600"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+# Lanes remembered for the background pre-warmer
+RECENT_LANES_SIZE = 200
+
+def search_cache_key(search_params: LoadSearchRequest) -> str:
+    """
+    Normalized lane key. DirectFreight results come from one shared account,
+    so every user searching the same lane shares one entry; Truckstop results
+    belong to the caller's integration, so its (hashed) ID is part of the key.
+    """
+    data_source = search_params.data_source or "truckstop"
+    if data_source != "direct_freight":
+        integration = hashlib.sha256((search_params.user_integration_id or "").encode()).hexdigest()[:16]
+        data_source = f"{data_source}@{integration}"
+    parts = [
+        data_source,
+        f"{normalize_city(search_params.origin_city)}|{normalize_state(search_params.origin_state)}",
+        f"{normalize_city(search_params.destination_city or '')}|{normalize_state(search_params.destination_state or '')}",
+        (search_params.truck_type or "").strip().upper(),
+        search_params.ship_date,
+        str(search_params.max_weight),
+        str(search_params.origin_range),
+        str(search_params.destination_range),
+        "backhaul" if search_params.backhaul_search else "outbound",
+    ]
+    return "::".join(parts)
+
+def encode_loads(loads: List[LoadResponse]) -> bytes:
+    """Compact form: zlib-compressed JSON without null fields"""
+    payload = [load.dict(exclude_none=True) for load in loads]
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), 6)
+
+def decode_loads(blob: bytes) -> List[LoadResponse]:
+    return [LoadResponse(**load) for load in json.loads(zlib.decompress(blob))]
+
+class SearchResultCache:
+    """
+    Two-tier search result cache with stale-while-revalidate.
+    Tier 1 is an in-process LRU of compressed blobs, tier 2 a SQLite store
+    shared by all workers. Concurrent misses for the same lane share one fetch.
+    """
+
+    def __init__(self, ttl: int = SEARCH_CACHE_TTL, stale: int = SEARCH_CACHE_STALE, maxsize: int = SEARCH_CACHE_SIZE):
+        self.ttl = ttl
+        self.stale = stale
+        self.memory = LRUCache(maxsize=maxsize)
+        self.store = PersistentStore("search_results")
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        # Recently searched lanes, most recent last: key -> (request, last searched)
+        self.recent_lanes: "OrderedDict[str, Tuple[LoadSearchRequest, float]]" = OrderedDict()
+        # key -> fetched_at for entries written by warm() and not refreshed since
+        self.prewarmed = LRUCache(maxsize=maxsize)
+        # key -> pre-warm fetches since anyone last searched the lane
+        self.unhit_prewarms = LRUCache(maxsize=maxsize)
+        # Called with every freshly fetched batch and the search it answers (e.g. the alert engine)
+        self.listeners: List[Callable[[LoadSearchRequest, List[LoadResponse]], object]] = []
+        self.stats_counters: Dict[str, int] = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "revalidations": 0,
+            "fetch_errors": 0,
+            "prewarm_fetches": 0,
+            "prewarm_hits": 0,
+            "prewarm_dropped": 0,
+        }
+
+    def _lookup(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """(blob, fetched_at) from either tier, if still servable"""
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self.store.get(key, max_age=self.ttl + self.stale)
+            if entry is not None:
+                self.memory[key] = entry
+        if entry is not None and time.time() - entry[1] > self.ttl + self.stale:
+            return None
+        return entry
+
+    def _save(self, key: str, loads: List[LoadResponse]) -> float:
+        fetched_at = time.time()
+        blob = encode_loads(loads)
+        self.memory[key] = (blob, fetched_at)
+        self.store.set(key, blob, updated_at=fetched_at)
+        return fetched_at
+
+    def _start_fetch(self, key: str, search_params: LoadSearchRequest, fetch, prewarm: bool = False) -> asyncio.Task:
+        async def run():
+            try:
+                loads = await fetch(search_params)
+            except Exception:
+                self.stats_counters["fetch_errors"] += 1
+                raise
+            fetched_at = self._save(key, loads)
+            if prewarm:
+                self.prewarmed[key] = fetched_at
+                self.unhit_prewarms[key] = self.unhit_prewarms.get(key, 0) + 1
+            else:
+                self.prewarmed.pop(key, None)
+            for listener in self.listeners:
+                try:
+                    listener(search_params, loads)
+                except Exception as e:
+                    print(f"[SEARCH_CACHE] Listener failed: {str(e)}")
+            return loads
+
+        task = asyncio.create_task(run())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return task
+
+    def _revalidate(self, key: str, search_params: LoadSearchRequest, fetch):
+        if key in self._in_flight:
+            return
+        self.stats_counters["revalidations"] += 1
+        print(f"[SEARCH_CACHE] Refreshing stale lane {key}")
+        task = self._start_fetch(key, search_params, fetch)
+        # Nobody awaits a background refresh; consume its error so it isn't logged as unretrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def get_or_fetch(
+        self,
+        search_params: LoadSearchRequest,
+        fetch: Callable[[LoadSearchRequest], Awaitable[List[LoadResponse]]]
+    ) -> Tuple[List[LoadResponse], Optional[float]]:
+        """
+        Loads for a search and the age in seconds of the cached result they came
+        from, or None for the age when they were fetched for this call.
+        """
+        key = search_cache_key(search_params)
+        self._remember_lane(key, search_params)
+        self.unhit_prewarms.pop(key, None)
+        entry = self._lookup(key)
+        if entry is not None:
+            blob, fetched_at = entry
+            age = time.time() - fetched_at
+            if self.prewarmed.get(key) == fetched_at:
+                self.stats_counters["prewarm_hits"] += 1
+            if age <= self.ttl:
+                self.stats_counters["fresh_hits"] += 1
+            else:
+                self.stats_counters["stale_hits"] += 1
+                self._revalidate(key, search_params, fetch)
+            return decode_loads(blob), round(age, 1)
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats_counters["coalesced"] += 1
+        else:
+            self.stats_counters["misses"] += 1
+            task = self._start_fetch(key, search_params, fetch)
+        try:
+            loads = await asyncio.shield(task)
+        except BudgetExhausted:
+            # Joined a pre-warm fetch that stopped at the budget reserve; searches people make always go out
+            loads = await asyncio.shield(self._start_fetch(key, search_params, fetch))
+        return [load.copy() for load in loads], None
+
+    def _remember_lane(self, key: str, search_params: LoadSearchRequest):
+        self.recent_lanes[key] = (search_params, time.time())
+        self.recent_lanes.move_to_end(key)
+        while len(self.recent_lanes) > RECENT_LANES_SIZE:
+            self.recent_lanes.popitem(last=False)
+
+    def recent_searches(self, max_age: float) -> List[LoadSearchRequest]:
+        """Lanes searched within the last max_age seconds, most recent first"""
+        cutoff = time.time() - max_age
+        return [params for params, seen_at in reversed(self.recent_lanes.values()) if seen_at >= cutoff]
+
+    async def warm(
+        self,
+        search_params: LoadSearchRequest,
+        fetch: Callable[[LoadSearchRequest], Awaitable[List[LoadResponse]]],
+        min_remaining: float = 0,
+        max_unhit: int = 2
+    ) -> bool:
+        """
+        Fetch a lane ahead of demand unless it stays fresh for at least
+        min_remaining more seconds. A lane nobody has searched since its last
+        max_unhit pre-warm fetches is dropped from the recent lanes instead.
+        Returns whether a fetch was made.
+        """
+        key = search_cache_key(search_params)
+        if self.unhit_prewarms.get(key, 0) >= max_unhit:
+            if self.recent_lanes.pop(key, None) is not None:
+                self.stats_counters["prewarm_dropped"] += 1
+            return False
+        entry = self._lookup(key)
+        if entry is not None and time.time() - entry[1] < self.ttl - min_remaining:
+            return False
+        if key in self._in_flight:
+            return False
+        self.stats_counters["prewarm_fetches"] += 1
+        await self._start_fetch(key, search_params, fetch, prewarm=True)
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        counters = dict(self.stats_counters)
+        lookups = counters["fresh_hits"] + counters["stale_hits"] + counters["misses"] + counters["coalesced"]
+        hits = counters["fresh_hits"] + counters["stale_hits"]
+        counters.update({
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": sum(len(blob) for blob, _ in self.memory.values()),
+            "in_flight": len(self._in_flight),
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale,
+        })
+        return counters
+
+    def purge_expired(self) -> int:
+        """Drop shared-tier entries too old to serve even as stale"""
+        return self.store.purge_older_than(self.ttl + self.stale)
+
+search_result_cache = SearchResultCache()
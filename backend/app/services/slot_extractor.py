@@ -0,0 +1,378 @@
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from app.us_city_state_map import CITY_STATE_MAP
+from app.services.geocoding_service import get_gazetteer, normalize_city
+
+# Fast-path results at or above this confidence skip the LLM extraction call
+FAST_PATH_CONFIG = {
+    "MIN_CONFIDENCE": 0.75,
+    "UNKNOWN_WORD_PENALTY": 0.15,   # per word the parser could not account for
+    "AMBIGUOUS_CITY_PENALTY": 0.5,  # city name shared by several similar-sized places
+    "BARE_CITY_PENALTY": 0.35,      # lesser-known city with neither a from/to word nor a state
+    "MAX_CITY_WORDS": 4,
+}
+
+STATE_NAMES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "florida": "FL", "georgia": "GA",
+    "hawaii": "HI", "idaho": "ID", "illinois": "IL", "indiana": "IN", "iowa": "IA",
+    "kansas": "KS", "kentucky": "KY", "louisiana": "LA", "maine": "ME", "maryland": "MD",
+    "massachusetts": "MA", "michigan": "MI", "minnesota": "MN", "mississippi": "MS", "missouri": "MO",
+    "montana": "MT", "nebraska": "NE", "nevada": "NV", "new hampshire": "NH", "new jersey": "NJ",
+    "new mexico": "NM", "new york": "NY", "north carolina": "NC", "north dakota": "ND", "ohio": "OH",
+    "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC",
+    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT",
+    "virginia": "VA", "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+    "district of columbia": "DC",
+}
+STATE_CODES = set(STATE_NAMES.values())
+# Two-letter codes that are also everyday words; only accepted right after a city
+WORD_STATE_CODES = {"in", "me", "oh", "ok", "or", "hi", "pa", "ma", "al", "la", "de", "co", "id"}
+
+# Spoken shorthand -> (city, state), as in the LLM extraction prompt
+CITY_SHORTHANDS = {
+    "sf": ("San Francisco", "CA"),
+    "la": ("Los Angeles", "CA"),
+    "nyc": ("New York City", "NY"),
+    "philly": ("Philadelphia", "PA"),
+    "vegas": ("Las Vegas", "NV"),
+    "dfw": ("Dallas", "TX"),
+    "nola": ("New Orleans", "LA"),
+}
+
+EQUIPMENT_PATTERNS = [
+    ("R", re.compile(r"\b(?:reefers?|refers?|refrigerated|temp(?:erature)? controlled)\b")),
+    ("F", re.compile(r"\b(?:flat ?beds?|flats?)\b")),
+    ("V", re.compile(r"\b(?:dry vans?|vans?)\b")),
+]
+
+# (pattern, multiplier)
+WEIGHT_PATTERNS = [
+    (re.compile(r"\b(\d{1,2}(?:\.\d)?)\s*(?:k|thousand)\b(?:\s*(?:lbs?|pounds))?"), 1000),
+    (re.compile(r"\b(\d{1,2},?\d{3})\s*(?:lbs?|pounds)\b"), 1),
+    (re.compile(r"\b(?:max(?:imum)?|weight|weighs|up to|under|capacity)\s+(?:of\s+|is\s+)?(\d{1,2},?\d{3})\b"), 1),
+]
+WEIGHT_RANGE = (1000, 80000)
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_ORDINAL = r"(\d{1,2})(?:st|nd|rd|th)?"
+DATE_PATTERNS = [
+    ("iso", re.compile(r"\b(20\d{2})-(\d{1,2})-(\d{1,2})\b")),
+    ("numeric", re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")),
+    ("month_day", re.compile(
+        r"\b(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|"
+        r"oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?\s+(?:the\s+)?" + _ORDINAL + r"\b(?:,?\s*(20\d{2}))?")),
+    ("day_of_month", re.compile(r"\b(?:on\s+)?the\s+(\d{1,2})(?:st|nd|rd|th)\b")),
+    ("relative", re.compile(r"\b(day after tomorrow|tomorrow|tmrw|today|tonight|this (?:morning|afternoon|evening))\b")),
+    ("weekday", re.compile(r"\b(?:(this|next|on)\s+)?(" + "|".join(WEEKDAYS) + r")\b")),
+]
+RELATIVE_DAYS = {"day after tomorrow": 2, "tomorrow": 1, "tmrw": 1}
+
+# Words that introduce the pickup or the delivery city
+ORIGIN_MARKERS = [
+    "leaving from", "starting from", "starting in", "picking up in", "pick up in", "pickup in",
+    "based in", "sitting in", "empty in", "out of", "from", "leaving", "near", "around", "in",
+]
+DESTINATION_MARKERS = [
+    "headed to", "heading to", "going to", "deliver to", "delivering to", "delivery to", "drop in",
+    "dropping in", "deliver in", "bound for", "towards", "toward", "into", "to",
+]
+
+# Words that carry no slot information and don't need the LLM to interpret
+FILLER_WORDS = set("""
+a an the i im i'm ive i've we were we're my our me us you your it its it's that this there here
+is am are be been was will would could can should do does got get have has had need needs want wanna
+looking look find finding search searching for load loads freight something anything any some
+truck trucks trailer trailers equipment with and also plus please hey hi hello um uh so just like
+haul hauling run running go going headed heading available on of at by pounds lbs lb max weight
+pickup pick up ship shipping date day leave leaving deliver delivery good great thanks
+ok okay yeah yes well what s
+""".split()) | {word for marker in ORIGIN_MARKERS + DESTINATION_MARKERS for word in marker.split()}
+
+# Corrections and hedges the fast path shouldn't try to interpret
+NEGATION_WORDS = {"not", "no", "nope", "instead", "except", "rather", "unless"}
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'’]*")
+_CONSUMED = "|"
+
+EXTRACTOR_STATS: Dict[str, float] = {
+    "turns": 0,
+    "fast_path_hits": 0,
+    "llm_fallbacks": 0,
+    "parse_ms_total": 0.0,
+    "llm_ms_total": 0.0,
+}
+
+def _consume(text: str, span: Tuple[int, int]) -> str:
+    """Blank out a matched span so later stages can't reuse its words"""
+    return text[:span[0]] + f" {_CONSUMED} " + text[span[1]:]
+
+def _resolve_date(kind: str, groups: Tuple, today: datetime) -> Optional[datetime]:
+    try:
+        if kind == "iso":
+            return datetime(int(groups[0]), int(groups[1]), int(groups[2]))
+        if kind == "numeric":
+            year = int(groups[2]) if groups[2] else today.year
+            year = year + 2000 if year < 100 else year
+            candidate = datetime(year, int(groups[0]), int(groups[1]))
+            return candidate if groups[2] or candidate.date() >= today.date() else candidate.replace(year=year + 1)
+        if kind == "month_day":
+            year = int(groups[2]) if groups[2] else today.year
+            candidate = datetime(year, MONTHS[groups[0][:3]], int(groups[1]))
+            return candidate if groups[2] or candidate.date() >= today.date() else candidate.replace(year=year + 1)
+        if kind == "day_of_month":
+            candidate = today.replace(day=int(groups[0]))
+            if candidate.date() < today.date():
+                candidate = (candidate.replace(day=1) + timedelta(days=32)).replace(day=int(groups[0]))
+            return candidate
+        if kind == "relative":
+            return today + timedelta(days=RELATIVE_DAYS.get(groups[0], 0))
+        if kind == "weekday":
+            ahead = (WEEKDAYS.index(groups[1]) - today.weekday()) % 7
+            return today + timedelta(days=ahead + (7 if groups[0] == "next" else 0))
+    except ValueError:
+        return None
+    return None
+
+def parse_dates(text: str, today: datetime) -> Tuple[List[str], str]:
+    found = []
+    for kind, pattern in DATE_PATTERNS:
+        for match in list(pattern.finditer(text))[::-1]:
+            date = _resolve_date(kind, match.groups(), today)
+            if date is not None:
+                found.append(date.strftime("%Y-%m-%d"))
+                text = _consume(text, match.span())
+    return found, text
+
+def parse_weights(text: str) -> Tuple[List[str], str]:
+    found = []
+    for pattern, multiplier in WEIGHT_PATTERNS:
+        for match in list(pattern.finditer(text))[::-1]:
+            value = float(match.group(1).replace(",", "")) * multiplier
+            if WEIGHT_RANGE[0] <= value <= WEIGHT_RANGE[1]:
+                found.append(str(int(value)))
+                text = _consume(text, match.span())
+    return found, text
+
+def parse_equipment(text: str) -> Tuple[List[str], str]:
+    found = []
+    for code, pattern in EQUIPMENT_PATTERNS:
+        for match in list(pattern.finditer(text))[::-1]:
+            found.append(code)
+            text = _consume(text, match.span())
+    return found, text
+
+class PlaceMatcher:
+    """Longest-match city (+ optional state) recognizer over gazetteer names"""
+
+    def __init__(self):
+        self.gazetteer = get_gazetteer()
+        self.state_names = {tuple(name.split()): code for name, code in STATE_NAMES.items()}
+        self.max_state_words = max(len(words) for words in self.state_names)
+
+    def _state_at(self, tokens: List[str], i: int, after_city: bool) -> Tuple[Optional[str], int]:
+        for size in range(self.max_state_words, 0, -1):
+            code = self.state_names.get(tuple(tokens[i:i + size]))
+            if code:
+                return code, i + size
+        if i < len(tokens):
+            token = tokens[i].replace(".", "")
+            if token.upper() in STATE_CODES and (after_city or token not in WORD_STATE_CODES):
+                return token.upper(), i + 1
+        return None, i
+
+    def match(self, tokens: List[str], i: int) -> Optional[Tuple[str, str, int, bool, bool]]:
+        """
+        (city, state, end index, ambiguous, resolved) for the place starting at tokens[i].
+        Resolved means the caller gave a state or the city is well known.
+        """
+        for size in range(min(FAST_PATH_CONFIG["MAX_CITY_WORDS"], len(tokens) - i), 0, -1):
+            words = tokens[i:i + size]
+            if _CONSUMED in words:
+                continue
+            phrase = " ".join(words)
+            key = normalize_city(phrase)
+            state, end = self._state_at(tokens, i + size, after_city=True)
+
+            if size == 1 and phrase in CITY_SHORTHANDS and state is None:
+                city, state = CITY_SHORTHANDS[phrase]
+                return city, state, i + 1, False, True
+
+            if state is not None:
+                row = self.gazetteer.find(key, state)
+                if row is not None:
+                    return self.gazetteer.names[row], state, end, False, True
+                if CITY_STATE_MAP.get(key) == state:
+                    return phrase.title(), state, end, False, True
+                continue
+
+            if key in CITY_STATE_MAP:
+                state = CITY_STATE_MAP[key]
+                row = self.gazetteer.find(key, state)
+                return (self.gazetteer.names[row] if row is not None else phrase.title()), state, i + size, False, True
+
+            rows = self.gazetteer.by_name.get(key)
+            if rows:
+                top = self.gazetteer.populations[rows[0]]
+                runner_up = self.gazetteer.populations[rows[1]] if len(rows) > 1 else 0
+                # "Springfield" and "Jackson" need a state; "Albuquerque" and "Columbus" don't
+                ambiguous = top < 3 * runner_up or (top < 100000 and top < 10 * runner_up)
+                return self.gazetteer.names[rows[0]], self.gazetteer.states[rows[0]], i + size, ambiguous, False
+        return None
+
+_place_matcher: Optional[PlaceMatcher] = None
+
+def get_place_matcher() -> PlaceMatcher:
+    global _place_matcher
+    if _place_matcher is None:
+        _place_matcher = PlaceMatcher()
+    return _place_matcher
+
+def _marker_at(tokens: List[str], i: int, markers: List[str]) -> int:
+    """Length in tokens of the marker phrase starting at tokens[i], or 0"""
+    for marker in markers:
+        words = marker.split()
+        if tokens[i:i + len(words)] == words:
+            return len(words)
+    return 0
+
+def parse_places(text: str, context: Dict[str, str]) -> Tuple[Dict[str, Tuple[str, str]], List[str], float]:
+    """
+    Origin/destination places in the utterance, the words left unexplained,
+    and a confidence penalty for ambiguity or conflicts (1.0 means give up).
+    """
+    matcher = get_place_matcher()
+    tokens = [t.replace("’", "'") for t in _WORD.findall(text.replace(_CONSUMED, " zzconsumed "))]
+    tokens = [_CONSUMED if t == "zzconsumed" else t for t in tokens]
+
+    marked: Dict[str, List[Tuple[str, str]]] = {"origin": [], "destination": []}
+    unmarked: List[Tuple[str, str]] = []
+    leftover: List[str] = []
+    penalty = 0.0
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == _CONSUMED:
+            i += 1
+            continue
+        role = None
+        size = _marker_at(tokens, i, DESTINATION_MARKERS)
+        if size:
+            role = "destination"
+        else:
+            size = _marker_at(tokens, i, ORIGIN_MARKERS)
+            role = "origin" if size else None
+
+        place = matcher.match(tokens, i + size) if i + size < len(tokens) else None
+        if role and place is None:
+            # A marker not followed by a place ("going to need", "in the morning") is just a word
+            leftover.extend(tokens[i:i + size])
+            i += size
+            continue
+        if place is None:
+            leftover.append(tokens[i])
+            i += 1
+            continue
+
+        city, state, end, ambiguous, resolved = place
+        if role is None and not resolved:
+            if end == i + 1 and tokens[i] in FILLER_WORDS:
+                leftover.append(tokens[i])
+                i += 1
+                continue
+            # A lone town name might be something else entirely ("a conestoga", "the panhandle")
+            penalty += FAST_PATH_CONFIG["BARE_CITY_PENALTY"]
+        if ambiguous:
+            penalty += FAST_PATH_CONFIG["AMBIGUOUS_CITY_PENALTY"]
+        (marked[role] if role else unmarked).append((city, state))
+        i = end
+
+    places: Dict[str, Tuple[str, str]] = {}
+    if len(marked["origin"]) > 1 or len(marked["destination"]) > 1 or "or" in leftover or "either" in leftover:
+        # "from either SF or LA": the LLM prompt says not to guess
+        return {}, leftover, 1.0
+    for role in ("origin", "destination"):
+        if marked[role]:
+            places[role] = marked[role][0]
+    for place in unmarked:
+        if "origin" not in places and ("destination" in places or "start_city" not in context):
+            places["origin"] = place
+        elif "destination" not in places and ("dest_city" not in context or "origin" in places):
+            places["destination"] = place
+        else:
+            return {}, leftover, 1.0
+    return places, leftover, penalty
+
+def extract_slots(user_input: str, context: Optional[Dict[str, str]] = None, today: Optional[datetime] = None) -> Tuple[Dict[str, str], float]:
+    """
+    Deterministic slot extraction for a caller utterance.
+    Returns (slots, confidence) using the same keys and formats as the LLM
+    extraction prompt; callers should fall back to the LLM below MIN_CONFIDENCE.
+    """
+    start_time = time.perf_counter()
+    context = context or {}
+    today = today or datetime.now()
+    text = user_input.lower().replace("’", "'")
+
+    dates, text = parse_dates(text, today)
+    weights, text = parse_weights(text)
+    equipment, text = parse_equipment(text)
+    places, leftover, penalty = parse_places(text, context)
+
+    slots: Dict[str, str] = {}
+    confidence = 1.0 - penalty
+    for key, values in (("date", dates), ("max_weight", weights), ("truck_type", equipment)):
+        if len(set(values)) > 1:
+            confidence = 0.0
+        elif values:
+            slots[key] = values[0]
+    if "origin" in places:
+        slots["start_city"], slots["start_state"] = places["origin"]
+    if "destination" in places:
+        slots["dest_city"], slots["dest_state"] = places["destination"]
+
+    if NEGATION_WORDS.intersection(leftover):
+        confidence = 0.0
+    unknown = [word for word in leftover if word not in FILLER_WORDS and not word.isdigit()]
+    confidence -= FAST_PATH_CONFIG["UNKNOWN_WORD_PENALTY"] * len(unknown)
+    if any(word.isdigit() for word in leftover):
+        # A number we couldn't place (a weight without units, a time, half of a range)
+        # would be silently dropped, so let the LLM read the turn
+        confidence = 0.0
+    if not slots:
+        confidence = 0.0
+
+    EXTRACTOR_STATS["turns"] += 1
+    EXTRACTOR_STATS["parse_ms_total"] += (time.perf_counter() - start_time) * 1000
+    return slots, round(max(confidence, 0.0), 2)
+
+def record_extraction(fast_path: bool, llm_ms: float = 0.0):
+    """Count which path handled a turn; llm_ms is the extraction round trip when the LLM ran"""
+    if fast_path:
+        EXTRACTOR_STATS["fast_path_hits"] += 1
+    else:
+        EXTRACTOR_STATS["llm_fallbacks"] += 1
+        EXTRACTOR_STATS["llm_ms_total"] += llm_ms
+
+def extractor_stats() -> Dict[str, float]:
+    stats = dict(EXTRACTOR_STATS)
+    turns = stats["turns"]
+    hits = stats["fast_path_hits"]
+    fallbacks = stats["llm_fallbacks"]
+    avg_parse_ms = stats["parse_ms_total"] / turns if turns else 0.0
+    avg_llm_ms = stats["llm_ms_total"] / fallbacks if fallbacks else 0.0
+    # Each hit saves an LLM round trip (priced at the observed average) minus the local parse
+    saved_ms = hits * max(avg_llm_ms - avg_parse_ms, 0.0)
+    stats.update({
+        "fast_path_hit_rate": round(hits / turns, 3) if turns else 0.0,
+        "avg_parse_ms": round(avg_parse_ms, 3),
+        "avg_llm_extraction_ms": round(avg_llm_ms, 1),
+        "estimated_saved_ms": round(saved_ms, 1),
+        "saved_ms_per_turn": round(saved_ms / turns, 1) if turns else 0.0,
+    })
+    return stats
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.services.load_service import DIRECT_FREIGHT_CONFIG, find_loads_async, rank_best_loads
+from app.services.distance_estimator import city_coordinates, haversine_miles
+from app.services.geocoding_service import normalize_city, normalize_state
+
+PREFETCH_CONFIG = {
+    "MAX_AGE_SECONDS": 180,        # boards churn; older prefetches are searched again
+    "ORIGIN_ONLY_MAX_WEIGHT": 80000,  # weight not known yet: fetch everything, filter later
+    "DEST_RADIUS_MILES": 200,      # same as the DirectFreight destination_radius
+    "MIN_LOCAL_RESULTS": 5,        # a truncated prefetch must leave at least this many loads
+}
+
+SPECULATIVE_STATS = {
+    "started": 0,
+    "restarted": 0,
+    "served_locally": 0,
+    "fallbacks": 0,
+    "prefetch_errors": 0,
+    "local_filter_ms_total": 0.0,
+}
+
+def filter_loads_to_destination(
+    loads: List[dict],
+    dest_city: str,
+    dest_state: str,
+    max_weight: int,
+    radius: float = PREFETCH_CONFIG["DEST_RADIUS_MILES"]
+) -> List[dict]:
+    """
+    The loads an origin-destination search would return, taken from an
+    origin-only result: delivering within radius miles of the destination
+    and no heavier than max_weight. Loads with an unknown weight are kept.
+    """
+    if not loads:
+        return []
+    city, state = normalize_city(dest_city), normalize_state(dest_state)
+    dest_lat, dest_lon = city_coordinates([(dest_city, dest_state)])
+    lats, lons = city_coordinates([(load.get("destination_city") or "", load.get("destination_state") or "") for load in loads])
+    near = haversine_miles(lats, lons, dest_lat[0], dest_lon[0]) <= radius  # NaN (unknown city) compares False
+    same_city = np.fromiter(
+        (normalize_city(load.get("destination_city") or "") == city and normalize_state(load.get("destination_state") or "") == state
+         for load in loads),
+        dtype=bool, count=len(loads)
+    )
+    weights = np.fromiter(
+        (np.nan if load.get("weight") is None else load["weight"] for load in loads),
+        dtype=np.float64, count=len(loads)
+    )
+    light_enough = np.isnan(weights) | (weights <= float(max_weight))
+    return [loads[i] for i in np.flatnonzero((near | same_city) & light_enough)]
+
+class SpeculativeSearch:
+    """
+    Origin-only board search started in the background as soon as a caller's
+    origin, equipment and date are known, usually several turns before the
+    destination. When the last slots arrive the result is filtered locally
+    instead of searching again. One per DispatchAgent.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._key: Optional[Tuple[str, str, str, str]] = None
+        self._max_weight = 0
+        self._started_at = 0.0
+
+    @staticmethod
+    def _key_for(args: Dict[str, str]) -> Optional[Tuple[str, str, str, str]]:
+        if not all(args.get(slot) for slot in ("start_city", "start_state", "truck_type", "date")):
+            return None
+        return (normalize_city(args["start_city"]), normalize_state(args["start_state"]), args["truck_type"].upper(), args["date"])
+
+    @staticmethod
+    def _weight(value) -> Optional[int]:
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+
+    def _usable(self, key, max_weight: Optional[int]) -> bool:
+        return (
+            self._task is not None
+            and key == self._key
+            and (max_weight or PREFETCH_CONFIG["ORIGIN_ONLY_MAX_WEIGHT"]) <= self._max_weight
+            and time.time() - self._started_at <= PREFETCH_CONFIG["MAX_AGE_SECONDS"]
+            and not (self._task.done() and (self._task.cancelled() or self._task.exception()))
+        )
+
+    def update(self, args: Dict[str, str]):
+        """Start (or restart) the origin-only search if the origin, equipment or date just became known or changed"""
+        key = self._key_for(args)
+        max_weight = self._weight(args.get("max_weight"))
+        if key is None or self._usable(key, max_weight):
+            return
+        if self._task is not None:
+            self.cancel()
+            SPECULATIVE_STATS["restarted"] += 1
+        self._key = key
+        self._max_weight = max_weight or PREFETCH_CONFIG["ORIGIN_ONLY_MAX_WEIGHT"]
+        self._started_at = time.time()
+        SPECULATIVE_STATS["started"] += 1
+        print(f"[PREFETCH] Origin-only search for {args['start_city']}, {args['start_state']} ({args['truck_type']}, {args['date']})")
+        self._task = asyncio.create_task(find_loads_async(
+            args["start_city"], args["start_state"], "", "",
+            self._max_weight, args["truck_type"], args["date"]
+        ))
+        # Nobody may await it (caller hangs up first); consume its error so it isn't logged as unretrieved
+        self._task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def best_loads(self, args: Dict[str, str]) -> Optional[List[dict]]:
+        """
+        Best loads for the full search, filtered from the prefetched origin-only
+        result, or None when there's no usable prefetch and the caller should search.
+        """
+        key = self._key_for(args)
+        if key is None or not self._usable(key, self._weight(args.get("max_weight"))):
+            return None
+        try:
+            loads = await asyncio.shield(self._task)
+        except Exception as e:
+            SPECULATIVE_STATS["prefetch_errors"] += 1
+            print(f"[PREFETCH] Origin-only search failed: {str(e)}")
+            return None
+
+        start_time = time.perf_counter()
+        nearby = filter_loads_to_destination(loads, args["dest_city"], args["dest_state"], self._weight(args.get("max_weight")) or self._max_weight)
+        # A full origin-only result holds every load on the lane; a truncated one may be missing some
+        truncated = len(loads) >= DIRECT_FREIGHT_CONFIG["MAX_PAGES"] * DIRECT_FREIGHT_CONFIG["ITEM_COUNT"]
+        if not loads or (truncated and len(nearby) < PREFETCH_CONFIG["MIN_LOCAL_RESULTS"]):
+            SPECULATIVE_STATS["fallbacks"] += 1
+            print(f"[PREFETCH] {len(nearby)} of {len(loads)} prefetched loads match, searching the lane instead")
+            return None
+        result = rank_best_loads([dict(load) for load in nearby])
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        SPECULATIVE_STATS["served_locally"] += 1
+        SPECULATIVE_STATS["local_filter_ms_total"] += elapsed_ms
+        print(f"[PREFETCH] Served {len(result)} of {len(nearby)} matching loads from the prefetch in {elapsed_ms:.1f}ms")
+        return result
+
+    def cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._key = None
+
+def speculative_stats() -> Dict[str, float]:
+    stats = dict(SPECULATIVE_STATS)
+    served = stats["served_locally"]
+    stats["avg_local_filter_ms"] = round(stats.pop("local_filter_ms_total") / served, 2) if served else 0.0
+    stats["local_hit_rate"] = round(served / (served + stats["fallbacks"]), 3) if served + stats["fallbacks"] else 0.0
+    return stats
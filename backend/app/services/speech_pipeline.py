@@ -0,0 +1,254 @@
+import asyncio
+import os
+import re
+import struct
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+STREAMING_CONFIG = {
+    "ENABLED": os.getenv("VOICE_STREAMING", "true").lower() == "true",
+    "MIN_SENTENCE_CHARS": 8,      # shorter fragments ("Sure.") ride along with the next sentence
+    "MAX_SENTENCE_CHARS": 220,    # run-on replies are cut at a comma or space past this
+    "MAX_TTS_IN_FLIGHT": 2,       # per reply; later sentences queue behind
+    "MEDIA_CHUNK_BYTES": 3200,    # 400ms of 8kHz mu-law per Media Streams message
+    "TEXT_WAIT_SECONDS": 20,      # how long the fallback waits for the rest of a reply
+}
+
+# A period after these doesn't end a sentence ("St. Louis", "Mt. Vernon")
+ABBREVIATIONS = {"st", "mt", "ft", "dr", "mr", "mrs", "ms", "jr", "sr", "vs", "approx", "etc", "inc", "ave", "hwy", "e.g", "i.e", "a.m", "p.m"}
+# Only abbreviations before a number ("No. 5"); "the answer is no." ends a sentence
+NUMBER_ABBREVIATIONS = {"no"}
+
+_BOUNDARY = re.compile(r"[.!?]+[\"')\]]*(?=\s)|\n")
+_SOFT_BREAK = re.compile(r"[,;:]\s|\s")
+_STAGE_DIRECTIONS = re.compile(r"\*[^*\n]{1,40}\*")  # "*typing*"
+_MARKDOWN = re.compile(r"[*#_`]+")
+
+# Raw 8kHz mu-law for one sentence, piece by piece as it is synthesized; nothing if it can't be rendered
+Synthesizer = Callable[[str], AsyncIterator[bytes]]
+
+def clean_for_speech(text: str) -> str:
+    """Drop stage directions and markdown the TTS voice would read out"""
+    return " ".join(_MARKDOWN.sub("", _STAGE_DIRECTIONS.sub("", text)).split())
+
+class SentenceSplitter:
+    """
+    Incremental sentence splitter for streamed LLM text: feed it deltas and
+    it returns every sentence completed so far. A sentence ends at . ! ? or
+    a newline followed by whitespace, so "$2.50" or a trailing "Dallas." at
+    the end of a delta waits for the next one.
+    """
+
+    def __init__(self, min_chars: int = STREAMING_CONFIG["MIN_SENTENCE_CHARS"], max_chars: int = STREAMING_CONFIG["MAX_SENTENCE_CHARS"]):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()]
+            if match.group().startswith(".") and self._ends_in_abbreviation(candidate, self.buffer[match.end():]):
+                continue
+            if len(candidate.strip()) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        while len(self.buffer) > self.max_chars:
+            cut = self._soft_cut(self.buffer)
+            sentences.append(self.buffer[:cut])
+            self.buffer = self.buffer[cut:]
+        return [s for s in (clean_for_speech(s) for s in sentences) if s]
+
+    def flush(self) -> Optional[str]:
+        """Whatever is left once the reply is complete"""
+        rest, self.buffer = clean_for_speech(self.buffer), ""
+        return rest or None
+
+    @staticmethod
+    def _ends_in_abbreviation(candidate: str, following: str) -> bool:
+        words = candidate.rstrip(".").split()
+        if not words:
+            return False
+        word = words[-1].lower().strip("(\"'")
+        if word in NUMBER_ABBREVIATIONS:
+            following = following.lstrip()
+            # Wait for the next word before deciding
+            return not following or following[0].isdigit()
+        return word in ABBREVIATIONS
+
+    def _soft_cut(self, text: str) -> int:
+        cut = 0
+        for match in _SOFT_BREAK.finditer(text, 0, self.max_chars):
+            cut = match.end()
+        return cut or self.max_chars
+
+def ulaw_payload(audio: bytes) -> Optional[bytes]:
+    """
+    Raw 8kHz mono mu-law samples from a WAV file, as Media Streams expects;
+    None for anything else (e.g. MP3 when the TTS audio couldn't be converted).
+    """
+    if len(audio) < 12 or audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return None
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(audio):
+        chunk_id, size = audio[offset:offset + 4], struct.unpack_from("<I", audio, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHI", audio, body)  # format tag, channels, sample rate
+        elif chunk_id == b"data":
+            if fmt != (7, 1, 8000):
+                return None
+            return audio[body:body + size]
+        offset = body + size + (size & 1)
+    return None
+
+async def single_chunk(text: str) -> AsyncIterator[str]:
+    """A fixed reply as a one-piece text stream"""
+    yield text
+
+class ReplyStream:
+    """
+    One spoken reply: sentences are sent to TTS as soon as the LLM finishes
+    them (up to MAX_TTS_IN_FLIGHT at once) and their audio is handed to the
+    Media Streams socket in order, each sentence's pieces as they arrive.
+    Sentences that never got played in full are kept for the Polly fallback.
+    """
+
+    def __init__(self, call_sid: str, text_chunks: AsyncIterator[str], synthesize: Synthesizer):
+        self.call_sid = call_sid
+        self.sentences: List[str] = []
+        self.played = 0
+        self.started_at = time.perf_counter()
+        self.first_audio_at: Optional[float] = None
+        self._synthesis: "asyncio.Queue[Optional[Tuple[str, asyncio.Queue, asyncio.Task]]]" = asyncio.Queue()
+        self._text_done = asyncio.Event()
+        self._slots = asyncio.Semaphore(STREAMING_CONFIG["MAX_TTS_IN_FLIGHT"])
+        self._synthesize = synthesize
+        self._producer = asyncio.create_task(self._produce(text_chunks))
+
+    async def _speak(self, sentence: str, pieces: asyncio.Queue) -> bool:
+        """Queue the sentence's audio as it arrives; True if all of it came through"""
+        rendered = False
+        async with self._slots:
+            try:
+                async for audio in self._synthesize(sentence):
+                    pieces.put_nowait(audio)
+                    rendered = True
+                return rendered
+            except Exception as e:
+                print(f"[VOICE_STREAM] TTS failed for {self.call_sid}: {str(e)}")
+                return False
+            finally:
+                pieces.put_nowait(None)
+
+    def _queue_sentence(self, sentence: str):
+        self.sentences.append(sentence)
+        pieces: asyncio.Queue = asyncio.Queue()
+        self._synthesis.put_nowait((sentence, pieces, asyncio.create_task(self._speak(sentence, pieces))))
+
+    async def _produce(self, text_chunks: AsyncIterator[str]):
+        splitter = SentenceSplitter()
+        try:
+            async for chunk in text_chunks:
+                for sentence in splitter.feed(chunk):
+                    self._queue_sentence(sentence)
+            rest = splitter.flush()
+            if rest:
+                self._queue_sentence(rest)
+        except Exception as e:
+            print(f"[VOICE_STREAM] Reply generation failed for {self.call_sid}: {str(e)}")
+        finally:
+            self._text_done.set()
+            self._synthesis.put_nowait(None)
+
+    async def audio(self) -> AsyncIterator[bytes]:
+        """Audio in order as it is synthesized, stopping at the first sentence TTS couldn't render in full"""
+        while True:
+            item = await self._synthesis.get()
+            if item is None:
+                return
+            _, pieces, task = item
+            while True:
+                audio = await pieces.get()
+                if audio is None:
+                    break
+                if self.first_audio_at is None:
+                    self.first_audio_at = time.perf_counter()
+                yield audio
+            if not await task:
+                return
+            self.played += 1
+
+    async def unspoken(self, timeout: float = STREAMING_CONFIG["TEXT_WAIT_SECONDS"]) -> str:
+        """The rest of the reply once its text is complete (or the wait times out)"""
+        try:
+            await asyncio.wait_for(self._text_done.wait(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[VOICE_STREAM] Reply for {self.call_sid} still generating after {timeout}s")
+        return " ".join(self.sentences[self.played:])
+
+    def time_to_first_audio(self) -> Optional[float]:
+        return None if self.first_audio_at is None else self.first_audio_at - self.started_at
+
+    def cancel(self):
+        self._producer.cancel()
+        while not self._synthesis.empty():
+            item = self._synthesis.get_nowait()
+            if item is not None:
+                item[2].cancel()
+
+class ReplyStreams:
+    """The reply currently being spoken on each streaming call, keyed by call SID"""
+
+    def __init__(self):
+        self._replies: Dict[str, ReplyStream] = {}
+        self.stats_counters: Dict[str, float] = {
+            "replies": 0,
+            "sentences": 0,
+            "sentences_played": 0,
+            "polly_fallbacks": 0,
+            "first_audio_total": 0.0,
+            "first_audio_count": 0,
+        }
+
+    def start(self, call_sid: str, text_chunks: AsyncIterator[str], synthesize: Synthesizer) -> ReplyStream:
+        previous = self.finish(call_sid)
+        if previous is not None:
+            previous.cancel()
+        reply = ReplyStream(call_sid, text_chunks, synthesize)
+        self._replies[call_sid] = reply
+        self.stats_counters["replies"] += 1
+        return reply
+
+    def get(self, call_sid: str) -> Optional[ReplyStream]:
+        return self._replies.get(call_sid)
+
+    def finish(self, call_sid: str) -> Optional[ReplyStream]:
+        """Forget a call's reply, recording how it went"""
+        reply = self._replies.pop(call_sid, None)
+        if reply is None:
+            return None
+        ttfa = reply.time_to_first_audio()
+        if ttfa is not None:
+            self.stats_counters["first_audio_total"] += ttfa
+            self.stats_counters["first_audio_count"] += 1
+        self.stats_counters["sentences"] += len(reply.sentences)
+        self.stats_counters["sentences_played"] += reply.played
+        if reply.played < len(reply.sentences):
+            self.stats_counters["polly_fallbacks"] += 1
+        return reply
+
+    def stats(self) -> Dict[str, object]:
+        counters = dict(self.stats_counters)
+        total, count = counters.pop("first_audio_total"), counters.pop("first_audio_count")
+        counters["avg_time_to_first_audio"] = round(total / count, 3) if count else 0.0
+        counters["active"] = len(self._replies)
+        return counters
+
+# Create a singleton instance
+reply_streams = ReplyStreams()
@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional, Tuple
+import xml.etree.ElementTree as ET
+
+# Namespace used for the load fields in GetMultipleLoadDetailResults responses
+NS_A = "{http://schemas.datacontract.org/2004/07/WebServices.Objects}"
+RESULT_TAG = NS_A + "MultipleLoadDetailResult"
+
+# XML element name -> (load_dict key, is_numeric)
+FIELD_MAP: Dict[str, Tuple[str, bool]] = {
+    "ID": ("id", False),
+    "OriginCity": ("origin_city", False),
+    "OriginState": ("origin_state", False),
+    "DestinationCity": ("destination_city", False),
+    "DestinationState": ("destination_state", False),
+    "Length": ("length", True),
+    "Weight": ("weight", True),
+    "Mileage": ("distance", True),
+    "PickupDate": ("ship_date", False),
+    "DeliveryDate": ("delivery_date", False),
+    "PickupTime": ("pickup_time", False),
+    "DeliveryTime": ("delivery_time", False),
+    "DestinationDistance": ("destination_distance", True),
+    "OriginDistance": ("origin_distance", True),
+    "PointOfContact": ("contact_name", False),
+    "PointOfContactPhone": ("contact_phone", False),
+    "TruckCompanyEmail": ("contact_email", False),
+    "Equipment": ("equipment_type", False),
+    "SpecInfo": ("description", False),
+    "Age": ("age", True),
+    "Stops": ("stops", True),
+    "Credit": ("credit_rating", False),
+    "PaymentAmount": ("payment", True),
+}
+
+# Tag lookup keyed by the fully-qualified name, so each child is a single dict hit
+_TAG_MAP = {NS_A + name: field for name, field in FIELD_MAP.items()}
+
+def safe_float(value: Optional[str]) -> float:
+    """Convert a Truckstop numeric/currency string to float, 0.0 when missing or invalid"""
+    if not value or value.isspace():
+        return 0.0
+    try:
+        return float(value.replace('$', '').replace(',', ''))
+    except (ValueError, TypeError):
+        return 0.0
+
+def _empty_load() -> dict:
+    load = {}
+    for key, is_numeric in FIELD_MAP.values():
+        load[key] = 0.0 if is_numeric else ''
+    return load
+
+def decode_load_element(elem: ET.Element) -> dict:
+    """Build a load dict from one <a:MultipleLoadDetailResult> in a single pass over its children"""
+    load = _empty_load()
+    for child in elem:
+        field = _TAG_MAP.get(child.tag)
+        if field is None:
+            continue
+        key, is_numeric = field
+        text = child.text or ''
+        load[key] = safe_float(text) if is_numeric else text
+    return load
+
+class TruckstopLoadDecoder:
+    """
+    Incremental decoder for GetMultipleLoadDetailResults SOAP responses.
+    Feed it response chunks as they arrive; every completed
+    <a:MultipleLoadDetailResult> is decoded and then dropped from the tree.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack: List[ET.Element] = []
+        self.count = 0
+
+    def feed(self, chunk: bytes) -> List[dict]:
+        """Feed a chunk of the response and return the loads it completed"""
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[dict]:
+        """Signal end of input and return any remaining loads"""
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[dict]:
+        loads = []
+        stack = self._stack
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag != RESULT_TAG:
+                continue
+            loads.append(decode_load_element(elem))
+            self.count += 1
+            # Release the consumed element so memory stays flat on large pages
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+        return loads
+
+def decode_load_results(payload: bytes, chunk_size: int = 65536) -> List[dict]:
+    """Decode a complete response body (used when the payload is already in memory)"""
+    decoder = TruckstopLoadDecoder()
+    loads = []
+    for start in range(0, len(payload), chunk_size):
+        loads.extend(decoder.feed(payload[start:start + chunk_size]))
+    loads.extend(decoder.close())
+    return loads
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import os
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional
+from cachetools import LRUCache
+from app.services.audio_codec import ulaw_wav
+from app.services.persistent_store import PersistentStore
+from app.services.speech_pipeline import STREAMING_CONFIG, SentenceSplitter, ulaw_payload
+
+TTS_CACHE_CONFIG = {
+    "MEMORY_LIMIT_BYTES": int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024))),
+    # Rendered speech only goes stale when the voice or format changes, and those are part of the key
+    "MAX_AGE_SECONDS": int(os.getenv("TTS_CACHE_TTL", str(30 * 24 * 3600))),
+    "PRERENDER": os.getenv("TTS_PRERENDER", "true").lower() == "true",
+}
+
+def normalize_phrase(text: str) -> str:
+    """Whitespace doesn't change how a phrase is spoken"""
+    return " ".join(text.split())
+
+def phrase_segments(text: str) -> List[str]:
+    """
+    The pieces a phrase is synthesized in: sentence by sentence when replies
+    are streamed (what ReplyStream sends to TTS), otherwise the whole phrase.
+    """
+    if not STREAMING_CONFIG["ENABLED"]:
+        return [text]
+    splitter = SentenceSplitter()
+    segments = splitter.feed(text)
+    rest = splitter.flush()
+    return segments + [rest] if rest else segments
+
+class TTSCache:
+    """
+    Synthesized speech by phrase.
+    Tier 1 is an in-process LRU bounded by total bytes, tier 2 a SQLite store
+    shared by all workers that keeps only raw 8kHz mu-law (about 8KB per
+    second of speech). A phrase is written to disk the second time it is
+    spoken, so one-off sentences about a particular load don't pile up
+    there. Fixed phrases registered in fixed_phrases are rendered into both
+    tiers in the background at startup, in the pieces phrase_segments() gives;
+    those in play_phrases are also rendered whole, for <Play>.
+    """
+
+    def __init__(self, namespace: str, memory_limit: int = TTS_CACHE_CONFIG["MEMORY_LIMIT_BYTES"], max_age: int = TTS_CACHE_CONFIG["MAX_AGE_SECONDS"]):
+        self.namespace = namespace
+        self.max_age = max_age
+        self.memory = LRUCache(maxsize=memory_limit, getsizeof=len)
+        self.store = PersistentStore("tts_audio")
+        # Keys in the memory tier that are already on disk
+        self._persisted = LRUCache(maxsize=10000)
+        # Usable from worker threads as well as the event loop
+        self._lock = threading.Lock()
+        self.fixed_phrases: List[str] = []
+        self.play_phrases: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+        self.stats_counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "store_hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "persisted": 0,
+            "too_large": 0,
+            "prerendered": 0,
+            "prerender_errors": 0,
+        }
+
+    def key(self, text: str) -> str:
+        return hashlib.md5(f"{self.namespace}|{normalize_phrase(text)}".encode()).hexdigest()
+
+    def get(self, text: str) -> Optional[bytes]:
+        """Audio as the TTS client renders it (a mu-law WAV), or None"""
+        key = self.key(text)
+        with self._lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.stats_counters["memory_hits"] += 1
+                persist = key not in self._persisted
+        if audio is not None:
+            if persist:
+                self._persist(key, audio)
+            return audio
+
+        stored = self.store.get(key, max_age=self.max_age)
+        if stored is not None:
+            audio = ulaw_wav(stored[0])
+            with self._lock:
+                self.stats_counters["store_hits"] += 1
+                self._remember(key, audio)
+                self._persisted[key] = True
+            return audio
+
+        with self._lock:
+            self.stats_counters["misses"] += 1
+        return None
+
+    def set(self, text: str, audio: bytes):
+        """Remember freshly synthesized audio; it goes to disk if it is asked for again"""
+        with self._lock:
+            self._remember(self.key(text), audio)
+            self.stats_counters["stored"] += 1
+
+    def _persist(self, key: str, audio: bytes):
+        # Only telephony audio is worth keeping; an unconverted MP3 is not what calls should replay
+        payload = ulaw_payload(audio)
+        if payload is not None:
+            self.store.set(key, payload)
+        with self._lock:
+            self._persisted[key] = True
+            if payload is not None:
+                self.stats_counters["persisted"] += 1
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.memory.maxsize:
+            self.stats_counters["too_large"] += 1
+            return
+        self.memory[key] = audio
+
+    def clear(self):
+        with self._lock:
+            self.memory.clear()
+            self._persisted.clear()
+        self.store.purge_older_than(0)
+
+    async def start(self, synthesize: Callable[[str], Awaitable[Optional[bytes]]]):
+        """Render fixed phrases that aren't cached yet, in the background"""
+        self.store.purge_older_than(self.max_age)
+        if TTS_CACHE_CONFIG["PRERENDER"] and self._task is None:
+            self._task = asyncio.create_task(self.prerender(synthesize))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def prerender(self, synthesize: Callable[[str], Awaitable[Optional[bytes]]]) -> int:
+        """One phrase at a time so calls in progress keep their TTS headroom"""
+        rendered = 0
+        segments = dict.fromkeys(
+            [segment for phrase in self.fixed_phrases for segment in phrase_segments(phrase)] + self.play_phrases
+        )
+        for segment in segments:
+            if self.store.get(self.key(segment), max_age=self.max_age) is not None:
+                continue
+            try:
+                audio = await synthesize(segment)
+            except Exception as e:
+                print(f"[TTS_CACHE] Pre-render failed for '{segment[:40]}': {str(e)}")
+                audio = None
+            if audio is None:
+                self.stats_counters["prerender_errors"] += 1
+                continue
+            self._persist(self.key(segment), audio)
+            rendered += 1
+            self.stats_counters["prerendered"] += 1
+        print(f"[TTS_CACHE] Pre-rendered {rendered} of {len(segments)} fixed phrases")
+        return rendered
+
+    def stats(self) -> Dict[str, object]:
+        counters = dict(self.stats_counters)
+        lookups = counters["memory_hits"] + counters["store_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["store_hits"]
+        counters.update({
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": int(self.memory.currsize),
+            "memory_limit_bytes": int(self.memory.maxsize),
+            "store_entries": self.store.count(),
+            "fixed_phrases": len(self.fixed_phrases),
+            "play_phrases": len(self.play_phrases),
+        })
+        return counters
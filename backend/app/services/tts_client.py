@@ -0,0 +1,223 @@
+import asyncio
+import os
+import random
+import time
+from typing import AsyncIterator, Dict, Optional
+import httpx
+from app.services.audio_codec import TELEPHONY_RATE, UlawStreamEncoder, parse_pcm_format, ulaw_wav
+from app.services.http_client import shared_http_client
+from app.services.speech_pipeline import ulaw_payload
+from app.services.voice_service import (
+    ACCEPT_HEADERS, ELEVENLABS_API_KEY, ELEVENLABS_OUTPUT_FORMAT, MODEL_ID, VOICE_ID, to_ulaw_wav, tts_cache
+)
+
+TTS_CLIENT_CONFIG = {
+    "MAX_ATTEMPTS": 3,
+    "BACKOFF_BASE_SECONDS": 0.2,    # full jitter: sleep up to base * 2^attempt, capped
+    "BACKOFF_MAX_SECONDS": 1.0,
+    # Past these the caller speaks with Polly instead
+    "LATENCY_BUDGET_SECONDS": float(os.getenv("TTS_LATENCY_BUDGET", "3.0")),        # a whole clip for <Play>
+    "FIRST_AUDIO_BUDGET_SECONDS": float(os.getenv("TTS_FIRST_AUDIO_BUDGET", "1.5")),  # first audio of a streamed sentence
+}
+
+# Worth another attempt; other errors (bad key, bad voice) won't fix themselves
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+STREAM_URL = f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}/stream"
+
+def streams_incrementally(output_format: str = ELEVENLABS_OUTPUT_FORMAT) -> bool:
+    """PCM and 8kHz mu-law can be passed on as they arrive; MP3 has to be complete for ffmpeg"""
+    codec, rate = parse_pcm_format(output_format)
+    return codec == "pcm" or (codec == "ulaw" and rate == TELEPHONY_RATE)
+
+class ElevenLabsClient:
+    """
+    ElevenLabs text to speech over the shared connection pool.
+    Uses the streaming endpoint so audio is available as soon as the first
+    bytes arrive, retries throttling, server errors and dropped connections
+    with jittered backoff, and gives up on a latency budget so the call can
+    fall back to Polly. Everything it renders goes into tts_cache.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        # Clips that missed their budget, still rendering into the cache
+        self._late: set = set()
+        self.stats_counters: Dict[str, float] = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "budget_fallbacks": 0,
+            "streams": 0,
+            "first_audio_total": 0.0,
+            "render_total": 0.0,
+            "renders": 0,
+        }
+
+    async def _chunks(self, text: str, deadline: float) -> AsyncIterator[bytes]:
+        """Audio bytes in the configured format as they arrive; failed attempts are retried until any audio has been passed on"""
+        headers = {
+            "Accept": ACCEPT_HEADERS.get(parse_pcm_format(ELEVENLABS_OUTPUT_FORMAT)[0], "audio/mpeg"),
+            "Content-Type": "application/json",
+            "xi-api-key": ELEVENLABS_API_KEY or "",
+        }
+        data = {
+            "text": text,
+            "model_id": MODEL_ID,
+            "voice_settings": {
+                "stability": 0.5,
+                "similarity_boost": 0.5
+            }
+        }
+        attempt = 0
+        while True:
+            attempt += 1
+            passed_on = False
+            self.stats_counters["requests"] += 1
+            self.in_flight += 1
+            try:
+                async with shared_http_client.stream(
+                    "POST", STREAM_URL, json=data, headers=headers, params={"output_format": ELEVENLABS_OUTPUT_FORMAT}
+                ) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        raise httpx.HTTPStatusError(
+                            f"ElevenLabs returned {response.status_code}: {body[:200]!r}",
+                            request=response.request, response=response
+                        )
+                    async for chunk in response.aiter_bytes():
+                        passed_on = True
+                        yield chunk
+                return
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUSES
+                delay = random.uniform(0, min(
+                    TTS_CLIENT_CONFIG["BACKOFF_MAX_SECONDS"],
+                    TTS_CLIENT_CONFIG["BACKOFF_BASE_SECONDS"] * 2 ** (attempt - 1)
+                ))
+                if passed_on or not retryable or attempt >= TTS_CLIENT_CONFIG["MAX_ATTEMPTS"] or time.monotonic() + delay >= deadline:
+                    self.stats_counters["errors"] += 1
+                    raise
+                self.stats_counters["retries"] += 1
+                print(f"[TTS] Attempt {attempt} failed ({str(e) or type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            finally:
+                self.in_flight -= 1
+
+    async def _ulaw(self, text: str) -> AsyncIterator[bytes]:
+        """Raw 8kHz mu-law as it arrives (streams_incrementally formats only)"""
+        codec, rate = parse_pcm_format(ELEVENLABS_OUTPUT_FORMAT)
+        encoder = UlawStreamEncoder(rate) if codec == "pcm" else None
+        deadline = time.monotonic() + TTS_CLIENT_CONFIG["LATENCY_BUDGET_SECONDS"]
+        async for chunk in self._chunks(text, deadline):
+            piece = encoder.feed(chunk) if encoder else chunk
+            if piece:
+                yield piece
+        if encoder:
+            rest = encoder.flush()
+            if rest:
+                yield rest
+
+    async def render(self, text: str) -> Optional[bytes]:
+        """
+        Synthesize a phrase as a mu-law WAV (MP3 if it couldn't be converted)
+        and cache it, however long that takes. None if ElevenLabs failed.
+        """
+        if not ELEVENLABS_API_KEY:
+            print("[TTS] ElevenLabs API key not found")
+            return None
+        start_time = time.perf_counter()
+        try:
+            if streams_incrementally():
+                audio = ulaw_wav(b"".join([piece async for piece in self._ulaw(text)]))
+            else:
+                deadline = time.monotonic() + TTS_CLIENT_CONFIG["LATENCY_BUDGET_SECONDS"]
+                raw = b"".join([chunk async for chunk in self._chunks(text, deadline)])
+                audio = await asyncio.to_thread(to_ulaw_wav, raw)
+        except Exception as e:
+            print(f"[TTS] Synthesis failed for '{text[:50]}': {str(e)}")
+            return None
+        self.stats_counters["renders"] += 1
+        self.stats_counters["render_total"] += time.perf_counter() - start_time
+        tts_cache.set(text, audio)
+        return audio
+
+    async def synthesize(self, text: str, budget: float = TTS_CLIENT_CONFIG["LATENCY_BUDGET_SECONDS"]) -> Optional[bytes]:
+        """
+        A whole clip for <Play>, or None to speak with Polly: when ElevenLabs
+        fails or the clip isn't ready within budget seconds. A late clip is
+        still finished in the background and cached for the next time.
+        """
+        if not text:
+            return None
+        cached = tts_cache.get(text)
+        if cached is not None:
+            return cached
+        task = asyncio.create_task(self.render(text))
+        done, _ = await asyncio.wait({task}, timeout=budget)
+        if not done:
+            self._late.add(task)
+            task.add_done_callback(self._late.discard)
+            self.stats_counters["budget_fallbacks"] += 1
+            print(f"[TTS] No audio within {budget}s for '{text[:50]}', falling back to Polly")
+            return None
+        return task.result()
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        """
+        One sentence as raw 8kHz mu-law pieces for Media Streams. Yields
+        nothing when the first audio misses FIRST_AUDIO_BUDGET_SECONDS (the
+        sentence goes to the Polly fallback); raises if the audio breaks off.
+        """
+        cached = tts_cache.get(text)
+        if cached is not None:
+            payload = ulaw_payload(cached)
+            if payload:
+                yield payload
+                return
+        if not ELEVENLABS_API_KEY:
+            return
+        budget = TTS_CLIENT_CONFIG["FIRST_AUDIO_BUDGET_SECONDS"]
+        if not streams_incrementally():
+            audio = await self.synthesize(text, budget)
+            payload = ulaw_payload(audio) if audio else None
+            if payload:
+                yield payload
+            return
+
+        start_time = time.perf_counter()
+        pieces = self._ulaw(text).__aiter__()
+        try:
+            try:
+                first = await asyncio.wait_for(pieces.__anext__(), budget)
+            except asyncio.TimeoutError:
+                self.stats_counters["budget_fallbacks"] += 1
+                print(f"[TTS] No audio within {budget}s for '{text[:50]}', falling back to Polly")
+                return
+            except StopAsyncIteration:
+                return
+            self.stats_counters["streams"] += 1
+            self.stats_counters["first_audio_total"] += time.perf_counter() - start_time
+            parts = [first]
+            yield first
+            async for piece in pieces:
+                parts.append(piece)
+                yield piece
+        finally:
+            await pieces.aclose()
+        tts_cache.set(text, ulaw_wav(b"".join(parts)))
+
+    def stats(self) -> Dict[str, object]:
+        counters = dict(self.stats_counters)
+        first_audio_total, render_total = counters.pop("first_audio_total"), counters.pop("render_total")
+        counters.update({
+            "in_flight": self.in_flight,
+            "avg_time_to_first_audio": round(first_audio_total / counters["streams"], 4) if counters["streams"] else 0.0,
+            "avg_render_time": round(render_total / counters["renders"], 4) if counters["renders"] else 0.0,
+            "latency_budget_seconds": TTS_CLIENT_CONFIG["LATENCY_BUDGET_SECONDS"],
+            "first_audio_budget_seconds": TTS_CLIENT_CONFIG["FIRST_AUDIO_BUDGET_SECONDS"],
+        })
+        return counters
+
+# Create a singleton instance
+elevenlabs_client = ElevenLabsClient()
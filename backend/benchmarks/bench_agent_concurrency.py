@@ -0,0 +1,145 @@
+"""
+Benchmark: N simultaneous simulated voice calls through DispatchAgent.
+
+Each call plays a short scripted conversation (route request, then a
+follow-up question) against a stubbed Anthropic API and a stubbed
+DirectFreight board, both with fixed network latency. Two modes:
+
+  blocking - the LLM stub sleeps synchronously, as the sync SDK did, so
+             every turn stalls the whole event loop
+  async    - the shared AsyncAnthropic client over a mock transport
+
+Reports wall time, per-turn latency and the worst event loop stall seen by
+a 10ms ticker. Nothing leaves the process.
+
+Run from backend/:
+    python -m benchmarks.bench_agent_concurrency
+"""
+import asyncio
+import contextlib
+import io
+import json
+import random
+import statistics
+import time
+
+import anthropic
+import httpx
+
+from app.agent import DispatchAgent
+from app.services.http_client import shared_http_client
+from app.services.llm_client import SharedLLMClient
+
+CALL_COUNTS = [1, 10, 50]
+LLM_LATENCY = 0.25
+BOARD_LATENCY = 0.30
+TICK = 0.01
+SCRIPT = [
+    "Looking for a van load from Dallas Texas to Atlanta Georgia on June 5th 2025, max 45k pounds",
+    "What's the pickup time on that one?",
+]
+EXTRACTED = {
+    "start_city": "Dallas", "start_state": "TX", "dest_city": "Atlanta", "dest_state": "GA",
+    "max_weight": "45000", "truck_type": "V", "date": "2025-06-05",
+}
+
+def stub_reply(prompt: str) -> str:
+    if "extract structured info" in prompt:
+        return json.dumps(EXTRACTED) if "Dallas" in prompt.split("User message:")[-1] else "{}"
+    return "Got a good one out of Dallas paying two sixty a mile. Want it?"
+
+def board_loads(count: int = 40):
+    rng = random.Random(3)
+    return [
+        {
+            "entry_id": f"{i:08d}-load",
+            "origin_city": "Dallas", "origin_state": "TX",
+            "destination_city": "Atlanta", "destination_state": "GA",
+            "trip_miles": rng.randint(700, 900), "pay_rate": rng.randint(1500, 2600),
+            "rate_per_mile_est": round(rng.uniform(1.8, 3.2), 2), "weight": rng.randint(10000, 45000),
+            "ship_date": "2025-06-05", "age": rng.randint(1, 120), "dead_head": rng.randint(0, 80),
+        }
+        for i in range(count)
+    ]
+
+async def anthropic_handler(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(LLM_LATENCY)
+    prompt = json.loads(request.content)["messages"][0]["content"]
+    return httpx.Response(200, json={
+        "id": "msg_bench", "type": "message", "role": "assistant", "model": "stub",
+        "content": [{"type": "text", "text": stub_reply(prompt)}],
+        "stop_reason": "end_turn", "stop_sequence": None,
+        "usage": {"input_tokens": len(prompt) // 4, "output_tokens": 20},
+    })
+
+async def board_handler(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(BOARD_LATENCY)
+    return httpx.Response(200, json={"list": board_loads(), "total_pages": 1})
+
+class BlockingLLM(SharedLLMClient):
+    """What the sync SDK did: the calling coroutine holds the loop for the whole round trip"""
+
+    async def complete(self, prompt: str, max_tokens: int = 500, **kwargs) -> str:
+        time.sleep(LLM_LATENCY)
+        return stub_reply(prompt)
+
+class StubbedLLM(SharedLLMClient):
+    """The real shared async client, with every API key routed to the mock transport"""
+
+    def client_for(self, api_key=None) -> anthropic.AsyncAnthropic:
+        if "stub" not in self._clients:
+            self._clients["stub"] = anthropic.AsyncAnthropic(
+                api_key="stub",
+                http_client=httpx.AsyncClient(transport=httpx.MockTransport(anthropic_handler))
+            )
+        return self._clients["stub"]
+
+async def simulate_call(call_id: int, llm: SharedLLMClient, turn_times: list):
+    agent = DispatchAgent()
+    agent.llm = llm
+    for utterance in SCRIPT:
+        start = time.perf_counter()
+        await agent.process_input(utterance, call_sid=f"CA{call_id:04d}")
+        turn_times.append(time.perf_counter() - start)
+
+async def run(mode: str, calls: int):
+    llm = BlockingLLM() if mode == "blocking" else StubbedLLM()
+    turn_times = []
+    worst_stall = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal worst_stall
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(TICK)
+            now = time.perf_counter()
+            worst_stall = max(worst_stall, now - last - TICK)
+            last = now
+
+    tick_task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(simulate_call(i, llm, turn_times) for i in range(calls)))
+    wall = time.perf_counter() - start
+    done.set()
+    await tick_task
+    with contextlib.redirect_stdout(io.StringIO()):
+        await llm.close()
+
+    turn_times.sort()
+    p95 = turn_times[min(len(turn_times) - 1, int(len(turn_times) * 0.95))]
+    print(f"{mode:>8} {calls:>6} | {wall:>8.2f} {statistics.median(turn_times) * 1000:>9.0f} "
+          f"{p95 * 1000:>9.0f} {worst_stall * 1000:>10.0f}")
+
+async def main():
+    shared_http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(board_handler))
+    print(f"LLM latency {LLM_LATENCY * 1000:.0f}ms, board latency {BOARD_LATENCY * 1000:.0f}ms, {len(SCRIPT)} turns per call")
+    print(f"{'mode':>8} {'calls':>6} | {'wall s':>8} {'p50 ms':>9} {'p95 ms':>9} {'stall ms':>10}")
+    for calls in CALL_COUNTS:
+        for mode in ("blocking", "async"):
+            await run(mode, calls)
+    await shared_http_client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark: alert engine matching vs a per-subscriber linear scan.
+
+Builds N active voice-preference subscriptions spread over real gazetteer
+cities and matches a 1,000-load batch against them. The linear scan checks
+every (subscription, load) pair in Python, as a naive implementation would,
+and is only run on the smaller sizes; it is also used to verify the index.
+
+Run from backend/:
+    python -m benchmarks.bench_alert_engine
+"""
+import math
+import random
+import time
+
+import numpy as np
+
+from app.services.alert_engine import ALERT_CONFIG, AlertEngine, SubscriptionIndex
+from app.services.geocoding_service import get_gazetteer
+
+SUBSCRIPTION_COUNTS = [1000, 5000, 20000]
+LINEAR_SCAN_MAX = 5000
+BATCH_SIZE = 1000
+EQUIPMENT = ["V", "R", "F"]
+
+def city_pool(size: int = 2000):
+    """The most populous gazetteer cities, weighted toward freight hubs the way real traffic is"""
+    gazetteer = get_gazetteer()
+    rows = np.argsort(-gazetteer.populations)[:size]
+    return [(gazetteer.names[r], gazetteer.states[r]) for r in rows]
+
+def build_subscriptions(count: int, cities, rng):
+    return [
+        {
+            "user_id": f"user{i}@example.com",
+            "is_active": True,
+            "phone_number": f"+1555{i:07d}",
+            "truck_type": rng.choice(EQUIPMENT),
+            "origin_city": city,
+            "origin_state": state,
+            "min_rate_per_mile": round(rng.uniform(1.5, 3.0), 2),
+            "max_deadhead": rng.choice([0, 50, 100, 150, 250]),
+        }
+        for i, (city, state) in enumerate(rng.choices(cities, k=count))
+    ]
+
+def build_loads(count: int, cities, rng):
+    loads = []
+    for i, ((o_city, o_state), (d_city, d_state)) in enumerate(zip(rng.choices(cities, k=count), rng.choices(cities, k=count))):
+        loads.append({
+            "id": f"L{i}",
+            "origin_city": o_city,
+            "origin_state": o_state,
+            "destination_city": d_city,
+            "destination_state": d_state,
+            "equipment_type": rng.choice(EQUIPMENT),
+            "rate_per_mile_est": round(rng.uniform(1.0, 4.0), 2),
+            "distance": float(rng.randint(100, 1500)),
+            "ship_date": "2025-06-05",
+        })
+    return loads
+
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 3958.8 * math.asin(math.sqrt(a))
+
+def linear_scan(subscriptions, loads):
+    """Every subscriber checks every load"""
+    gazetteer = get_gazetteer()
+    matches = set()
+    for sub in subscriptions:
+        sub_coords = gazetteer.lookup(sub["origin_city"], sub["origin_state"])
+        radius = sub["max_deadhead"] or ALERT_CONFIG["DEFAULT_MAX_DEADHEAD"]
+        for load in loads:
+            if load["equipment_type"] != sub["truck_type"] or load["rate_per_mile_est"] < sub["min_rate_per_mile"]:
+                continue
+            load_coords = gazetteer.lookup(load["origin_city"], load["origin_state"])
+            if haversine(*sub_coords, *load_coords) <= radius:
+                matches.add((sub["user_id"], load["id"]))
+    return matches
+
+def main():
+    rng = random.Random(5)
+    cities = city_pool()
+    loads = build_loads(BATCH_SIZE, cities, rng)
+
+    print(f"{BATCH_SIZE} loads per batch")
+    print(f"{'subs':>6} | {'index build ms':>14} {'match ms':>9} {'evaluate ms':>12} {'matches':>8} | {'linear ms':>10}")
+    for count in SUBSCRIPTION_COUNTS:
+        subscriptions = build_subscriptions(count, cities, rng)
+
+        start = time.perf_counter()
+        index = SubscriptionIndex(subscriptions)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        subs, load_rows, _, _ = index.match(loads)
+        match_ms = (time.perf_counter() - start) * 1000
+        found = {(index.preferences[row]["user_id"], loads[j]["id"]) for row, j in zip(subs, load_rows)}
+
+        # Full per-batch path: match, rate limit, dedupe, build notifications
+        engine = AlertEngine()
+        engine.load_subscriptions(subscriptions)
+        start = time.perf_counter()
+        engine.evaluate(loads)
+        evaluate_ms = (time.perf_counter() - start) * 1000
+
+        linear = "-"
+        if count <= LINEAR_SCAN_MAX:
+            start = time.perf_counter()
+            expected = linear_scan(subscriptions, loads)
+            linear = f"{(time.perf_counter() - start) * 1000:.0f}"
+            assert found == expected, f"index found {len(found)} matches, linear scan {len(expected)}"
+
+        print(f"{count:>6} | {build_ms:>14.0f} {match_ms:>9.1f} {evaluate_ms:>12.1f} {len(found):>8} | {linear:>10}")
+
+if __name__ == "__main__":
+    main()
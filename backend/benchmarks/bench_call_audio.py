@@ -0,0 +1,85 @@
+"""
+Benchmark: serving a call's synthesized utterance to Twilio.
+
+  legacy - what /calls/stream used to do per request (minus re-synthesizing
+           "Loading..."): probe `ffmpeg -version` in a subprocess, copy the
+           clip into a BytesIO and send it through StreamingResponse
+  store  - CallAudioStore clip served as a memoryview, from memory and from
+           a memory-mapped spool file, full and as a byte range
+
+Checks every response body byte for byte and that ending the call frees
+its clips and spool files.
+
+Run from backend/:
+    python -m benchmarks.bench_call_audio
+"""
+import io
+import os
+import statistics
+import subprocess
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.routers import calls
+from app.services.audio_store import AUDIO_STORE_CONFIG, CallAudioStore
+
+REQUESTS = 200
+CLIP_SECONDS = 8    # a typical reply, 8kHz mu-law
+CALLS = 50
+
+def legacy_app(audio: bytes) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy/{call_sid}")
+    async def legacy(call_sid: str):
+        try:
+            subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
+            is_mulaw = True
+        except (subprocess.SubprocessError, FileNotFoundError):
+            is_mulaw = False
+        audio_stream = io.BytesIO(audio)
+        media_type = 'audio/x-mulaw;rate=8000' if is_mulaw else 'audio/mpeg'
+        return StreamingResponse(audio_stream, media_type=media_type, headers={'Content-Length': str(len(audio))})
+
+    return app
+
+def timed(client: TestClient, url: str, expected: bytes, headers=None) -> float:
+    times = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers or {})
+        times.append(time.perf_counter() - start)
+        assert response.content == expected, f"{url}: body mismatch"
+    return statistics.median(times) * 1000
+
+def main():
+    clip = b"RIFF\x00\x00\x00\x00WAVE" + os.urandom(CLIP_SECONDS * 8000)
+    store = CallAudioStore(memory_limit=CALLS * len(clip) // 2)
+    calls.call_audio_store = store
+    app = legacy_app(clip)
+    app.include_router(calls.router)
+    client = TestClient(app)
+
+    for i in range(CALLS):
+        store.put(f"CA{i:03d}", clip)
+    stats = store.stats()
+    print(f"{CALLS} calls x {len(clip)} byte clips, memory limit {store.memory_limit} bytes")
+    print(f"  in memory {stats['memory_bytes']} bytes, spooled {stats['spooled_bytes']} bytes, spilled {stats['spilled']}")
+
+    print(f"{'path':>18} | {'p50 ms':>7}")
+    print(f"{'legacy':>18} | {timed(client, '/legacy/CA000', clip):>7.2f}")
+    print(f"{'store (mmap)':>18} | {timed(client, '/calls/stream/CA000', clip):>7.2f}")
+    print(f"{'store (memory)':>18} | {timed(client, f'/calls/stream/CA{CALLS - 1:03d}', clip):>7.2f}")
+    print(f"{'store (range 4KB)':>18} | {timed(client, '/calls/stream/CA000', clip[1000:5096], {'Range': 'bytes=1000-5095'}):>7.2f}")
+
+    for i in range(CALLS):
+        store.end_call(f"CA{i:03d}")
+    leftover = os.listdir(store.spool_dir) if os.path.isdir(store.spool_dir) else []
+    print(f"after calls end: {store.stats()['clips']} clips, {len(leftover)} spool dirs in {AUDIO_STORE_CONFIG['SPOOL_DIR']}")
+    assert store.stats()["clips"] == 0 and store.memory_bytes == 0 and not leftover
+
+if __name__ == "__main__":
+    main()
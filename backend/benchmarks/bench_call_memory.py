@@ -0,0 +1,102 @@
+"""
+Benchmark: per-call conversation memory and idle agent eviction.
+
+Drives a long simulated call (driver/Skye turns, with the occasional pasted
+wall of text) through the agent's ConversationMemory stores and through the
+old unbounded message lists, reporting characters held and the cost of
+building the prompt transcript per turn. Then fills CallSessions with calls
+that never post a terminal status and checks they are evicted once idle.
+Fails if memory exceeds its budget or idle calls survive the TTL.
+
+Run from backend/:
+    python -m benchmarks.bench_call_memory
+"""
+import random
+import time
+
+from app.services.call_sessions import CallSessions
+from app.services.conversation_memory import MEMORY_CONFIG, ConversationMemory
+
+TURNS = 2000
+IDLE_CALLS = 300
+
+DRIVER_LINES = [
+    "I'm empty in Dallas with a reefer",
+    "what else you got",
+    "how much does that one pay",
+    "can you find something going to Atlanta on Friday",
+    "yeah that works, what's the pickup time",
+]
+
+class FakeAgent:
+    """Just the two history stores DispatchAgent keeps"""
+
+    def __init__(self):
+        self.chat_history = ConversationMemory()
+        self.extraction_history = ConversationMemory()
+
+    def memory_stats(self):
+        return {"memory_chars": self.chat_history.stats()["chars"] + self.extraction_history.stats()["chars"]}
+
+def legacy_transcript(history):
+    return "\n".join(
+        f"{'Driver' if m['role'] == 'user' else 'Skye'}: {m['content'][0]['text']}" for m in history[-5:]
+    )
+
+def main():
+    rng = random.Random(7)
+    agent = FakeAgent()
+    legacy = []
+    peak = 0
+    bounded_s = legacy_s = 0.0
+    for turn in range(TURNS):
+        said = rng.choice(DRIVER_LINES)
+        if turn % 97 == 0:
+            said = said + " " + "and the broker said " * 300   # long rambling transcription
+        reply = f"I found a load from Dallas to Atlanta paying ${rng.randint(1500, 4000)}, {rng.randint(200, 900)} miles out."
+
+        start = time.perf_counter()
+        for role, text in (("user", said), ("assistant", reply)):
+            agent.chat_history.append(role, text)
+            agent.extraction_history.append(role, text)
+        agent.chat_history.render(5)
+        agent.extraction_history.render(5, {"user": "User"})
+        bounded_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for role, text in (("user", said), ("assistant", reply)):
+            message = {"role": role, "content": [{"type": "text", "text": text}]}
+            legacy.append(message)
+            legacy.append(message)
+        legacy_transcript(legacy)
+        legacy_s += time.perf_counter() - start
+
+        peak = max(peak, agent.memory_stats()["memory_chars"])
+
+    legacy_chars = sum(len(m["content"][0]["text"]) for m in legacy)
+    print(f"{TURNS} turns, budget {MEMORY_CONFIG['MAX_CHARS']} chars per store")
+    print(f"{'history':>9} | {'chars held':>10} {'us/turn':>8}")
+    print(f"{'legacy':>9} | {legacy_chars:>10} {legacy_s * 1e6 / TURNS:>8.1f}")
+    print(f"{'bounded':>9} | {peak:>10} {bounded_s * 1e6 / TURNS:>8.1f}")
+    print(f"summary: {agent.chat_history.summary[:160]}...")
+    print(f"chat store: {agent.chat_history.stats()}")
+    assert peak <= 2 * MEMORY_CONFIG["MAX_CHARS"], "per-call memory exceeded its budget"
+
+    sessions = CallSessions(idle_ttl=60, max_calls=1000)
+    for i in range(IDLE_CALLS):
+        sessions[f"CA{i:04d}"] = FakeAgent()
+    sessions["CAlive"] = agent
+    now = time.time()
+    # Simulate the clock moving on: only the live call kept getting webhooks
+    for call_sid in sessions.keys():
+        if call_sid != "CAlive":
+            sessions._sessions[call_sid] = (sessions._sessions[call_sid][0], now - 120)
+    start = time.perf_counter()
+    evicted = sessions.evict_idle()
+    sweep_ms = (time.perf_counter() - start) * 1000
+    print(f"idle sweep: evicted {evicted}/{IDLE_CALLS + 1} calls in {sweep_ms:.2f}ms, {len(sessions)} left")
+    print(f"sessions: { {k: v for k, v in sessions.stats().items() if k != 'largest_calls'} }")
+    assert evicted == IDLE_CALLS and "CAlive" in sessions, "idle calls were not evicted"
+
+if __name__ == "__main__":
+    main()
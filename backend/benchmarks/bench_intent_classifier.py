@@ -0,0 +1,138 @@
+"""
+Benchmark: DispatchAgent intent routing on a labeled utterance set.
+
+Compares the IntentClassifier phrase trie with the old routing (four phrase
+lists scanned with substring checks in a fixed order, lowercasing the input
+for each list). Each utterance is labeled with the intent the agent should
+act on given its state (loads offered, load booked), or None when the turn
+should go on to slot extraction. Fails if the classifier gets any label
+wrong; the old routing's misfires are listed for comparison.
+
+Run from backend/:
+    python -m benchmarks.bench_intent_classifier
+"""
+import time
+
+from app.services.intent_classifier import intent_classifier
+
+REPEATS = 2000
+
+LEGACY_NEXT = ['next load', 'another load', 'different load', 'what else', 'other loads', 'show more',
+               'more loads', 'what other', 'got anything else', 'other options']
+LEGACY_ENDING = ['that\'s it', 'thanks', 'thank you', 'bye', 'goodbye', 'done', 'that\'s all',
+                 'have a good day', 'see you', 'take care']
+LEGACY_DELETE = ['remove that load', 'delete that load', 'cancel that load', 'remove the load', 'delete the load',
+                 'cancel the load', 'remove it', 'delete it', 'cancel it', 'take it off', 'remove this load',
+                 'delete this load', 'cancel this load']
+LEGACY_BOOKING = ['book it', 'lets book', 'book this', 'get it booked', 'take it', 'ill take it', 'sounds good',
+                  'book that', 'get me booked', 'yes', 'yeah', 'sure', 'okay', 'ok', 'great', 'perfect',
+                  'that works', 'that\'ll work', 'i\'ll take that', 'book it', 'go ahead', 'do it', 'yes please',
+                  'that\'s good', 'that sounds good', 'that\'ll be great', 'that\'s great', 'i\'ll be great',
+                  'that\'s perfect', 'let\'s do it', 'let\'s go with that']
+
+def legacy_intent(user_input: str, has_loads: bool, has_booking: bool):
+    """The routing process_input used before IntentClassifier, in its original order"""
+    if user_input.lower() in ['hi', 'hello', 'hey', 'start', 'begin', 'hi there']:
+        return "greeting"
+    if user_input.lower() in ['quit', 'exit', 'stop', 'end', 'goodbye', 'bye']:
+        return "quit"
+    if any(phrase in user_input.lower() for phrase in LEGACY_NEXT) and has_loads:
+        return "next_load"
+    if any(phrase in user_input.lower() for phrase in LEGACY_ENDING):
+        return "end_call"
+    if any(phrase in user_input.lower() for phrase in LEGACY_DELETE) and has_booking:
+        return "delete_load"
+    if any(phrase in user_input.lower().replace("'", "") for phrase in LEGACY_BOOKING) and has_loads:
+        return "book_load"
+    return None
+
+def agent_intent(user_input: str, has_loads: bool, has_booking: bool):
+    """Same state gating as DispatchAgent.process_input; confirm and book_load share the booking branch"""
+    allowed = {"greeting", "quit", "end_call"}
+    if has_loads:
+        allowed |= {"next_load", "book_load", "confirm"}
+    if has_booking:
+        allowed.add("delete_load")
+    intent = intent_classifier.classify(user_input, allowed)
+    return "book_load" if intent == "confirm" else intent
+
+OFFERED = (True, False)   # a load has been offered
+BOOKED = (True, True)     # ... and booked
+FRESH = (False, False)    # nothing offered yet
+
+# (utterance, (has_loads, has_booking), expected intent)
+LABELED = [
+    ("hi", FRESH, "greeting"),
+    ("Hello", FRESH, "greeting"),
+    ("Hello.", FRESH, "greeting"),
+    ("hi there", FRESH, "greeting"),
+    ("bye", FRESH, "quit"),
+    ("Goodbye!", OFFERED, "quit"),
+    ("thanks, book it", OFFERED, "book_load"),
+    ("thank you, I'll take it", OFFERED, "book_load"),
+    ("book it", OFFERED, "book_load"),
+    ("let's do it", OFFERED, "book_load"),
+    ("that'll work", OFFERED, "book_load"),
+    ("yes please", OFFERED, "book_load"),
+    ("yeah go ahead", OFFERED, "book_load"),
+    ("sounds good", OFFERED, "book_load"),
+    ("ok", OFFERED, "book_load"),
+    ("perfect", OFFERED, "book_load"),
+    ("great, thanks, bye", OFFERED, "end_call"),
+    ("thanks that's all", OFFERED, "end_call"),
+    ("thank you", FRESH, "end_call"),
+    ("that's it for today", BOOKED, "end_call"),
+    ("have a good day", BOOKED, "end_call"),
+    ("what else you got", OFFERED, "next_load"),
+    ("yes but show me another load", OFFERED, "next_load"),
+    ("ok what other options are there", OFFERED, "next_load"),
+    ("got anything else", OFFERED, "next_load"),
+    ("cancel it", BOOKED, "delete_load"),
+    ("please remove that load, thanks", BOOKED, "delete_load"),
+    ("take it off my list", BOOKED, "delete_load"),
+    ("delete the load", BOOKED, "delete_load"),
+    ("I'm looking for a reefer out of Dallas", FRESH, None),
+    ("looking for a book load", OFFERED, None),
+    ("I was there yesterday", OFFERED, None),
+    ("what's the pickup time", OFFERED, None),
+    ("I need to get to Tokyo", OFFERED, None),
+    ("that's a long haul, what's the rate", OFFERED, None),
+    ("yes", FRESH, None),
+    ("next load", FRESH, None),
+    ("cancel it", OFFERED, None),
+    ("I'm going to Oklahoma City", OFFERED, None),
+    ("the weight is okay around 40k", FRESH, None),
+]
+
+def main():
+    wrong = []
+    legacy_wrong = []
+    for utterance, (has_loads, has_booking), expected in LABELED:
+        got = agent_intent(utterance, has_loads, has_booking)
+        if got != expected:
+            wrong.append((utterance, expected, got))
+        legacy = legacy_intent(utterance, has_loads, has_booking)
+        if legacy != expected:
+            legacy_wrong.append((utterance, expected, legacy))
+
+    timings = {}
+    for name, route in (("legacy", legacy_intent), ("trie", agent_intent)):
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            for utterance, (has_loads, has_booking), _ in LABELED:
+                route(utterance, has_loads, has_booking)
+        timings[name] = (time.perf_counter() - start) * 1e6 / (REPEATS * len(LABELED))
+
+    print(f"{len(LABELED)} labeled utterances")
+    print(f"{'router':>9} | {'correct':>8} {'us/turn':>8}")
+    print(f"{'legacy':>9} | {len(LABELED) - len(legacy_wrong):>4}/{len(LABELED):<3} {timings['legacy']:>8.1f}")
+    print(f"{'trie':>9} | {len(LABELED) - len(wrong):>4}/{len(LABELED):<3} {timings['trie']:>8.1f}")
+    print("legacy misfires:")
+    for utterance, expected, got in legacy_wrong:
+        print(f"  {utterance!r}: expected {expected}, got {got}")
+    for utterance, expected, got in wrong:
+        print(f"  WRONG {utterance!r}: expected {expected}, got {got}")
+    assert not wrong, f"{len(wrong)} utterances misclassified"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark: per-load Python scoring vs the vectorized scoring module.
+
+Covers the three ranking paths on 10k-load batches:
+  - Truckstop absolute score (old async calculate_load_score, minus its prints)
+  - DirectFreight relative ranking (old find_best_loads normalize/score closure)
+  - Backhaul pair score (old async total_score) for one outbound vs 10k returns
+
+Run from backend/:
+    python -m benchmarks.bench_scoring
+"""
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from app.services.scoring import (
+    DIRECT_FREIGHT_RANK_WEIGHTS,
+    backhaul_pair_scores,
+    column,
+    columns,
+    relative_rank_scores,
+    score_direct_freight_loads,
+    score_truckstop_loads,
+    truckstop_scores,
+)
+
+BATCH_SIZE = 10000
+
+def build_loads(count: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    loads = []
+    for i in range(count):
+        distance = float(rng.randint(50, 2500))
+        loads.append({
+            "id": str(i),
+            "rate_per_mile_est": round(rng.uniform(0.5, 5.5), 2) if rng.random() > 0.05 else 0.0,
+            "distance": distance,
+            # The old scorer fails on age 0 / missing stops, so keep the fixture in its safe range
+            "age": float(rng.randint(1, 48)),
+            "stops": rng.randint(0, 4),
+            "origin_distance": float(rng.randint(0, 150)),
+            "destination_distance": float(rng.randint(0, 150)),
+            "deadhead_miles": 0.0,
+            "length": float(rng.choice([26, 40, 48, 53])),
+            "weight": float(rng.randint(5000, 45000)),
+            "dead_head": float(rng.randint(0, 150)),
+        })
+        loads[-1]["deadhead_miles"] = loads[-1]["origin_distance"] + loads[-1]["destination_distance"]
+    return loads
+
+async def legacy_truckstop_score(load_data: dict) -> float:
+    rate = load_data.get('rate_per_mile_est', 0)
+    if not rate or rate <= 0:
+        return 0.0
+    score = 0.0
+    score += min(rate / 5.0, 1.0) * 0.45
+    distance = load_data.get('distance', 0)
+    if distance > 0:
+        distance_score = max(0, min(1.0 - abs(distance - 500) / 1000, 1))
+        score += distance_score * 0.25
+    if load_data.get('age', 0) > 0:
+        score += (1.0 - min(load_data['age'] / 48, 1)) * 0.15
+    if load_data.get('stops') is not None:
+        score += (1.0 - min(load_data['stops'] / 3, 1)) * 0.05
+    score += (1.0 - min(load_data.get('deadhead_miles', 0) / 300, 1.0)) * 0.10
+    return min(max(score, 0), 1)
+
+async def legacy_truckstop(loads):
+    return [await legacy_truckstop_score(load) for load in loads]
+
+def legacy_direct_freight(loads):
+    criteria_weights = [("length", -0.2), ("weight", -0.1), ("rate_per_mile_est", 0.4), ("dead_head", -0.2), ("age", -0.1)]
+    criteria = []
+    for key, weight in criteria_weights:
+        values = [load.get(key, 0) or 0 for load in loads]
+        criteria.append((key, weight, min(values), max(values)))
+
+    def normalize(value, min_val, max_val):
+        if max_val == min_val:
+            return 0
+        return (value - min_val) / (max_val - min_val)
+
+    def score(load):
+        return sum(weight * normalize(load.get(key, 0) or 0, lo, hi) for key, weight, lo, hi in criteria)
+
+    return [score(load) for load in loads]
+
+async def legacy_total_score(outbound_load, return_load):
+    deadhead_miles = outbound_load.get('origin_distance', 0) + return_load.get('origin_distance', 0) + return_load.get('destination_distance', 0)
+    total_distance = deadhead_miles + outbound_load.get('distance', 0) + return_load.get('distance', 0)
+    total_revenue = outbound_load.get('rate_per_mile_est', 0) * outbound_load.get('distance', 0) + return_load.get('rate_per_mile_est', 0) * return_load.get('distance', 0)
+    estimate_1 = (outbound_load.get('distance', 0) + outbound_load.get('origin_distance', 0) + return_load.get('origin_distance', 0)) // 550 + (return_load.get('distance', 0) + return_load.get('destination_distance', 0)) // 550
+    estimate_2 = (outbound_load.get('distance', 0) + outbound_load.get('origin_distance', 0)) // 550 + (return_load.get('distance', 0) + return_load.get('destination_distance', 0) + return_load.get('origin_distance', 0)) // 550
+    estimated_days = 2 + min(estimate_1, estimate_2)
+    return total_revenue / total_distance + 0.004 * total_revenue / estimated_days
+
+async def legacy_backhaul(outbound, returns):
+    return [await legacy_total_score(outbound, r) for r in returns]
+
+def vector_backhaul(outbound, returns):
+    fields = ("distance", "origin_distance", "destination_distance", "rate_per_mile_est")
+    return backhaul_pair_scores(outbound, columns(returns, fields))["combined_score"]
+
+def best_of(fn, repeat: int = 5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    loads = build_loads(BATCH_SIZE)
+    outbound = loads[0]
+    returns = [load for load in loads[1:] if load["rate_per_mile_est"] > 0]
+
+    # Pre-built columns isolate the scoring kernel from dict -> array extraction
+    truckstop_columns = (
+        column(loads, "rate_per_mile_est"), column(loads, "distance"), column(loads, "age", np.nan),
+        column(loads, "stops", np.nan), column(loads, "deadhead_miles"),
+    )
+    direct_freight_columns = columns(loads, DIRECT_FREIGHT_RANK_WEIGHTS)
+    return_columns = columns(returns, ("distance", "origin_distance", "destination_distance", "rate_per_mile_est"))
+
+    cases = [
+        ("truckstop", lambda: asyncio.run(legacy_truckstop(loads)), lambda: score_truckstop_loads(loads),
+         lambda: truckstop_scores(*truckstop_columns)),
+        ("direct_freight", lambda: legacy_direct_freight(loads), lambda: score_direct_freight_loads(loads),
+         lambda: relative_rank_scores(direct_freight_columns, DIRECT_FREIGHT_RANK_WEIGHTS)),
+        ("backhaul_pairs", lambda: asyncio.run(legacy_backhaul(outbound, returns)), lambda: vector_backhaul(outbound, returns),
+         lambda: backhaul_pair_scores(outbound, return_columns)["combined_score"]),
+    ]
+
+    print(f"{BATCH_SIZE} loads per batch")
+    print(f"{'path':<16} {'legacy ms':>10} {'vector ms':>10} {'kernel ms':>10} {'speedup':>8}")
+    for name, legacy_fn, vector_fn, kernel_fn in cases:
+        legacy_time, legacy_scores = best_of(legacy_fn)
+        vector_time, vector_scores = best_of(vector_fn)
+        kernel_time, _ = best_of(kernel_fn)
+        assert np.allclose(legacy_scores, vector_scores), f"{name}: scores disagree"
+        print(
+            f"{name:<16} {legacy_time * 1000:>10.2f} {vector_time * 1000:>10.2f} "
+            f"{kernel_time * 1000:>10.2f} {legacy_time / vector_time:>7.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark: rule-based fast-path slot extraction on a labeled caller corpus.
+
+Each utterance is labeled with the slots the LLM extraction prompt should
+return, or with None when the fast path is expected to hand the turn to
+the LLM (ambiguous, conflicting or outside its vocabulary). Reports the
+fast-path hit rate, accuracy on the turns it takes, how often it declines
+when it should have answered, and parse time per turn. Fails if any
+fast-path answer disagrees with its label: a wrong fast answer costs more
+than an LLM round trip.
+
+Run from backend/:
+    python -m benchmarks.bench_slot_extractor
+"""
+import time
+from datetime import datetime
+
+from app.services.slot_extractor import FAST_PATH_CONFIG, extract_slots
+
+TODAY = datetime(2025, 6, 2)  # a Monday
+LLM_EXTRACTION_MS = 700        # typical claude-3-haiku extraction round trip
+REPEATS = 200
+
+DFW = {"start_city": "Dallas", "start_state": "TX"}
+
+# (utterance, context args already collected, expected slots or None for "use the LLM")
+CORPUS = [
+    ("reefer out of Dallas Friday, 44k", {}, {**DFW, "truck_type": "R", "date": "2025-06-06", "max_weight": "44000"}),
+    ("Looking for loads from SF to LA leaving June 4th 2025", {}, {
+        "start_city": "San Francisco", "start_state": "CA", "dest_city": "Los Angeles", "dest_state": "CA", "date": "2025-06-04"}),
+    ("Got a reefer, max 45k pounds", {}, {"truck_type": "R", "max_weight": "45000"}),
+    ("Change it to Dallas", DFW, {"dest_city": "Dallas", "dest_state": "TX"}),
+    ("I'm empty in Fresno California, need a flatbed to Phoenix tomorrow", {}, {
+        "start_city": "Fresno", "start_state": "CA", "dest_city": "Phoenix", "dest_state": "AZ", "truck_type": "F", "date": "2025-06-03"}),
+    ("headed to Salt Lake City Utah on 6/10", DFW, {"dest_city": "Salt Lake City", "dest_state": "UT", "date": "2025-06-10"}),
+    ("van, 42,000 lbs, Memphis TN to Nashville TN next monday", {}, {
+        "start_city": "Memphis", "start_state": "TN", "dest_city": "Nashville", "dest_state": "TN",
+        "truck_type": "V", "max_weight": "42000", "date": "2025-06-09"}),
+    ("I need to go to Columbus", DFW, {"dest_city": "Columbus", "dest_state": "OH"}),
+    ("dry van out of Atlanta", {}, {"start_city": "Atlanta", "start_state": "GA", "truck_type": "V"}),
+    ("Chicago", {}, {"start_city": "Chicago", "start_state": "IL"}),
+    ("Houston", DFW, {"dest_city": "Houston", "dest_state": "TX"}),
+    ("tomorrow", DFW, {"date": "2025-06-03"}),
+    ("today", DFW, {"date": "2025-06-02"}),
+    ("Wednesday", DFW, {"date": "2025-06-04"}),
+    ("this friday", DFW, {"date": "2025-06-06"}),
+    ("next friday", DFW, {"date": "2025-06-13"}),
+    ("the 15th", DFW, {"date": "2025-06-15"}),
+    ("June 20th", DFW, {"date": "2025-06-20"}),
+    ("pickup on 2025-06-07", DFW, {"date": "2025-06-07"}),
+    ("45000 pounds", DFW, {"max_weight": "45000"}),
+    ("about 40 thousand pounds", DFW, {"max_weight": "40000"}),
+    ("max weight 38,000", DFW, {"max_weight": "38000"}),
+    ("a reefer", DFW, {"truck_type": "R"}),
+    ("I'm pulling a flatbed", DFW, {"truck_type": "F"}),
+    ("flat bed", DFW, {"truck_type": "F"}),
+    ("refrigerated trailer", DFW, {"truck_type": "R"}),
+    ("from Denver to Kansas City Missouri", {}, {
+        "start_city": "Denver", "start_state": "CO", "dest_city": "Kansas City", "dest_state": "MO"}),
+    ("Denver to Omaha Nebraska day after tomorrow", {}, {
+        "start_city": "Denver", "start_state": "CO", "dest_city": "Omaha", "dest_state": "NE", "date": "2025-06-04"}),
+    ("leaving Seattle headed to Portland Oregon", {}, {
+        "start_city": "Seattle", "start_state": "WA", "dest_city": "Portland", "dest_state": "OR"}),
+    ("going to Boston", DFW, {"dest_city": "Boston", "dest_state": "MA"}),
+    ("out of Philly", {}, {"start_city": "Philadelphia", "start_state": "PA"}),
+    ("to Vegas", DFW, {"dest_city": "Las Vegas", "dest_state": "NV"}),
+    ("I'm in Miami with a reefer looking for something going to Atlanta on Thursday", {}, {
+        "start_city": "Miami", "start_state": "FL", "dest_city": "Atlanta", "dest_state": "GA", "truck_type": "R", "date": "2025-06-05"}),
+    ("Laredo Texas to Chicago", {}, {
+        "start_city": "Laredo", "start_state": "TX", "dest_city": "Chicago", "dest_state": "IL"}),
+    ("picking up in St. Louis", {}, {"start_city": "St. Louis", "start_state": "MO"}),
+    ("delivering to Saint Paul Minnesota", DFW, {"dest_city": "Saint Paul", "dest_state": "MN"}),
+    ("Fort Worth", DFW, None),
+    ("from Fort Worth", {}, {"start_city": "Fort Worth", "start_state": "TX"}),
+    ("van 45k from Charlotte NC to Richmond Virginia on 6/12", {}, {
+        "start_city": "Charlotte", "start_state": "NC", "dest_city": "Richmond", "dest_state": "VA",
+        "truck_type": "V", "max_weight": "45000", "date": "2025-06-12"}),
+    ("out of Oklahoma City", {}, {"start_city": "Oklahoma City", "start_state": "OK"}),
+    ("yeah a van, 43k", DFW, {"truck_type": "V", "max_weight": "43000"}),
+    ("uh I got a flatbed and I can do 48,000 pounds", DFW, {"truck_type": "F", "max_weight": "48000"}),
+    ("New York to Boston tomorrow", {}, {
+        "start_city": "New York City", "start_state": "NY", "dest_city": "Boston", "dest_state": "MA", "date": "2025-06-03"}),
+    ("heading to El Paso", DFW, {"dest_city": "El Paso", "dest_state": "TX"}),
+    ("from Albuquerque", {}, {"start_city": "Albuquerque", "start_state": "NM"}),
+    ("out of San Antonio on Saturday", {}, {"start_city": "San Antonio", "start_state": "TX", "date": "2025-06-07"}),
+    ("tonight out of Phoenix", {}, {"start_city": "Phoenix", "start_state": "AZ", "date": "2025-06-02"}),
+    # Should go to the LLM
+    ("From either SF or LA", {}, None),
+    ("Hello there", {}, None),
+    ("what's the pickup time on that one", DFW, None),
+    ("Springfield to Chicago", {}, None),
+    ("not Dallas, Houston", {}, None),
+    ("a van or a reefer", DFW, None),
+    ("Monday or Tuesday", DFW, None),
+    ("somewhere in Texas", {}, None),
+    ("I can leave at 6", DFW, None),
+    ("I have a van in Reno 40000", {}, None),
+    ("I can do 10 to 12 k", DFW, None),
+    ("anything going east", DFW, None),
+    ("how much does it pay", DFW, None),
+    ("is there detention pay on that", DFW, None),
+    ("let me think about it", DFW, None),
+    ("actually make it the day after", DFW, None),
+    ("somewhere around the Midwest", DFW, None),
+    ("my brother in law has a reefer", DFW, None),
+    ("Houston", {**DFW, "dest_city": "Atlanta", "dest_state": "GA"}, None),
+    ("Jackson", DFW, None),
+    ("a conestoga", DFW, None),
+    ("I'm up in the panhandle", {}, None),
+]
+
+def main():
+    hits = correct = declined = wrong = 0
+    failures = []
+    for utterance, context, expected in CORPUS:
+        slots, confidence = extract_slots(utterance, context, TODAY)
+        took_fast_path = confidence >= FAST_PATH_CONFIG["MIN_CONFIDENCE"]
+        if took_fast_path:
+            hits += 1
+            if slots == expected:
+                correct += 1
+            else:
+                wrong += 1
+                failures.append((utterance, expected, slots, confidence))
+        elif expected is not None:
+            declined += 1
+            print(f"  declined ({confidence:.2f}): {utterance!r} -> {slots}")
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        for utterance, context, _ in CORPUS:
+            extract_slots(utterance, context, TODAY)
+    parse_ms = (time.perf_counter() - start) * 1000 / (REPEATS * len(CORPUS))
+
+    answerable = sum(1 for *_, expected in CORPUS if expected is not None)
+    hit_rate = hits / len(CORPUS)
+    print(f"{len(CORPUS)} utterances ({answerable} answerable without the LLM)")
+    print(f"fast-path hit rate     {hit_rate:.1%}")
+    print(f"fast-path accuracy     {correct}/{hits}")
+    print(f"missed answerable      {declined}/{answerable}")
+    print(f"parse time per turn    {parse_ms * 1000:.0f}us")
+    print(f"saved per turn         ~{hit_rate * (LLM_EXTRACTION_MS - parse_ms):.0f}ms at {LLM_EXTRACTION_MS}ms per LLM extraction")
+    for utterance, expected, slots, confidence in failures:
+        print(f"  WRONG ({confidence:.2f}): {utterance!r}\n    expected {expected}\n    got      {slots}")
+    assert wrong == 0, f"{wrong} fast-path answers disagree with their labels"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: latency of the turn that completes the search slots, with and
+without the speculative origin-only prefetch.
+
+Each simulated call gives origin, equipment and date first, then the
+weight, then the destination, with the driver talking for THINK_TIME
+between turns. The Anthropic API and the DirectFreight board are stubbed
+with fixed latency; the board answers origin-only searches with every load
+out of Dallas and origin-destination searches with the ones delivering
+near Atlanta. Reports the final turn's latency and checks the prefetched
+answer offers the same loads as a fresh lane search.
+
+Run from backend/:
+    python -m benchmarks.bench_speculative_search
+"""
+import asyncio
+import contextlib
+import io
+import json
+import random
+import statistics
+import time
+
+import httpx
+
+from app.agent import DispatchAgent
+from app.services.http_client import shared_http_client
+from app.services.speculative_search import SpeculativeSearch, speculative_stats
+from benchmarks.bench_agent_concurrency import StubbedLLM
+
+CALLS = 20
+LLM_LATENCY = 0.25
+BOARD_LATENCY = 0.60
+THINK_TIME = 1.5
+SCRIPT = [
+    ("I'm empty in Dallas Texas with a van, picking up June 5th 2025",
+     {"start_city": "Dallas", "start_state": "TX", "truck_type": "V", "date": "2025-06-05"}),
+    ("I can haul 45,000 pounds", {"max_weight": "45000"}),
+    ("Headed to Atlanta Georgia", {"dest_city": "Atlanta", "dest_state": "GA"}),
+]
+NEAR_ATLANTA = [("Atlanta", "GA"), ("Marietta", "GA"), ("Macon", "GA"), ("Athens", "GA"), ("Chattanooga", "TN")]
+ELSEWHERE = [("Chicago", "IL"), ("Memphis", "TN"), ("Denver", "CO"), ("Phoenix", "AZ"), ("Savannah", "GA"), ("Houston", "TX")]
+
+def origin_loads(count: int = 120):
+    rng = random.Random(11)
+    loads = []
+    for i in range(count):
+        city, state = rng.choice(NEAR_ATLANTA if i % 3 == 0 else ELSEWHERE)
+        loads.append({
+            "entry_id": f"{i:08d}-load",
+            "origin_city": "Dallas", "origin_state": "TX",
+            "destination_city": city, "destination_state": state,
+            "trip_miles": rng.randint(400, 1100), "pay_rate": rng.randint(1200, 3200),
+            "rate_per_mile_est": round(rng.uniform(1.6, 3.4), 2), "weight": rng.randint(8000, 52000),
+            "length": rng.choice([24, 40, 48, 53]),
+            "ship_date": "2025-06-05", "age": rng.randint(1, 180), "dead_head": rng.randint(0, 90),
+        })
+    return loads
+
+BOARD = origin_loads()
+BOARD_REQUESTS = {"origin_only": 0, "lane": 0}
+
+async def board_handler(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(BOARD_LATENCY)
+    payload = json.loads(request.content)
+    loads = [load for load in BOARD if load["weight"] <= int(payload["max_weight"])]
+    if payload.get("destination_city"):
+        BOARD_REQUESTS["lane"] += 1
+        loads = [load for load in loads if (load["destination_city"], load["destination_state"]) in NEAR_ATLANTA]
+    else:
+        BOARD_REQUESTS["origin_only"] += 1
+    return httpx.Response(200, json={"list": loads, "total_pages": 1})
+
+class ScriptedLLM(StubbedLLM):
+    """Extraction answers follow the script; everything else gets a canned reply"""
+
+    async def complete(self, prompt: str, max_tokens: int = 500, **kwargs) -> str:
+        await asyncio.sleep(LLM_LATENCY)
+        if "extract structured info" in prompt:
+            said = prompt.split("User message:")[-1]
+            return json.dumps(next((slots for utterance, slots in SCRIPT if utterance in said), {}))
+        return "Got one for you."
+
+class NoPrefetch(SpeculativeSearch):
+    def update(self, args):
+        pass
+
+async def simulate_call(call_id: int, prefetch: bool, final_turns: list, offered: list):
+    agent = DispatchAgent()
+    agent.llm = ScriptedLLM()
+    if not prefetch:
+        agent.prefetch = NoPrefetch()
+    for turn, (utterance, _) in enumerate(SCRIPT):
+        if turn:
+            await asyncio.sleep(THINK_TIME)
+        start = time.perf_counter()
+        await agent.process_input(utterance, call_sid=f"CA{call_id:04d}")
+        if turn == len(SCRIPT) - 1:
+            final_turns.append(time.perf_counter() - start)
+    offered.append([load["entry_id"] for load in agent.current_loads or []])
+
+async def run(prefetch: bool):
+    final_turns, offered = [], []
+    BOARD_REQUESTS.update(origin_only=0, lane=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(simulate_call(i, prefetch, final_turns, offered) for i in range(CALLS)))
+    mode = "prefetch" if prefetch else "search"
+    print(f"{mode:>9} | {statistics.median(final_turns) * 1000:>10.0f} {max(final_turns) * 1000:>10.0f} "
+          f"{BOARD_REQUESTS['origin_only']:>8} {BOARD_REQUESTS['lane']:>6}")
+    return offered
+
+async def main():
+    shared_http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(board_handler))
+    print(f"{CALLS} calls, LLM {LLM_LATENCY * 1000:.0f}ms, board {BOARD_LATENCY * 1000:.0f}ms, {THINK_TIME}s between turns")
+    print(f"{'mode':>9} | {'final p50':>10} {'final max':>10} {'origin':>8} {'lane':>6}")
+    fresh = await run(prefetch=False)
+    speculative = await run(prefetch=True)
+    await shared_http_client.close()
+    print(f"stats: {speculative_stats()}")
+    assert all(offer for offer in fresh), "fresh search offered no loads"
+    assert speculative == fresh, "prefetched loads differ from a fresh lane search"
+
+if __name__ == "__main__":
+    asyncio.run(main())
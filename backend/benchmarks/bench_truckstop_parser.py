@@ -0,0 +1,124 @@
+"""
+Benchmark: Truckstop GetMultipleLoadDetailResults decoding.
+
+Compares the old approach (whole body -> ET.fromstring -> ~25 namespaced
+findtext calls per result) with the streaming TruckstopLoadDecoder fed in
+network-sized chunks. Reports parse time and peak traced memory.
+
+Run from backend/:
+    python -m benchmarks.bench_truckstop_parser
+"""
+import random
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from app.services.truckstop_parser import FIELD_MAP, TruckstopLoadDecoder, safe_float
+
+SIZES = [200, 1000, 5000]
+CHUNK_SIZE = 16384
+NAMESPACES = {
+    's': 'http://schemas.xmlsoap.org/soap/envelope/',
+    'a': 'http://schemas.datacontract.org/2004/07/WebServices.Objects',
+    'b': 'http://schemas.datacontract.org/2004/07/Truckstop2.Objects'
+}
+CITIES = [("Dallas", "TX"), ("Atlanta", "GA"), ("Chicago", "IL"), ("Denver", "CO"), ("Fresno", "CA")]
+
+def build_fixture(count: int, seed: int = 7) -> bytes:
+    """Build a SOAP response body with `count` load results"""
+    rng = random.Random(seed)
+    results = []
+    for i in range(count):
+        origin = rng.choice(CITIES)
+        dest = rng.choice(CITIES)
+        fields = {
+            "ID": str(100000 + i),
+            "OriginCity": origin[0],
+            "OriginState": origin[1],
+            "DestinationCity": dest[0],
+            "DestinationState": dest[1],
+            "Length": "53",
+            "Weight": str(rng.randint(10000, 45000)),
+            "Mileage": str(rng.randint(50, 1500)),
+            "PickupDate": "6/5/25",
+            "DeliveryDate": "6/7/25",
+            "PickupTime": "08:00",
+            "DeliveryTime": "17:00",
+            "DestinationDistance": str(rng.randint(0, 100)),
+            "OriginDistance": str(rng.randint(0, 100)),
+            "PointOfContact": "Dispatch",
+            "PointOfContactPhone": "555-555-0100",
+            "TruckCompanyEmail": "loads@example.com",
+            "Equipment": "V",
+            "SpecInfo": "Dry goods, no touch",
+            "Age": str(rng.randint(0, 48)),
+            "Stops": str(rng.randint(0, 3)),
+            "Credit": "A",
+            "PaymentAmount": f"${rng.randint(300, 5000):,}.00",
+            "Bond": "0",
+            "Experience": "0",
+        }
+        body = "".join(f"<a:{name}>{value}</a:{name}>" for name, value in fields.items())
+        results.append(f"<a:MultipleLoadDetailResult>{body}</a:MultipleLoadDetailResult>")
+    envelope = (
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+        '<GetMultipleLoadDetailResultsResponse xmlns="http://webservices.truckstop.com/v12">'
+        '<GetMultipleLoadDetailResultsResult '
+        'xmlns:a="http://schemas.datacontract.org/2004/07/WebServices.Objects" '
+        'xmlns:i="http://www.w3.org/2001/XMLSchema-instance">'
+        '<a:DetailResults>' + "".join(results) + '</a:DetailResults>'
+        '</GetMultipleLoadDetailResultsResult></GetMultipleLoadDetailResultsResponse>'
+        '</s:Body></s:Envelope>'
+    )
+    return envelope.encode("utf-8")
+
+def legacy_decode(payload: bytes) -> list:
+    """The previous truckstop_search parsing path"""
+    root = ET.fromstring(payload.decode("utf-8"))
+    loads = []
+    for load in root.findall('.//a:MultipleLoadDetailResult', NAMESPACES):
+        load_dict = {}
+        for name, (key, is_numeric) in FIELD_MAP.items():
+            if is_numeric:
+                load_dict[key] = safe_float(load.findtext(f'a:{name}', default='0', namespaces=NAMESPACES))
+            else:
+                load_dict[key] = load.findtext(f'a:{name}', default='', namespaces=NAMESPACES)
+        loads.append(load_dict)
+    return loads
+
+def streaming_decode(payload: bytes) -> list:
+    """The new path, fed chunk by chunk as aiter_bytes() would"""
+    decoder = TruckstopLoadDecoder()
+    loads = []
+    for start in range(0, len(payload), CHUNK_SIZE):
+        loads.extend(decoder.feed(payload[start:start + CHUNK_SIZE]))
+    loads.extend(decoder.close())
+    return loads
+
+def measure(fn, payload: bytes, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    result = fn(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+def main():
+    print(f"{'loads':>6} {'payload':>9} | {'legacy ms':>10} {'legacy peak':>12} | {'stream ms':>10} {'stream peak':>12}")
+    for size in SIZES:
+        payload = build_fixture(size)
+        legacy_time, legacy_peak, legacy_loads = measure(legacy_decode, payload)
+        stream_time, stream_peak, stream_loads = measure(streaming_decode, payload)
+        assert legacy_loads == stream_loads, "decoders disagree"
+        print(
+            f"{size:>6} {len(payload) / 1024:>7.0f}KB | "
+            f"{legacy_time * 1000:>10.1f} {legacy_peak / 1024:>10.0f}KB | "
+            f"{stream_time * 1000:>10.1f} {stream_peak / 1024:>10.0f}KB"
+        )
+
+if __name__ == "__main__":
+    main()
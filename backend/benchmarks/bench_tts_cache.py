@@ -0,0 +1,129 @@
+"""
+Benchmark: TTS cache over a day of simulated calls.
+
+Each call opens with the greeting, then a few turns whose streamed replies
+are a mix of sentences the agent says all the time ("Want me to book it?"),
+canned replies and load-specific sentences that never repeat. ElevenLabs
+is mocked (16kHz PCM, latency per request) and every synthesis is counted.
+
+  legacy - the old unbounded dict keyed by the exact text
+  cache  - TTSCache with a small memory limit, fixed phrases pre-rendered,
+           then a restart that keeps only the SQLite tier
+
+Run from backend/:
+    python -m benchmarks.bench_tts_cache
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "bench")
+os.environ.setdefault("SKYWAZE_CACHE_DIR", tempfile.mkdtemp(prefix="bench_tts_"))
+
+from app.agent import CANNED_REPLIES
+from app.routers.calls import ERROR_MESSAGE, GREETING
+from app.services import tts_client, voice_service
+from app.services.http_client import shared_http_client
+from app.services.tts_cache import TTSCache, phrase_segments
+
+CALLS = 400
+TURNS = 4
+MEMORY_LIMIT = 2 * 1024 * 1024
+TTS_LATENCY = 0.45          # modeled ElevenLabs round trip per request
+SPEECH_CHARS_PER_SECOND = 14
+COMMON_SENTENCES = [
+    "Want me to book it?", "Let me check that for you.", "Sure thing.", "Anything else you need?",
+    "What kind of trailer are you running?", "How much weight can you take?", "When are you looking to pick up?",
+    "That one pays pretty well for the lane.", "I can look for something else if that doesn't work.",
+    "Got it, give me one second.", "Where are you headed after that?", "Sounds good.",
+] + [f"That lane has been busy this week, option {i}." for i in range(40)]
+
+class MockElevenLabs:
+    def __init__(self):
+        self.requests = 0
+
+    def pcm(self, text: str) -> bytes:
+        self.requests += 1
+        return os.urandom(2 * int(len(text) / SPEECH_CHARS_PER_SECOND * 16000))
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=self.pcm(json.loads(request.content)["text"]))
+
+def simulate_calls(seed: int):
+    """Every phrase synthesized over the calls, in order, as ReplyStream would send them"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(COMMON_SENTENCES))]
+    for call in range(CALLS):
+        yield GREETING
+        for turn in range(TURNS):
+            if rng.random() < 0.2:
+                yield from phrase_segments(rng.choice(list(CANNED_REPLIES.values())))
+                continue
+            yield f"The best one picks up in Dallas and pays {rng.randint(1500, 4000)} dollars, {rng.randint(200, 900)} miles out."
+            for sentence in rng.choices(COMMON_SENTENCES, weights, k=rng.randint(1, 2)):
+                # The LLM isn't consistent about spacing
+                yield sentence if rng.random() < 0.7 else sentence + " "
+
+def run_legacy(mock: MockElevenLabs, phrases) -> dict:
+    audio_cache = {}
+    for text in phrases:
+        key = hashlib.md5(text.encode()).hexdigest()
+        if key not in audio_cache:
+            audio_cache[key] = voice_service.to_ulaw_wav(mock.pcm(text))
+    return {"memory_bytes": sum(len(audio) for audio in audio_cache.values()), "entries": len(audio_cache)}
+
+async def run_cache(cache: TTSCache, phrases) -> dict:
+    tts_client.tts_cache = cache
+    for text in phrases:
+        assert await tts_client.elevenlabs_client.synthesize(text)
+    return cache.stats()
+
+def report(name: str, requests: int, lookups: int, memory_bytes: int, extra: str = ""):
+    hit_rate = 1 - requests / lookups
+    print(f"{name:>18} | {requests:>8} {hit_rate:>8.1%} {requests * TTS_LATENCY:>10.0f} {memory_bytes / 1024:>10.0f}  {extra}")
+
+def main():
+    phrases = list(simulate_calls(seed=7))
+    mock = MockElevenLabs()
+    shared_http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(mock.handle))
+    print(f"{CALLS} calls, {len(phrases)} phrases, ElevenLabs modeled at {TTS_LATENCY * 1000:.0f}ms per request")
+    print(f"{'path':>18} | {'TTS reqs':>8} {'hit rate':>8} {'TTS secs':>10} {'memory KB':>10}")
+
+    legacy = run_legacy(mock, phrases)
+    report("legacy", mock.requests, len(phrases), legacy["memory_bytes"], f"{legacy['entries']} entries, unbounded")
+
+    namespace = f"{voice_service.VOICE_ID}|bench"
+    cache = TTSCache(namespace, memory_limit=MEMORY_LIMIT)
+    cache.fixed_phrases.extend([GREETING, ERROR_MESSAGE, *CANNED_REPLIES.values()])
+    cache.play_phrases.append(ERROR_MESSAGE)
+    mock.requests = 0
+    tts_client.tts_cache = cache
+    start = time.perf_counter()
+    asyncio.run(cache.prerender(tts_client.elevenlabs_client.render))
+    prerender_requests = mock.requests
+    print(f"pre-render: {prerender_requests} phrases in {time.perf_counter() - start:.2f}s (mock), store {cache.store.count()} entries")
+
+    mock.requests = 0
+    stats = asyncio.run(run_cache(cache, phrases))
+    report("cache", mock.requests, len(phrases), stats["memory_bytes"],
+           f"{stats['memory_entries']} entries, limit {MEMORY_LIMIT // 1024}KB, {stats['store_hits']} store hits")
+    assert stats["memory_bytes"] <= MEMORY_LIMIT
+
+    # A new worker (or a redeploy) starts with an empty memory tier
+    restarted = TTSCache(namespace, memory_limit=MEMORY_LIMIT)
+    mock.requests = 0
+    phrases = list(simulate_calls(seed=8))
+    stats = asyncio.run(run_cache(restarted, phrases))
+    report("cache (restarted)", mock.requests, len(phrases), stats["memory_bytes"], f"{stats['store_hits']} store hits")
+    assert restarted.get(GREETING) is not None and restarted.get(ERROR_MESSAGE) is not None and mock.requests < len(phrases)
+    store_bytes = sum(len(value) for _, value, _ in restarted.store.items())
+    print(f"store: {restarted.store.count()} phrases, {store_bytes / 1024:.0f}KB of raw mu-law")
+
+if __name__ == "__main__":
+    main()
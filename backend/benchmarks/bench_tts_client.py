@@ -0,0 +1,123 @@
+"""
+Benchmark: how long a caller waits to hear a sentence, against a flaky TTS provider.
+
+The mock ElevenLabs answers most requests with a first byte after ~300ms
+and the rest at 4ms per character, but returns 503 for 5% of attempts and
+stalls for 8s before the first byte on 2%. Every sentence is synthesized
+concurrently; "heard" is when audio (or the decision to use Polly) is ready.
+
+  legacy   - one blocking-style request per sentence on a fresh connection,
+             no timeout or retry, whole body before anything plays
+  buffered - ElevenLabsClient.synthesize: retries with jitter, Polly once the
+             clip misses its latency budget
+  streamed - ElevenLabsClient.stream: first audio as soon as it arrives,
+             Polly if it misses the first-audio budget
+
+Run from backend/:
+    python -m benchmarks.bench_tts_client
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "bench")
+os.environ.setdefault("SKYWAZE_CACHE_DIR", tempfile.mkdtemp(prefix="bench_tts_client_"))
+
+from app.services import tts_client
+from app.services.http_client import shared_http_client
+from app.services.tts_cache import TTSCache
+from app.services.tts_client import STREAM_URL, TTS_CLIENT_CONFIG, elevenlabs_client
+from app.services.voice_service import to_ulaw_wav
+
+SENTENCES = 200
+ERROR_RATE = 0.05
+STALL_RATE = 0.02
+STALL_SECONDS = 8.0
+FIRST_BYTE_MEDIAN = 0.30
+TTS_PER_CHAR = 0.004
+CHUNKS = 6
+
+class FlakyElevenLabs:
+    def __init__(self):
+        self.attempts = {}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        text = json.loads(request.content)["text"]
+        attempt = self.attempts[text] = self.attempts.get(text, 0) + 1
+        rng = random.Random(f"{text}|{attempt}")
+        roll = rng.random()
+        if roll < ERROR_RATE:
+            await asyncio.sleep(0.05)
+            return httpx.Response(503, content=b"overloaded")
+        await asyncio.sleep(STALL_SECONDS if roll < ERROR_RATE + STALL_RATE else FIRST_BYTE_MEDIAN * rng.lognormvariate(0, 0.4))
+        pcm = b"\x00\x01" * int(len(text) / 14 * 16000)
+
+        async def body():
+            step = -(-len(pcm) // CHUNKS)
+            for offset in range(0, len(pcm), step):
+                yield pcm[offset:offset + step]
+                await asyncio.sleep(TTS_PER_CHAR * len(text) / CHUNKS)
+
+        return httpx.Response(200, content=body())
+
+def sentences():
+    rng = random.Random(3)
+    words = "load pays dallas atlanta pickup tomorrow reefer miles rate broker dispatch weight".split()
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(10, 22))).capitalize() + "." for _ in range(SENTENCES)]
+
+async def legacy(provider: FlakyElevenLabs, text: str):
+    # requests.post without a session: new connection, no timeout, no retry
+    async with httpx.AsyncClient(transport=httpx.MockTransport(provider.handle), timeout=None) as client:
+        response = await client.post(STREAM_URL, json={"text": text})
+        if response.status_code != 200:
+            return False
+        to_ulaw_wav(response.content)
+        return True
+
+async def buffered(provider: FlakyElevenLabs, text: str):
+    return await elevenlabs_client.synthesize(text) is not None
+
+async def streamed(provider: FlakyElevenLabs, text: str):
+    async for _ in elevenlabs_client.stream(text):
+        return True
+    return False
+
+async def run(path, texts):
+    provider = FlakyElevenLabs()
+    shared_http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(provider.handle))
+    tts_client.tts_cache = TTSCache(f"bench|{path.__name__}")
+    tts_client.tts_cache.clear()
+
+    async def one(text):
+        start = time.perf_counter()
+        spoken = await path(provider, text)
+        return time.perf_counter() - start, spoken
+
+    results = await asyncio.gather(*(one(text) for text in texts))
+    await shared_http_client.close()
+    return results
+
+def main():
+    texts = sentences()
+    print(f"{SENTENCES} sentences, {ERROR_RATE:.0%} 503s, {STALL_RATE:.0%} stalls of {STALL_SECONDS:.0f}s, "
+          f"budgets {TTS_CLIENT_CONFIG['LATENCY_BUDGET_SECONDS']}s clip / {TTS_CLIENT_CONFIG['FIRST_AUDIO_BUDGET_SECONDS']}s first audio")
+    print(f"{'path':>9} | {'heard p50 ms':>12} {'p95 ms':>8} {'max ms':>8} {'ElevenLabs':>10} {'Polly':>6}")
+    for path in (legacy, buffered, streamed):
+        results = asyncio.run(run(path, texts))
+        waits = sorted(wait for wait, _ in results)
+        spoken = sum(1 for _, ok in results if ok)
+        p95 = waits[int(len(waits) * 0.95) - 1]
+        print(f"{path.__name__:>9} | {statistics.median(waits) * 1000:>12.0f} {p95 * 1000:>8.0f} {waits[-1] * 1000:>8.0f} "
+              f"{spoken:>10} {len(results) - spoken:>6}")
+    stats = elevenlabs_client.stats()
+    print(f"client: {stats['requests']} requests, {stats['retries']} retries, {stats['errors']} errors, "
+          f"{stats['budget_fallbacks']} budget fallbacks")
+
+if __name__ == "__main__":
+    main()
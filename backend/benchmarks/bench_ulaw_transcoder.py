@@ -0,0 +1,105 @@
+"""
+Benchmark: TTS audio to 8kHz mu-law, in-process vs ffmpeg.
+
+  legacy      - the old convert_to_ulaw: `ffmpeg -version` probe, MP3 to a
+                temp file, ffmpeg subprocess, WAV read back, files deleted
+  ffmpeg pipe - the remaining MP3 fallback: one ffmpeg over stdin/stdout
+  in-process  - 16kHz PCM (ElevenLabs pcm_16000) resampled and encoded
+                with NumPy, no subprocess or disk
+
+Reports wall time and CPU (ours plus child processes) per utterance, and
+how closely the in-process output matches ffmpeg resampling the same PCM.
+The ffmpeg rows need ffmpeg on PATH and are skipped without it.
+
+Run from backend/:
+    python -m benchmarks.bench_ulaw_transcoder
+"""
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.audio_codec import pcm16_to_ulaw, ulaw_decode
+from app.services.voice_service import convert_to_ulaw
+
+SOURCE_RATE = 16000
+UTTERANCE_SECONDS = 6
+REPEATS = 20
+
+def speech_like_pcm(seconds: float, rate: int) -> bytes:
+    """Voiced harmonics with a syllable envelope, some breath noise and sibilance above 4kHz"""
+    rng = np.random.default_rng(5)
+    t = np.arange(int(seconds * rate)) / rate
+    pitch = 140 + 25 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 20))
+    envelope = np.clip(np.sin(2 * np.pi * 3.1 * t), 0, None) ** 0.6
+    hiss = np.convolve(rng.standard_normal(len(t)), [1, -1], mode="same") * 0.15
+    signal = (voiced * envelope + hiss) * 6000
+    return np.clip(signal, -32768, 32767).astype("<i2").tobytes()
+
+def legacy_convert(audio_data: bytes) -> bytes:
+    """convert_to_ulaw as it was before the in-process path"""
+    subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
+    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as input_file, \
+         tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as output_file:
+        input_file.write(audio_data)
+        input_file.flush()
+        subprocess.run([
+            'ffmpeg', '-y', '-i', input_file.name,
+            '-ar', '8000', '-ac', '1', '-acodec', 'pcm_mulaw', output_file.name
+        ], check=True, capture_output=True)
+        with open(output_file.name, 'rb') as f:
+            converted_audio = f.read()
+        os.unlink(input_file.name)
+        os.unlink(output_file.name)
+        return converted_audio
+
+def ffmpeg(args, data: bytes) -> bytes:
+    return subprocess.run(['ffmpeg', '-hide_banner', '-loglevel', 'error', *args], input=data, check=True, capture_output=True).stdout
+
+def measure(fn, data: bytes):
+    walls, cpus = [], []
+    for _ in range(REPEATS):
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        fn(data)
+        walls.append(time.perf_counter() - start)
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        children = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+        cpus.append(time.process_time() - cpu_start + children)
+    return np.median(walls) * 1000, np.median(cpus) * 1000
+
+def main():
+    pcm = speech_like_pcm(UTTERANCE_SECONDS, SOURCE_RATE)
+    print(f"{UTTERANCE_SECONDS}s utterance, {SOURCE_RATE}Hz 16-bit PCM source, median of {REPEATS}")
+    print(f"{'path':>12} | {'wall ms':>8} {'cpu ms':>8}")
+    wall, cpu = measure(lambda data: pcm16_to_ulaw(data, SOURCE_RATE), pcm)
+    print(f"{'in-process':>12} | {wall:>8.2f} {cpu:>8.2f}")
+
+    if not shutil.which("ffmpeg"):
+        print("ffmpeg not on PATH: legacy and pipe rows skipped")
+        return
+    mp3 = ffmpeg(['-f', 's16le', '-ar', str(SOURCE_RATE), '-ac', '1', '-i', 'pipe:0', '-f', 'mp3', 'pipe:1'], pcm)
+    for name, fn in (("legacy", legacy_convert), ("ffmpeg pipe", convert_to_ulaw)):
+        wall, cpu = measure(fn, mp3)
+        print(f"{name:>12} | {wall:>8.2f} {cpu:>8.2f}")
+
+    # Same PCM through ffmpeg's resampler and mu-law encoder, for comparison
+    reference = ulaw_decode(ffmpeg(['-f', 's16le', '-ar', str(SOURCE_RATE), '-ac', '1', '-i', 'pipe:0',
+                                    '-ar', '8000', '-f', 'mulaw', 'pipe:1'], pcm)).astype(np.float64)
+    ours = ulaw_decode(pcm16_to_ulaw(pcm, SOURCE_RATE)).astype(np.float64)
+    n = min(len(reference), len(ours))
+    lag = int(np.argmax(np.correlate(ours[:4000], reference[:4000], mode="full"))) - 3999
+    aligned = np.roll(ours, -lag)[:n]
+    snr = 10 * np.log10(np.sum(reference[:n] ** 2) / np.sum((reference[:n] - aligned) ** 2))
+    print(f"in-process vs ffmpeg: {len(ours)} vs {len(reference)} samples, lag {lag}, SNR {snr:.1f} dB")
+    assert abs(len(ours) - len(reference)) <= 2 and snr > 20, "in-process output diverges from ffmpeg"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark: time to first audio on a voice turn, buffered vs streamed.
+
+Drives the /calls router in-process with a mock LLM (fixed time to first
+token, then a steady token rate) and a mock ElevenLabs streaming endpoint
+behind the shared HTTP client (16kHz PCM: first bytes after a fixed
+overhead, the rest paced by time per character). The TTS cache is cleared
+before every turn.
+
+  buffered - /calls/answer waits for the whole reply and its TTS before
+             returning TwiML; first audio is when the response arrives
+  streamed - /calls/answer returns <Connect><Stream> at once; first audio
+             is the first media message on the /calls/media socket
+
+Also checks the streamed audio adds up to every sentence of the reply.
+
+Run from backend/:
+    python -m benchmarks.bench_voice_latency
+"""
+import asyncio
+import base64
+import json
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "bench")
+os.environ.setdefault("NGROK_URL", "https://bench.example")
+os.environ.setdefault("SKYWAZE_CACHE_DIR", tempfile.mkdtemp(prefix="bench_voice_"))
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.agent import DispatchAgent
+from app.routers import calls
+from app.services.call_sessions import active_calls
+from app.services.http_client import shared_http_client
+from app.services.llm_client import SharedLLMClient
+from app.services.speech_pipeline import STREAMING_CONFIG, SentenceSplitter, reply_streams
+from app.services.tts_client import elevenlabs_client
+from app.services.voice_service import tts_cache
+
+TURNS = 5
+EXTRACTION_LATENCY = 0.40
+FIRST_TOKEN_LATENCY = 0.35
+TOKEN_INTERVAL = 0.02
+TTS_OVERHEAD = 0.25
+TTS_PER_CHAR = 0.004
+TTS_CHUNKS = 8
+SPEECH_CHARS_PER_SECOND = 14
+UTTERANCE = "what's the pickup time on that one"
+REPLY = (
+    "No problem, I can check that for you. "
+    "The best one I have picks up in Dallas tomorrow at 8 a.m. and delivers to Atlanta Thursday. "
+    "It pays twenty four hundred, about two sixty a mile. "
+    "Want me to book it?"
+)
+# Roughly how an LLM tokenizes: words with their leading space
+TOKENS = [word if i == 0 else " " + word for i, word in enumerate(REPLY.split(" "))]
+
+class MockLLM(SharedLLMClient):
+    async def complete(self, prompt: str, max_tokens: int = 500, **kwargs) -> str:
+        if "extract structured info" in prompt:
+            await asyncio.sleep(EXTRACTION_LATENCY)
+            return "{}"
+        await asyncio.sleep(FIRST_TOKEN_LATENCY + TOKEN_INTERVAL * len(TOKENS))
+        return REPLY
+
+    async def stream(self, prompt: str, max_tokens: int = 500, **kwargs):
+        await asyncio.sleep(FIRST_TOKEN_LATENCY)
+        for token in TOKENS:
+            yield token
+            await asyncio.sleep(TOKEN_INTERVAL)
+
+def pcm_samples(text: str) -> int:
+    """16kHz samples of speech for the text"""
+    return int(len(text) / SPEECH_CHARS_PER_SECOND * 16000)
+
+async def mock_elevenlabs(request: httpx.Request) -> httpx.Response:
+    """Streaming endpoint: PCM sized like real speech, arriving in pieces as it is synthesized"""
+    text = json.loads(request.content)["text"]
+    pcm = b"\x00\x01" * pcm_samples(text)
+    await asyncio.sleep(TTS_OVERHEAD)
+
+    async def body():
+        step = -(-len(pcm) // TTS_CHUNKS)
+        for offset in range(0, len(pcm), step):
+            yield pcm[offset:offset + step]
+            await asyncio.sleep(TTS_PER_CHAR * len(text) / TTS_CHUNKS)
+
+    return httpx.Response(200, content=body())
+
+def new_call(call_sid: str):
+    agent = DispatchAgent()
+    agent.llm = MockLLM()
+    active_calls[call_sid] = agent
+
+def buffered_turn(client: TestClient, call_sid: str) -> float:
+    new_call(call_sid)
+    tts_cache.clear()
+    start = time.perf_counter()
+    client.post("/calls/answer", data={"CallSid": call_sid, "SpeechResult": UTTERANCE})
+    return time.perf_counter() - start
+
+def streamed_turn(client: TestClient, call_sid: str):
+    new_call(call_sid)
+    tts_cache.clear()
+    start = time.perf_counter()
+    twiml = client.post("/calls/answer", data={"CallSid": call_sid, "SpeechResult": UTTERANCE}).text
+    assert "<Connect><Stream" in twiml, twiml
+    first_audio = None
+    audio_bytes = 0
+    with client.websocket_connect(f"/calls/media/{call_sid}") as ws:
+        ws.send_text(json.dumps({"event": "connected"}))
+        ws.send_text(json.dumps({"event": "start", "streamSid": "MZbench", "start": {"callSid": call_sid}}))
+        while True:
+            message = json.loads(ws.receive_text())
+            if message["event"] == "media":
+                if first_audio is None:
+                    first_audio = time.perf_counter() - start
+                audio_bytes += len(base64.b64decode(message["media"]["payload"]))
+            elif message["event"] == "mark":
+                ws.send_text(json.dumps({"event": "mark", "streamSid": "MZbench", "mark": message["mark"]}))
+                break
+    continued = client.post(f"/calls/continue/{call_sid}").text
+    assert "<Say" not in continued, f"sentences fell back to Polly: {continued}"
+    return first_audio, audio_bytes
+
+def main():
+    app = FastAPI()
+    app.include_router(calls.router)
+    shared_http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(mock_elevenlabs))
+    expected_bytes = 0
+    splitter = SentenceSplitter()
+    for sentence in splitter.feed(REPLY) + [splitter.flush()]:
+        if sentence:
+            expected_bytes += (pcm_samples(sentence) + 1) // 2
+
+    with TestClient(app) as client:
+        STREAMING_CONFIG["ENABLED"] = False
+        buffered = [buffered_turn(client, f"CAbuf{i}") for i in range(TURNS)]
+        STREAMING_CONFIG["ENABLED"] = True
+        streamed = []
+        for i in range(TURNS):
+            first_audio, audio_bytes = streamed_turn(client, f"CAstr{i}")
+            assert audio_bytes == expected_bytes, f"streamed {audio_bytes} bytes of audio, expected {expected_bytes}"
+            streamed.append(first_audio)
+
+    print(f"LLM first token {FIRST_TOKEN_LATENCY * 1000:.0f}ms + {len(TOKENS)} tokens at {TOKEN_INTERVAL * 1000:.0f}ms, "
+          f"extraction {EXTRACTION_LATENCY * 1000:.0f}ms, TTS {TTS_OVERHEAD * 1000:.0f}ms + {TTS_PER_CHAR * 1000:.0f}ms/char")
+    print(f"{'mode':>9} | {'first audio p50 ms':>18} {'max ms':>8}")
+    print(f"{'buffered':>9} | {statistics.median(buffered) * 1000:>18.0f} {max(buffered) * 1000:>8.0f}")
+    print(f"{'streamed':>9} | {statistics.median(streamed) * 1000:>18.0f} {max(streamed) * 1000:>8.0f}")
+    print(f"stats: {reply_streams.stats()}")
+    print(f"elevenlabs: {elevenlabs_client.stats()}")
+
+if __name__ == "__main__":
+    main()
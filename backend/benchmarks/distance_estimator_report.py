@@ -0,0 +1,93 @@
+"""
+Report: offline distance estimator vs cached Routes API distances.
+
+Reads every pair in the driving_distance store (the shared tier of
+DistanceCache), estimates it with haversine * regional road circuity factor
+and prints error stats overall and per region, plus the circuity factor the
+sample suggests for each region.
+
+Run from backend/ on a machine with a warm cache:
+    python -m benchmarks.distance_estimator_report
+    SKYWAZE_CACHE_DIR=/path/to/cache python -m benchmarks.distance_estimator_report
+"""
+import json
+from collections import defaultdict
+
+import numpy as np
+
+from app.services.distance_estimator import (
+    ROAD_CIRCUITY_FACTORS,
+    estimate_driving_miles,
+    haversine_miles,
+    city_coordinates,
+    region_for_state,
+)
+from app.services.persistent_store import PersistentStore
+
+# Very short hops are dominated by where in town the geocoder lands
+MIN_ROUTES_MILES = 5.0
+
+def load_samples(store: PersistentStore):
+    """(origin, destination, routes_miles) for every cached pair"""
+    samples = []
+    for key, value, _ in store.items():
+        try:
+            origin, destination = (tuple(part.split("|")) for part in key.split("::"))
+            distance, _ = json.loads(value)
+        except (ValueError, TypeError):
+            continue
+        if distance is None or distance < MIN_ROUTES_MILES:
+            continue
+        samples.append((origin, destination, float(distance)))
+    return samples
+
+def error_row(label: str, routes: np.ndarray, estimates: np.ndarray) -> str:
+    pct = np.abs(estimates - routes) / routes * 100
+    bias = np.mean((estimates - routes) / routes) * 100
+    return (
+        f"{label:<22} {len(routes):>6} {np.mean(np.abs(estimates - routes)):>9.1f} "
+        f"{np.median(pct):>8.1f}% {np.percentile(pct, 90):>8.1f}% {bias:>+8.1f}%"
+    )
+
+def main():
+    store = PersistentStore("driving_distance")
+    samples = load_samples(store)
+    if not samples:
+        print(f"No cached Routes distances in {store.path}; run the planner first or point SKYWAZE_CACHE_DIR at a warm cache.")
+        return
+
+    origins = [s[0] for s in samples]
+    destinations = [s[1] for s in samples]
+    routes = np.array([s[2] for s in samples])
+    estimates = estimate_driving_miles(origins, destinations)
+
+    known = ~np.isnan(estimates)
+    print(f"Cached pairs: {len(samples)}, placed by gazetteer: {int(known.sum())}\n")
+    print(f"{'group':<22} {'pairs':>6} {'MAE mi':>9} {'med err':>9} {'p90 err':>9} {'bias':>9}")
+    print(error_row("all", routes[known], estimates[known]))
+
+    o_lats, o_lons = city_coordinates(origins)
+    d_lats, d_lons = city_coordinates(destinations)
+    great_circle = haversine_miles(o_lats, o_lons, d_lats, d_lons)
+
+    groups = defaultdict(list)
+    for i, (origin, destination) in enumerate(zip(origins, destinations)):
+        if not known[i]:
+            continue
+        o_region, d_region = region_for_state(origin[1]), region_for_state(destination[1])
+        groups[o_region if o_region == d_region else "cross-region"].append(i)
+        groups[f"{'<250' if routes[i] < 250 else '>=250'} mi"].append(i)
+
+    for label in sorted(groups):
+        rows = np.array(groups[label])
+        print(error_row(label, routes[rows], estimates[rows]))
+
+    print(f"\n{'region':<14} {'current':>8} {'suggested':>10}")
+    for region, current in ROAD_CIRCUITY_FACTORS.items():
+        rows = np.array(groups.get(region, []), dtype=np.int64)
+        rows = rows[great_circle[rows] > 0] if len(rows) else rows
+        suggested = f"{np.median(routes[rows] / great_circle[rows]):.3f}" if len(rows) else "-"
+        print(f"{region:<14} {current:>8.2f} {suggested:>10}")
+
+if __name__ == "__main__":
+    main()